@@ -0,0 +1,87 @@
+import argparse
+import random
+import re
+import time
+from datetime import datetime
+from typing import Dict, List
+
+from src.common.models import Issue
+from src.jira_miner.linker.issue_keys import IssueKeyExtractor
+from src.jira_miner.linker.registries import IssueRegistry
+
+
+def build_registry(issues: int, projects: int = 5) -> IssueRegistry:
+    registry = IssueRegistry()
+    now = datetime.now()
+    for i in range(issues):
+        registry.add(Issue(id=i, key=f"PRJ{i % projects}-{i + 1}", summary="", createdAt=now, updatedAt=now))
+    return registry
+
+
+def build_texts(registry: IssueRegistry, texts: int, seed: int = 0) -> List[str]:
+    """Commit-message-like texts, half mentioning a known key and some an unknown one."""
+    rng = random.Random(seed)
+    keys = sorted(registry.all_ids)
+    result = []
+    for i in range(texts):
+        words = ["Fix", "the", "flaky", "handler", "in", "module", str(i)]
+        if i % 2 == 0:
+            words.insert(rng.randrange(len(words)), rng.choice(keys))
+        if i % 7 == 0:
+            words.append(f"OTHER-{i}")
+        result.append(" ".join(words))
+    return result
+
+
+def measure_linking(issues: int, texts: int, workers: int = 1) -> Dict[str, float]:
+    """Seconds to scan ``texts`` texts with the key alternation, and with IssueKeyExtractor on 1 and ``workers`` processes."""
+    registry = build_registry(issues)
+    corpus = build_texts(registry, texts)
+
+    start = time.perf_counter()
+    pattern = re.compile(r"\b(" + "|".join(re.escape(key) for key in registry.all_ids) + r")\b", re.IGNORECASE)
+    compiled = time.perf_counter()
+    alternation = 0
+    for text in corpus:
+        for match in set(pattern.findall(text)):
+            if registry.get_by_id(match.upper()) is not None:
+                alternation += 1
+    alternation_end = time.perf_counter()
+
+    extractor = IssueKeyExtractor(registry)
+    extracted = 0
+    for text in corpus:
+        extracted += len(extractor.find_issues(text))
+    extractor_end = time.perf_counter()
+
+    if alternation != extracted:
+        raise AssertionError(f"alternation found {alternation} links, extractor {extracted}")
+    results = {
+        "alternation compile": compiled - start,
+        "alternation scan": alternation_end - compiled,
+        "extractor": extractor_end - alternation_end,
+    }
+    if workers > 1:
+        start = time.perf_counter()
+        parallel = sum(len(issues) for issues in extractor.find_all(corpus, workers))
+        results[f"extractor x{workers}"] = time.perf_counter() - start
+        if parallel != extracted:
+            raise AssertionError(f"{workers} workers found {parallel} links, one {extracted}")
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare the issue-key alternation regex with IssueKeyExtractor.")
+    parser.add_argument("--issues", type=int, default=50_000)
+    parser.add_argument("--texts", type=int, default=20_000)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    results = measure_linking(args.issues, args.texts, args.workers)
+    print(f"{'step':>20} {'seconds':>10}")
+    for name, seconds in results.items():
+        print(f"{name:>20} {seconds:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import argparse
+import gc
+import json
+import time
+from pathlib import Path
+from typing import Callable, Dict, Type
+
+from pydantic import BaseModel
+
+from src.github_miner import JsonFileFormatGithub
+from src.github_miner.reader_dto.loader import GithubJsonLoader
+from src.jira_miner.reader_dto.loader import JiraJsonLoader
+from src.jira_miner.reader_dto.models import JsonFileFormatJira
+
+
+def measure_load(jira_path: str, github_path: str, repeat: int = 3) -> Dict[str, float]:
+    """Best seconds to load each export with json.load and model_validate, and with its loader."""
+    runs: Dict[str, Callable[[], BaseModel]] = {
+        "jira dict": lambda: _validate_dict(JsonFileFormatJira, jira_path),
+        "jira loader": lambda: JiraJsonLoader(jira_path).load(),
+        "github dict": lambda: _validate_dict(JsonFileFormatGithub, github_path),
+        "github loader": lambda: GithubJsonLoader(github_path).load(),
+    }
+    results = {}
+    for name, run in runs.items():
+        best = float("inf")
+        for _ in range(repeat):
+            gc.collect()
+            start = time.perf_counter()
+            run()
+            best = min(best, time.perf_counter() - start)
+        results[name] = best
+    return results
+
+
+def _validate_dict(model: Type[BaseModel], path: str) -> BaseModel:
+    with Path(path).open("r", encoding="utf-8") as f:
+        return model.model_validate(json.load(f))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare loading the miners' exports through dicts and the loaders.")
+    parser.add_argument("jira_path")
+    parser.add_argument("github_path")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    results = measure_load(args.jira_path, args.github_path, args.repeat)
+    print(f"{'load':>14} {'seconds':>10}")
+    for name, seconds in results.items():
+        print(f"{name:>14} {seconds:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
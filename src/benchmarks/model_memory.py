@@ -0,0 +1,49 @@
+import argparse
+import gc
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, Tuple
+
+from src.common.model_backends import ModelBackend, PYDANTIC_BACKEND, SLOTTED_BACKEND
+from src.inspector_git.linker.transformers import GitProjectTransformer
+from src.inspector_git.reader.git_client import GitClient
+from src.inspector_git.reader.parsers.log_parser import LogParser
+
+BACKENDS = {"pydantic": PYDANTIC_BACKEND, "slotted": SLOTTED_BACKEND}
+
+
+def measure_backend(repo_path: str, backend: ModelBackend, compute_annotated_lines: bool = True) -> Tuple[float, int, int]:
+    """Build time in seconds, bytes held by the built project and number of commits."""
+    client = GitClient(Path(repo_path))
+    git_log_dto = LogParser(client).parse(client.get_logs())
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    project = GitProjectTransformer(git_log_dto, name=Path(repo_path).name,
+                                    compute_annotated_lines=compute_annotated_lines, backend=backend).transform()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return elapsed, held, len(project.git_commit_registry.all)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare build time and memory per commit of the model backends.")
+    parser.add_argument("repo_path")
+    parser.add_argument("--no-annotated-lines", action="store_true")
+    args = parser.parse_args()
+
+    results: Dict[str, Tuple[float, int, int]] = {
+        name: measure_backend(args.repo_path, backend, not args.no_annotated_lines) for name, backend in BACKENDS.items()
+    }
+    print(f"{'backend':>10} {'seconds':>10} {'MiB':>10} {'bytes/commit':>14}")
+    for name, (elapsed, held, commits) in results.items():
+        print(f"{name:>10} {elapsed:>10.3f} {held / 2 ** 20:>10.1f} {held // max(commits, 1):>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import argparse
+from pathlib import Path
+
+from src.inspector_git.linker.transformers import GitProjectTransformer
+from src.inspector_git.reader.git_client import GitClient
+from src.inspector_git.reader.iglog.readers.ig_log_reader import IGLogReader
+from src.inspector_git.reader.parsers.log_parser import LogParser
+from src.profiler import get_profiler
+
+PROFILER = get_profiler()
+
+
+def profile_build(source: str, compute_annotated_lines: bool = True, workers: int = 1) -> None:
+    """Build a project from an .iglog file or a git repository with the profiler enabled."""
+    PROFILER.reset()
+    PROFILER.enable()
+    try:
+        with PROFILER.span("build"):
+            if source.endswith(".iglog"):
+                with open(source, "r", encoding="utf-8") as f:
+                    git_log_dto = IGLogReader().read(f)
+            else:
+                client = GitClient(Path(source))
+                git_log_dto = LogParser(client).parse(client.get_logs())
+            GitProjectTransformer(git_log_dto, name=Path(source).stem,
+                                  compute_annotated_lines=compute_annotated_lines, workers=workers).transform()
+    finally:
+        PROFILER.disable()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Profile the phases of a project build.")
+    parser.add_argument("source", help="an .iglog file or a git repository")
+    parser.add_argument("--no-annotated-lines", action="store_true")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--json", default="build-profile.json")
+    parser.add_argument("--collapsed", default="build-profile.folded")
+    args = parser.parse_args()
+
+    profile_build(args.source, not args.no_annotated_lines, args.workers)
+    PROFILER.dump_json(args.json)
+    PROFILER.dump_collapsed(args.collapsed)
+
+    report = PROFILER.report()
+    print(f"{'span':<70} {'calls':>8} {'seconds':>9} {'self':>9}")
+    for path, stats in report["spans"].items():
+        print(f"{path:<70} {stats['calls']:>8} {stats['seconds']:>9.3f} {stats['self_seconds']:>9.3f}")
+    for name, value in report["counters"].items():
+        print(f"{name:<70} {value:>8}")
+
+
+if __name__ == "__main__":
+    main()
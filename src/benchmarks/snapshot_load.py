@@ -0,0 +1,57 @@
+import argparse
+import os
+import pickle
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Tuple
+
+from src.common.model_backends import PYDANTIC_BACKEND, SLOTTED_BACKEND
+from src.inspector_git.linker.snapshot import GraphSnapshot
+from src.inspector_git.linker.transformers import GitProjectTransformer
+from src.inspector_git.reader.git_client import GitClient
+from src.inspector_git.reader.parsers.log_parser import LogParser
+
+BACKENDS = {"pydantic": PYDANTIC_BACKEND, "slotted": SLOTTED_BACKEND}
+
+
+def measure_load(repo_path: str, compute_annotated_lines: bool = True, repeat: int = 3) -> Dict[str, Tuple[float, int]]:
+    """Best load time in seconds and size in bytes of a pickled project and of its snapshot, per backend."""
+    client = GitClient(Path(repo_path))
+    logs = client.get_logs()
+    results = {}
+    for name, backend in BACKENDS.items():
+        project = GitProjectTransformer(LogParser(client).parse(logs), name=Path(repo_path).name,
+                                        compute_annotated_lines=compute_annotated_lines, backend=backend).transform()
+        data = pickle.dumps(project)
+        results[f"{name} pickle"] = (min(_timed(pickle.loads, data) for _ in range(repeat)), len(data))
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "project.igsnap")
+            GraphSnapshot.save(project, path)
+            results[f"{name} snapshot"] = (min(_timed(GraphSnapshot.load, path) for _ in range(repeat)),
+                                           os.path.getsize(path))
+    return results
+
+
+def _timed(load, source) -> float:
+    start = time.perf_counter()
+    load(source)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare loading a project from pickle and from a graph snapshot.")
+    parser.add_argument("repo_path")
+    parser.add_argument("--no-annotated-lines", action="store_true")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    results = measure_load(args.repo_path, not args.no_annotated_lines, args.repeat)
+    print(f"{'format':>18} {'seconds':>10} {'MiB':>10}")
+    for name, (elapsed, size) in results.items():
+        print(f"{name:>18} {elapsed:>10.3f} {size / 2 ** 20:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
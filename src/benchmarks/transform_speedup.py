@@ -0,0 +1,47 @@
+import argparse
+import os
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from src.inspector_git.linker.transformers import GitProjectTransformer
+from src.inspector_git.reader.git_client import GitClient
+from src.inspector_git.reader.parsers.log_parser import LogParser
+from src.logger import get_logger
+
+LOG = get_logger(__name__)
+
+
+def measure_transform(repo_path: str, worker_counts: List[int], repeat: int = 3) -> Dict[int, float]:
+    """Best wall-clock time of GitProjectTransformer with annotated lines, per worker count."""
+    client = GitClient(Path(repo_path))
+    logs = client.get_logs()
+    timings = {}
+    for workers in worker_counts:
+        best = float("inf")
+        for _ in range(repeat):
+            git_log_dto = LogParser(client).parse(logs)
+            start = time.perf_counter()
+            GitProjectTransformer(git_log_dto, name=Path(repo_path).name, compute_annotated_lines=True,
+                                  workers=workers).transform()
+            best = min(best, time.perf_counter() - start)
+        timings[workers] = best
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Report the speedup of parallel project transformation.")
+    parser.add_argument("repo_path")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    worker_counts = sorted(set([1] + args.workers))
+    timings = measure_transform(args.repo_path, worker_counts, args.repeat)
+    print(f"{'workers':>8} {'seconds':>10} {'speedup':>8}")
+    for workers, seconds in timings.items():
+        print(f"{workers:>8} {seconds:>10.3f} {timings[1] / seconds:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
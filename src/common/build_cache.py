@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from pydantic import BaseModel
+
+from src.common.models import GitCommitMixin, GitProject, Project
+from src.common.ordered_set import OrderedSet
+from src.inspector_git.linker import snapshot
+from src.inspector_git.linker.snapshot import GraphSnapshot
+from src.logger import get_logger
+from src.profiler import get_profiler
+
+LOG = get_logger(__name__)
+PROFILER = get_profiler()
+
+# Bump when the cached layout changes in a way the package source does not capture.
+CACHE_VERSION = 1
+
+# The package whose source defines the cached graph. Any module can change what gets built, linked or
+# serialized, e.g. the issue-key rules or the rope export, so editing any of them invalidates the cache.
+SOURCE_ROOT = Path(__file__).resolve().parent.parent
+
+_GIT_FILE = "git.igsnap"
+_LINKED_FILE = "linked.pickle"
+_END = "end"
+
+
+class _EntityPickler(pickle.Pickler):
+    """
+    Pickles the other projects one entity at a time: every pydantic model and OrderedSet is
+    replaced by a persistent id and its state is written as a separate record, so deeply
+    linked issues and pull requests do not recurse. Commits and the git project are
+    referenced by id.
+    """
+
+    def __init__(self, file, git_project: GitProject) -> None:
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.git_project = git_project
+        self.entities: List[Any] = []
+        self._index: Dict[int, int] = {}
+
+    def persistent_id(self, obj: Any):
+        if obj is self.git_project:
+            return ("git",)
+        if isinstance(obj, GitCommitMixin):
+            return ("commit", obj.id)
+        if isinstance(obj, (BaseModel, OrderedSet)):
+            index = self._index.get(id(obj))
+            if index is None:
+                index = self._index[id(obj)] = len(self.entities)
+                self.entities.append(obj)
+            return ("set", index) if isinstance(obj, OrderedSet) else ("entity", index, type(obj))
+        return None
+
+    def dump_graph(self, roots: Any) -> None:
+        self.dump(roots)
+        position = 0
+        while position < len(self.entities):
+            entity = self.entities[position]
+            self.dump(list(entity) if isinstance(entity, OrderedSet) else entity.__getstate__())
+            position += 1
+        self.dump(_END)
+
+
+class _EntityUnpickler(pickle.Unpickler):
+    def __init__(self, file, git_project: GitProject) -> None:
+        super().__init__(file)
+        self.git_project = git_project
+        self.entities: List[Any] = []
+
+    def persistent_load(self, pid):
+        kind = pid[0]
+        if kind == "git":
+            return self.git_project
+        if kind == "commit":
+            commit = self.git_project.git_commit_registry.get_by_id(pid[1])
+            if commit is None:
+                raise pickle.UnpicklingError(f"Unknown commit {pid[1]}")
+            return commit
+        index = pid[1]
+        while len(self.entities) <= index:
+            self.entities.append(None)
+        if self.entities[index] is None:
+            self.entities[index] = OrderedSet() if kind == "set" else pid[2].__new__(pid[2])
+        return self.entities[index]
+
+    def load_graph(self) -> Any:
+        roots = self.load()
+        # Sets are filled last: their elements hash by fields that are only set once every state is loaded.
+        sets = []
+        position = 0
+        while (state := self.load()) != _END:
+            entity = self.entities[position]
+            if isinstance(entity, OrderedSet):
+                sets.append((entity, state))
+            else:
+                entity.__setstate__(state)
+            position += 1
+        for entity, items in sets:
+            entity.extend(items)
+        return roots
+
+
+class BuildCache:
+    """
+    Linked projects cached on disk under a key derived from the content of the input files,
+    the build options and the source of the modules that build them.
+
+    An entry is a directory holding the git project as a GraphSnapshot and the other
+    projects, with their links to commits, as a pickle. Entries are written to a temporary
+    directory and renamed into place, so a reader never sees a partial entry, and older
+    entries are removed once a new one is in place.
+    """
+
+    def __init__(self, directory: Path, inputs: Sequence[Path], **options: Any) -> None:
+        self.directory = Path(directory)
+        self.inputs = [Path(path) for path in inputs]
+        self.options = options
+        self._key: Optional[str] = None
+
+    @property
+    def key(self) -> str:
+        if self._key is None:
+            digest = hashlib.sha256()
+            digest.update(f"{CACHE_VERSION}:{snapshot.VERSION}:{code_version()}".encode())
+            digest.update(json.dumps(self.options, sort_keys=True, default=str).encode())
+            for path in self.inputs:
+                digest.update(path.name.encode())
+                digest.update(file_digest(path).encode())
+            self._key = digest.hexdigest()
+        return self._key
+
+    @property
+    def path(self) -> Path:
+        return self.directory / self.key
+
+    def load(self) -> Optional[Dict[str, Project]]:
+        """The cached projects by name, or None if they were never stored or cannot be read."""
+        if not self.path.is_dir():
+            return None
+        with PROFILER.span("load_build_cache"):
+            try:
+                git_project = GraphSnapshot.load(self.path / _GIT_FILE)
+                with open(self.path / _LINKED_FILE, "rb") as f:
+                    roots = _EntityUnpickler(f, git_project).load_graph()
+                for commit_id, issues, pull_requests in roots["commit_links"]:
+                    commit = git_project.git_commit_registry.get_by_id(commit_id)
+                    if commit is None:
+                        raise pickle.UnpicklingError(f"Unknown commit {commit_id}")
+                    commit.issues = issues
+                    commit.pull_requests = pull_requests
+                git_project.linked_projects = roots["git_linked_projects"]
+            except Exception as e:
+                LOG.warning(f"Discarding unreadable build cache {self.path}: {e}")
+                shutil.rmtree(self.path, ignore_errors=True)
+                return None
+
+        return {name: git_project if name == roots["git_name"] else project
+                for name, project in roots["projects"].items()}
+
+    def store(self, projects: Dict[str, Project]) -> None:
+        """Cache ``projects``, which hold exactly one GitProject, and drop the older entries."""
+        git_name, git_project = next((name, p) for name, p in projects.items() if isinstance(p, GitProject))
+        roots = {
+            "git_name": git_name,
+            "projects": {name: None if name == git_name else project for name, project in projects.items()},
+            "commit_links": [(commit.id, commit.issues, commit.pull_requests)
+                             for commit in git_project.git_commit_registry.all
+                             if commit.issues or commit.pull_requests],
+            "git_linked_projects": git_project.linked_projects,
+        }
+
+        with PROFILER.span("store_build_cache"):
+            self.directory.mkdir(parents=True, exist_ok=True)
+            staging = Path(tempfile.mkdtemp(dir=self.directory, prefix=".staging-"))
+            try:
+                GraphSnapshot.save(git_project, staging / _GIT_FILE)
+                with open(staging / _LINKED_FILE, "wb") as f:
+                    _EntityPickler(f, git_project).dump_graph(roots)
+                try:
+                    os.rename(staging, self.path)
+                except OSError:
+                    # Another process stored the same inputs first.
+                    shutil.rmtree(staging, ignore_errors=True)
+            except BaseException:
+                shutil.rmtree(staging, ignore_errors=True)
+                raise
+
+        for entry in self.directory.iterdir():
+            if entry.name != self.key and not entry.name.startswith("."):
+                shutil.rmtree(entry, ignore_errors=True)
+
+
+def file_digest(path: Path, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def code_version() -> str:
+    """Digest of the source of every module under SOURCE_ROOT, with their paths."""
+    digest = hashlib.sha256()
+    for path in sorted(SOURCE_ROOT.rglob("*.py")):
+        digest.update(path.relative_to(SOURCE_ROOT).as_posix().encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import csv
+from array import array
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from src.common.models import GitHubProject, GitProject, JiraProject
+from src.logger import get_logger
+from src.profiler import get_profiler
+
+try:
+    import numpy
+except ImportError:  # only export_npz needs it
+    numpy = None
+
+LOG = get_logger(__name__)
+PROFILER = get_profiler()
+
+# Missing references are -1; missing dates are the smallest int64, which numpy reads as NaT.
+NULL = -1
+NULL_DATE = -(1 << 63)
+
+# Column kinds: "int" and "ref" (row of another table) are int64, "bool" is int8, "date" is
+# int64 seconds since the epoch in UTC, "str" is text and "cat:<name>" is an int32 code
+# into the categories called <name>, shared by every column that uses them.
+SCHEMA: Dict[str, Tuple[Tuple[str, str], ...]] = {
+    "accounts": (("id", "str"), ("name", "str"), ("email", "str")),
+    "commits": (
+        ("sha", "str"), ("author", "ref"), ("committer", "ref"), ("author_date", "date"),
+        ("committer_date", "date"), ("is_merge", "bool"), ("parent_count", "int"), ("change_count", "int"),
+        ("branch_id", "int"), ("repo_size", "int"),
+    ),
+    "files": (("id", "str"), ("name", "cat:path"), ("is_binary", "bool"), ("change_count", "int")),
+    "changes": (
+        ("commit", "ref"), ("file", "ref"), ("parent_commit", "ref"), ("change_type", "cat:change_type"),
+        ("old_path", "cat:path"), ("new_path", "cat:path"), ("added_lines", "int"), ("deleted_lines", "int"),
+    ),
+    "issues": (
+        ("key", "str"), ("summary", "str"), ("issue_type", "cat:issue_type"), ("status", "cat:issue_status"),
+        ("created_at", "date"), ("updated_at", "date"), ("parent", "ref"),
+    ),
+    "pull_requests": (
+        ("number", "int"), ("title", "str"), ("state", "cat:pull_request_state"), ("changed_files", "int"),
+        ("created_at", "date"), ("merged_at", "date"), ("closed_at", "date"),
+    ),
+    "commit_issues": (("commit", "ref"), ("issue", "ref")),
+    "pull_request_commits": (("pull_request", "ref"), ("commit", "ref")),
+    "pull_request_issues": (("pull_request", "ref"), ("issue", "ref")),
+}
+
+_TYPECODES = {"int": "q", "ref": "q", "bool": "b", "date": "q"}
+
+
+def _seconds(value: Optional[datetime]) -> int:
+    if value is None:
+        return NULL_DATE
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+class _ColumnSink:
+    """Collects the rows as columns: arrays for numbers and codes, lists for text."""
+
+    def __init__(self) -> None:
+        self.columns: Dict[str, Dict[str, Union[array, List[str]]]] = {
+            table: {name: [] if kind == "str" else array(_TYPECODES.get(kind, "i")) for name, kind in columns}
+            for table, columns in SCHEMA.items()
+        }
+
+    def write(self, table: str, row: Tuple) -> None:
+        for column, value in zip(self.columns[table].values(), row):
+            column.append(value)
+
+
+class _CsvSink:
+    """Streams the rows of every table to ``<table>.csv`` in ``directory``."""
+
+    def __init__(self, directory: Path) -> None:
+        self._files = {}
+        self._writers = {}
+        for table, columns in SCHEMA.items():
+            f = self._files[table] = open(directory / f"{table}.csv", "w", encoding="utf-8", newline="")
+            writer = self._writers[table] = csv.writer(f)
+            writer.writerow(name for name, _ in columns)
+
+    def write(self, table: str, row: Tuple) -> None:
+        self._writers[table].writerow(row)
+
+    def close(self) -> None:
+        for f in self._files.values():
+            f.close()
+
+
+class ColumnarExporter:
+    """
+    Flattens linked projects into the tables of SCHEMA for vectorized analysis.
+
+    Every entity is a row, numbered from 0 in the order it is met, and every relationship
+    is a reference to a row, so joins are index lookups. Repeated strings such as paths,
+    change types and issue types are categorical: a column holds codes into a list of
+    categories shared between the columns of the same kind. The graph is walked once, and
+    ``export_csv`` writes rows as they are produced instead of holding the tables.
+    """
+
+    def __init__(
+        self,
+        git_project: GitProject,
+        jira_project: Optional[JiraProject] = None,
+        github_project: Optional[GitHubProject] = None,
+    ) -> None:
+        self.git_project = git_project
+        self.jira_project = jira_project
+        self.github_project = github_project
+        self.categories: Dict[str, Dict[str, int]] = {}
+
+    def columns(self) -> Tuple[Dict[str, Dict[str, Union[array, List[str]]]], Dict[str, List[str]]]:
+        """The tables by name, as columns by name, and the categories by name."""
+        sink = _ColumnSink()
+        self._export(sink)
+        return sink.columns, self._category_lists()
+
+    def export_npz(self, path: Union[str, Path], compressed: bool = True) -> None:
+        """
+        Write every column as ``<table>.<column>`` and every category list as
+        ``categories.<name>`` into a NumPy ``.npz`` archive. Dates are datetime64[s].
+        """
+        if numpy is None:
+            raise ImportError("export_npz needs numpy, which is not installed")
+        tables, categories = self.columns()
+        arrays = {}
+        for table, columns in SCHEMA.items():
+            for name, kind in columns:
+                values = tables[table][name]
+                if kind == "str":
+                    arrays[f"{table}.{name}"] = numpy.array(values, dtype=str)
+                else:
+                    column = numpy.frombuffer(values, dtype=values.typecode)
+                    arrays[f"{table}.{name}"] = column.view("datetime64[s]") if kind == "date" else column
+        for name, values in categories.items():
+            arrays[f"categories.{name}"] = numpy.array(values, dtype=str)
+        with PROFILER.span("export_npz"):
+            (numpy.savez_compressed if compressed else numpy.savez)(path, **arrays)
+
+    def export_csv(self, directory: Union[str, Path]) -> None:
+        """
+        Write ``<table>.csv`` for every table, streamed as the graph is walked, and
+        ``categories.csv`` with the (category, code, value) of every categorical code.
+        Missing references are -1 and missing dates are empty.
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        sink = _CsvSink(directory)
+        try:
+            self._export(sink, csv_dates=True)
+        finally:
+            sink.close()
+        with open(directory / "categories.csv", "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(("category", "code", "value"))
+            for name, values in self._category_lists().items():
+                writer.writerows((name, code, value) for code, value in enumerate(values))
+
+    def _code(self, category: str, value: Optional[str]) -> int:
+        if value is None:
+            return NULL
+        codes = self.categories.setdefault(category, {})
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(codes)
+        return code
+
+    def _category_lists(self) -> Dict[str, List[str]]:
+        return {name: list(codes) for name, codes in self.categories.items()}
+
+    def _export(self, sink: Union[_ColumnSink, _CsvSink], csv_dates: bool = False) -> None:
+        self.categories = {}
+        code = self._code
+
+        def date(value: Optional[datetime]) -> Any:
+            seconds = _seconds(value)
+            return "" if csv_dates and seconds == NULL_DATE else seconds
+
+        issue_rows: Dict[str, int] = {}
+        if self.jira_project is not None:
+            issues = list(self.jira_project.issue_registry.all)
+            issue_rows = {issue.key: row for row, issue in enumerate(issues)}
+            for issue in issues:
+                issue_type = next(iter(issue.issue_types), None)
+                status = next(iter(issue.issue_statuses), None)
+                sink.write("issues", (
+                    issue.key, issue.summary, code("issue_type", issue_type.name if issue_type else None),
+                    code("issue_status", status.name if status else None), date(issue.createdAt),
+                    date(issue.updatedAt), issue_rows.get(issue.parent.key, NULL) if issue.parent else NULL,
+                ))
+
+        pull_request_rows: Dict[int, int] = {}
+        pull_requests = []
+        if self.github_project is not None:
+            pull_requests = list(self.github_project.pull_request_registry.all)
+            pull_request_rows = {pr.number: row for row, pr in enumerate(pull_requests)}
+            for row, pr in enumerate(pull_requests):
+                sink.write("pull_requests", (
+                    pr.number, pr.title, code("pull_request_state", pr.state), pr.changedFiles,
+                    date(pr.createdAt), date(pr.mergedAt), date(pr.closedAt),
+                ))
+                for issue in pr.issues:
+                    if issue.key in issue_rows:
+                        sink.write("pull_request_issues", (row, issue_rows[issue.key]))
+
+        git_project = self.git_project
+        commits = list(git_project.git_commit_registry.all)
+        commit_rows = {commit.id: row for row, commit in enumerate(commits)}
+        account_rows: Dict[str, int] = {}
+        files: List[Any] = []
+        file_rows: Dict[int, int] = {}
+
+        def account(value) -> int:
+            if value is None:
+                return NULL
+            row = account_rows.get(value.id)
+            if row is None:
+                row = account_rows[value.id] = len(account_rows)
+                sink.write("accounts", (value.id, value.name, value.git_id.email))
+            return row
+
+        def file_row(value) -> int:
+            if value is None:
+                return NULL
+            row = file_rows.get(id(value))
+            if row is None:
+                row = file_rows[id(value)] = len(files)
+                files.append(value)
+            return row
+
+        for registered in git_project.account_registry.all:
+            account(registered)
+        for registered in git_project.file_registry.all:
+            file_row(registered)
+
+        with PROFILER.span("export_columns"):
+            for row, commit in enumerate(commits):
+                sink.write("commits", (
+                    commit.id, account(commit.author), account(commit.committer), date(commit.author_date),
+                    date(commit.committer_date), int(commit.is_merge_commit), len(commit.parents),
+                    len(commit.changes), commit.branch_id, commit.repo_size,
+                ))
+                for change in commit.changes:
+                    parent_commit = change.parent_commit
+                    sink.write("changes", (
+                        row, file_row(change.file),
+                        commit_rows.get(parent_commit.id, NULL) if parent_commit is not None else NULL,
+                        code("change_type", change.change_type.value), code("path", change.old_file_name),
+                        code("path", change.new_file_name), change.added_line_count, change.deleted_line_count,
+                    ))
+                for issue in commit.issues:
+                    if issue.key in issue_rows:
+                        sink.write("commit_issues", (row, issue_rows[issue.key]))
+
+            for row, pr in enumerate(pull_requests):
+                for commit in pr.git_commits:
+                    if commit.id in commit_rows:
+                        sink.write("pull_request_commits", (row, commit_rows[commit.id]))
+
+            for file in files:
+                sink.write("files", (str(file.id), code("path", file.last_existing_name()), int(bool(file.is_binary)),
+                                     len(file.changes)))
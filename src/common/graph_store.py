@@ -0,0 +1,642 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import uuid
+from array import array
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from src.common.models import (
+    ChangeMixin, ChangeType, FileMixin, GitAccountId, GitAccountMixin, GitCommitMixin, GitHubProject, GitProject,
+    JiraProject, LineOperation, LineRun,
+)
+from src.common.rope import Rope
+from src.common.slotted_models import Hunk
+from src.logger import get_logger
+from src.profiler import get_profiler
+
+LOG = get_logger(__name__)
+PROFILER = get_profiler()
+
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE accounts (id INTEGER PRIMARY KEY, account_id TEXT NOT NULL, email TEXT, git_name TEXT, name TEXT);
+CREATE TABLE commits (
+    id INTEGER PRIMARY KEY, sha TEXT NOT NULL, message TEXT, author_date TEXT, committer_date TEXT,
+    author INTEGER, committer INTEGER, branch_id INTEGER, repo_size INTEGER
+);
+CREATE TABLE commit_parents (commit_row INTEGER, position INTEGER, parent INTEGER, PRIMARY KEY (commit_row, position))
+    WITHOUT ROWID;
+CREATE TABLE files (id INTEGER PRIMARY KEY, uuid BLOB NOT NULL, is_binary INTEGER);
+CREATE TABLE changes (
+    id INTEGER PRIMARY KEY, change_id TEXT, commit_row INTEGER, change_type TEXT, old_file_name TEXT,
+    new_file_name TEXT, file INTEGER, parent_commit INTEGER, parent_change INTEGER,
+    compute_annotated_lines INTEGER, hunks BLOB, annotated_lines BLOB
+);
+CREATE TABLE commit_changes (commit_row INTEGER, position INTEGER, change INTEGER, PRIMARY KEY (commit_row, position))
+    WITHOUT ROWID;
+CREATE TABLE file_changes (file INTEGER, position INTEGER, change INTEGER, PRIMARY KEY (file, position))
+    WITHOUT ROWID;
+CREATE TABLE issues (
+    id INTEGER PRIMARY KEY, key TEXT NOT NULL, issue_id INTEGER, summary TEXT, created_at TEXT, updated_at TEXT,
+    parent INTEGER
+);
+CREATE TABLE pull_requests (
+    id INTEGER PRIMARY KEY, number INTEGER NOT NULL, title TEXT, state TEXT, body TEXT, changed_files INTEGER,
+    created_at TEXT, merged_at TEXT, closed_at TEXT, updated_at TEXT
+);
+CREATE TABLE issue_commits (issue INTEGER, commit_row INTEGER, issue_position INTEGER, commit_position INTEGER);
+CREATE TABLE pull_request_commits (
+    pull_request INTEGER, commit_row INTEGER, pull_request_position INTEGER, commit_position INTEGER
+);
+CREATE TABLE issue_pull_requests (
+    issue INTEGER, pull_request INTEGER, issue_position INTEGER, pull_request_position INTEGER
+);
+"""
+
+# Created once the tables are filled, which is faster than maintaining them row by row.
+_INDEXES = """
+CREATE UNIQUE INDEX accounts_by_id ON accounts (account_id);
+CREATE UNIQUE INDEX commits_by_sha ON commits (sha);
+CREATE INDEX commits_by_author ON commits (author);
+CREATE INDEX commits_by_committer ON commits (committer);
+CREATE INDEX commit_children ON commit_parents (parent, commit_row);
+CREATE UNIQUE INDEX files_by_uuid ON files (uuid);
+CREATE INDEX changes_by_change_id ON changes (change_id);
+CREATE UNIQUE INDEX issues_by_key ON issues (key);
+CREATE INDEX issue_children ON issues (parent);
+CREATE UNIQUE INDEX pull_requests_by_number ON pull_requests (number);
+CREATE INDEX issue_commits_by_issue ON issue_commits (issue, issue_position);
+CREATE INDEX issue_commits_by_commit ON issue_commits (commit_row, commit_position);
+CREATE INDEX pull_request_commits_by_pull_request ON pull_request_commits (pull_request, pull_request_position);
+CREATE INDEX pull_request_commits_by_commit ON pull_request_commits (commit_row, commit_position);
+CREATE INDEX issue_pull_requests_by_issue ON issue_pull_requests (issue, issue_position);
+CREATE INDEX issue_pull_requests_by_pull_request ON issue_pull_requests (pull_request, pull_request_position);
+"""
+
+# Whether commit row ?2 is an ancestor of commit row ?1. Rows number commits in topological order, so
+# ancestors with a lower row than ?2 cannot lead to it and are not followed.
+_IS_ANCESTOR = """
+WITH RECURSIVE ancestors(row) AS (
+    SELECT parent FROM commit_parents WHERE commit_row = ?1
+    UNION
+    SELECT commit_parents.parent FROM commit_parents JOIN ancestors ON commit_parents.commit_row = ancestors.row
+    WHERE ancestors.row > ?2
+)
+SELECT 1 FROM ancestors WHERE row = ?2 LIMIT 1
+"""
+
+_COLUMNS = {
+    "account": "id, email, git_name, name",
+    "commit": "id, sha, message, author_date, committer_date, author, committer, branch_id, repo_size",
+    "file": "id, uuid, is_binary",
+    "change": "id, change_id, commit_row, change_type, old_file_name, new_file_name, file, parent_commit, "
+              "parent_change, compute_annotated_lines, hunks",
+    "issue": "id, key, issue_id, summary, created_at, updated_at, parent",
+    "pull_request": "id, number, title, state, body, changed_files, created_at, merged_at, closed_at, updated_at",
+}
+_TABLES = {"account": "accounts", "commit": "commits", "file": "files", "change": "changes", "issue": "issues",
+           "pull_request": "pull_requests"}
+
+# SQLite's default limit on the parameters of one statement.
+_MAX_PARAMETERS = 999
+
+_LINE_OPERATIONS = list(LineOperation)
+
+
+def _date(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value is not None else None
+
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+def _pack_hunks(hunks) -> bytes:
+    values = array("q")
+    for hunk in hunks:
+        values.append(len(hunk.runs))
+        for run in hunk.runs:
+            values.extend((_LINE_OPERATIONS.index(run.operation), run.start, run.count))
+    return values.tobytes()
+
+
+def _unpack_hunks(data: bytes) -> List[Hunk]:
+    values = array("q")
+    values.frombytes(data)
+    hunks = []
+    position = 0
+    while position < len(values):
+        count = values[position]
+        position += 1
+        runs = []
+        for _ in range(count):
+            operation, start, run_count = values[position:position + 3]
+            runs.append(LineRun(_LINE_OPERATIONS[operation], start, run_count))
+            position += 3
+        hunks.append(Hunk(runs))
+    return hunks
+
+
+class _ObjectCache:
+    """The most recently used proxies, at most ``capacity`` of them."""
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self._objects: OrderedDict[Tuple[str, int], Any] = OrderedDict()
+
+    def get(self, key: Tuple[str, int]) -> Any:
+        found = self._objects.get(key)
+        if found is not None:
+            self._objects.move_to_end(key)
+        return found
+
+    def put(self, key: Tuple[str, int], value: Any) -> None:
+        self._objects[key] = value
+        if len(self._objects) > self.capacity:
+            self._objects.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._objects)
+
+
+class StoredAccount(GitAccountMixin):
+    """A GitAccount read from a GraphStore; its commits are fetched on access."""
+    __slots__ = ("_store", "_row", "git_id", "name", "_views")
+
+    project = None
+    developer = None
+
+    def __init__(self, store: GraphStore, row: tuple) -> None:
+        self._store = store
+        self._row, email, git_name, self.name = row
+        self.git_id = GitAccountId(email=email, name=git_name)
+        self._views = {}
+
+    @property
+    def commits(self) -> List[StoredCommit]:
+        return self._store._related("commit", "SELECT id FROM commits WHERE author = ? OR committer = ? ORDER BY id",
+                                    (self._row, self._row))
+
+
+class StoredCommit(GitCommitMixin):
+    """A GitCommit read from a GraphStore; its relationships are fetched on access."""
+    __slots__ = ("_store", "_row", "id", "message", "author_date", "committer_date", "_author", "_committer",
+                 "branch_id", "repo_size")
+
+    project = None
+
+    def __init__(self, store: GraphStore, row: tuple) -> None:
+        self._store = store
+        (self._row, self.id, self.message, author_date, committer_date, self._author, self._committer,
+         self.branch_id, self.repo_size) = row
+        self.author_date = _date(author_date)
+        self.committer_date = _date(committer_date)
+
+    @property
+    def author(self) -> Optional[StoredAccount]:
+        return self._store._get("account", self._author)
+
+    @property
+    def committer(self) -> Optional[StoredAccount]:
+        return self._store._get("account", self._committer)
+
+    @property
+    def parents(self) -> List[StoredCommit]:
+        return self._store._related(
+            "commit", "SELECT parent FROM commit_parents WHERE commit_row = ? ORDER BY position", (self._row,))
+
+    @property
+    def children(self) -> List[StoredCommit]:
+        return self._store._related(
+            "commit", "SELECT commit_row FROM commit_parents WHERE parent = ? ORDER BY commit_row", (self._row,))
+
+    @property
+    def changes(self) -> List[StoredChange]:
+        return self._store._related(
+            "change", "SELECT change FROM commit_changes WHERE commit_row = ? ORDER BY position", (self._row,))
+
+    @property
+    def issues(self) -> List[StoredIssue]:
+        return self._store._related(
+            "issue", "SELECT issue FROM issue_commits WHERE commit_row = ? AND commit_position IS NOT NULL "
+                     "ORDER BY commit_position", (self._row,))
+
+    @property
+    def pull_requests(self) -> List[StoredPullRequest]:
+        return self._store._related(
+            "pull_request", "SELECT pull_request FROM pull_request_commits WHERE commit_row = ? "
+                            "AND commit_position IS NOT NULL ORDER BY commit_position", (self._row,))
+
+    def is_after_in_tree(self, other: GitCommitMixin) -> bool:
+        """One recursive query over commit_parents instead of a proxy per ancestor."""
+        if isinstance(other, StoredCommit) and other._store is self._store:
+            other_row = other._row
+        else:
+            found = self._store.connection.execute("SELECT id FROM commits WHERE sha = ?", (other.id,)).fetchone()
+            if found is None:
+                return False
+            (other_row,) = found
+        return self._store.connection.execute(_IS_ANCESTOR, (self._row, other_row)).fetchone() is not None
+
+
+class StoredFile(FileMixin):
+    """A File read from a GraphStore; its changes are fetched on access."""
+    __slots__ = ("_store", "_row", "id", "is_binary")
+
+    project = None
+
+    def __init__(self, store: GraphStore, row: tuple) -> None:
+        self._store = store
+        self._row, file_id, is_binary = row
+        self.id = uuid.UUID(bytes=file_id)
+        self.is_binary = bool(is_binary)
+
+    @property
+    def changes(self) -> List[StoredChange]:
+        return self._store._related(
+            "change", "SELECT change FROM file_changes WHERE file = ? ORDER BY position", (self._row,))
+
+    def full_path(self, commit: Optional[GitCommitMixin] = None) -> Optional[str]:
+        relative_path = self.relative_path(commit)
+        return f"{self._store.name}/{relative_path}" if relative_path is not None else None
+
+
+class StoredChange(ChangeMixin):
+    """A Change read from a GraphStore; annotated lines are read on access."""
+    __slots__ = ("_store", "_row", "id", "_commit", "change_type", "old_file_name", "new_file_name", "_file",
+                 "_parent_commit", "_parent_change", "compute_annotated_lines", "hunks", "_views")
+
+    def __init__(self, store: GraphStore, row: tuple) -> None:
+        self._store = store
+        (self._row, self.id, self._commit, change_type, self.old_file_name, self.new_file_name, self._file,
+         self._parent_commit, self._parent_change, compute_annotated_lines, hunks) = row
+        self.change_type = ChangeType(change_type)
+        self.compute_annotated_lines = bool(compute_annotated_lines)
+        self.hunks = _unpack_hunks(hunks)
+        self._views = {}
+
+    @property
+    def commit(self) -> Optional[StoredCommit]:
+        return self._store._get("commit", self._commit)
+
+    @property
+    def file(self) -> Optional[StoredFile]:
+        return self._store._get("file", self._file)
+
+    @property
+    def parent_commit(self) -> Optional[StoredCommit]:
+        return self._store._get("commit", self._parent_commit)
+
+    @property
+    def parent_change(self) -> Optional[StoredChange]:
+        return self._store._get("change", self._parent_change)
+
+    @property
+    def annotated_lines(self) -> Rope[StoredCommit]:
+        (data,) = self._store.connection.execute(
+            "SELECT annotated_lines FROM changes WHERE id = ?", (self._row,)).fetchone()
+        values = array("q")
+        values.frombytes(data)
+        commits = self._store._get_many("commit", values[0::2])
+        return Rope.from_runs(zip(commits, values[1::2]))
+
+
+class StoredIssue:
+    """An Issue read from a GraphStore; its relationships are fetched on access."""
+    __slots__ = ("_store", "_row", "key", "id", "summary", "createdAt", "updatedAt", "_parent")
+
+    def __init__(self, store: GraphStore, row: tuple) -> None:
+        self._store = store
+        self._row, self.key, self.id, self.summary, created_at, updated_at, self._parent = row
+        self.createdAt = _date(created_at)
+        self.updatedAt = _date(updated_at)
+
+    @property
+    def parent(self) -> Optional[StoredIssue]:
+        return self._store._get("issue", self._parent)
+
+    @property
+    def children(self) -> List[StoredIssue]:
+        return self._store._related("issue", "SELECT id FROM issues WHERE parent = ? ORDER BY id", (self._row,))
+
+    @property
+    def git_commits(self) -> List[StoredCommit]:
+        return self._store._related(
+            "commit", "SELECT commit_row FROM issue_commits WHERE issue = ? AND issue_position IS NOT NULL "
+                      "ORDER BY issue_position", (self._row,))
+
+    @property
+    def pull_requests(self) -> List[StoredPullRequest]:
+        return self._store._related(
+            "pull_request", "SELECT pull_request FROM issue_pull_requests WHERE issue = ? "
+                            "AND issue_position IS NOT NULL ORDER BY issue_position", (self._row,))
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, StoredIssue) and self.key == other.key
+
+    def __hash__(self) -> int:
+        return hash(self.key)
+
+
+class StoredPullRequest:
+    """A PullRequest read from a GraphStore; its relationships are fetched on access."""
+    __slots__ = ("_store", "_row", "number", "title", "state", "body", "changedFiles", "createdAt", "mergedAt",
+                 "closedAt", "updatedAt")
+
+    def __init__(self, store: GraphStore, row: tuple) -> None:
+        self._store = store
+        (self._row, self.number, self.title, self.state, self.body, self.changedFiles, created_at, merged_at,
+         closed_at, updated_at) = row
+        self.createdAt = _date(created_at)
+        self.mergedAt = _date(merged_at)
+        self.closedAt = _date(closed_at)
+        self.updatedAt = _date(updated_at)
+
+    @property
+    def git_commits(self) -> List[StoredCommit]:
+        return self._store._related(
+            "commit", "SELECT commit_row FROM pull_request_commits WHERE pull_request = ? "
+                      "AND pull_request_position IS NOT NULL ORDER BY pull_request_position", (self._row,))
+
+    @property
+    def issues(self) -> List[StoredIssue]:
+        return self._store._related(
+            "issue", "SELECT issue FROM issue_pull_requests WHERE pull_request = ? "
+                     "AND pull_request_position IS NOT NULL ORDER BY pull_request_position", (self._row,))
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, StoredPullRequest) and self.number == other.number
+
+    def __hash__(self) -> int:
+        return hash(self.number)
+
+
+_PROXIES = {"account": StoredAccount, "commit": StoredCommit, "file": StoredFile, "change": StoredChange,
+            "issue": StoredIssue, "pull_request": StoredPullRequest}
+
+
+class GraphStore:
+    """
+    A project graph kept in a SQLite database instead of in memory.
+
+    ``save`` writes a git project, and optionally the Jira and GitHub projects linked to it,
+    into tables with an index for every relationship. An opened store hands out proxies
+    (StoredCommit, StoredChange, …) that share the behaviour of the in-memory models and
+    read their relationships with one indexed query on access. Proxies are kept in a
+    bounded LRU cache, so the same row gives the same object while it is cached and memory
+    stays bounded however large the graph is.
+
+    Jira users and statuses and GitHub users are not stored.
+    """
+
+    def __init__(self, path: Union[str, Path], cache_size: int = 100_000) -> None:
+        self.path = Path(path)
+        self.connection = sqlite3.connect(f"{self.path.resolve().as_uri()}?mode=ro", uri=True)
+        self.cache = _ObjectCache(cache_size)
+        meta = dict(self.connection.execute("SELECT key, value FROM meta"))
+        if int(meta.get("version", -1)) != SCHEMA_VERSION:
+            raise ValueError(f"{path} has graph store version {meta.get('version')}, expected {SCHEMA_VERSION}")
+        self.name = meta["name"]
+
+    @staticmethod
+    def save(
+        path: Union[str, Path],
+        git_project: GitProject,
+        jira_project: Optional[JiraProject] = None,
+        github_project: Optional[GitHubProject] = None,
+    ) -> None:
+        """Write the projects into a new database at ``path``, replacing it once complete."""
+        tmp_path = f"{path}.tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        with PROFILER.span("save_graph_store"):
+            connection = sqlite3.connect(tmp_path)
+            try:
+                connection.executescript("PRAGMA journal_mode = OFF; PRAGMA synchronous = OFF;" + _SCHEMA)
+                with connection:
+                    _StoreWriter(connection).write(git_project, jira_project, github_project)
+                connection.executescript(_INDEXES)
+            finally:
+                connection.close()
+        os.replace(tmp_path, path)
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self) -> GraphStore:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def commit(self, sha: str) -> Optional[StoredCommit]:
+        return self._find("commit", "SELECT id FROM commits WHERE sha = ?", (sha,))
+
+    def account(self, account_id: str) -> Optional[StoredAccount]:
+        return self._find("account", "SELECT id FROM accounts WHERE account_id = ?", (account_id,))
+
+    def file(self, file_id: uuid.UUID) -> Optional[StoredFile]:
+        return self._find("file", "SELECT id FROM files WHERE uuid = ?", (file_id.bytes,))
+
+    def changes_by_id(self, change_id: str) -> List[StoredChange]:
+        """The changes with ``change_id``; a merge commit has one per parent."""
+        return self._related("change", "SELECT id FROM changes WHERE change_id = ? ORDER BY id", (change_id,))
+
+    def issue(self, key: str) -> Optional[StoredIssue]:
+        return self._find("issue", "SELECT id FROM issues WHERE key = ?", (key,))
+
+    def pull_request(self, number: int) -> Optional[StoredPullRequest]:
+        return self._find("pull_request", "SELECT id FROM pull_requests WHERE number = ?", (number,))
+
+    def commits(self) -> Iterator[StoredCommit]:
+        return self._scan("commit")
+
+    def accounts(self) -> Iterator[StoredAccount]:
+        return self._scan("account")
+
+    def files(self) -> Iterator[StoredFile]:
+        return self._scan("file")
+
+    def changes(self) -> Iterator[StoredChange]:
+        return self._scan("change")
+
+    def issues(self) -> Iterator[StoredIssue]:
+        return self._scan("issue")
+
+    def pull_requests(self) -> Iterator[StoredPullRequest]:
+        return self._scan("pull_request")
+
+    def _find(self, kind: str, sql: str, parameters: tuple) -> Any:
+        row = self.connection.execute(sql, parameters).fetchone()
+        return self._get(kind, row[0]) if row is not None else None
+
+    def _related(self, kind: str, sql: str, parameters: tuple) -> list:
+        return self._get_many(kind, [row for (row,) in self.connection.execute(sql, parameters)])
+
+    def _get(self, kind: str, row: Optional[int]) -> Any:
+        if row is None:
+            return None
+        return self._get_many(kind, (row,))[0]
+
+    def _get_many(self, kind: str, rows: Sequence[int]) -> list:
+        """The proxies of ``rows`` in order, reading the uncached ones with one query per batch."""
+        cache = self.cache
+        found: Dict[int, Any] = {}
+        missing = []
+        for row in rows:
+            if row not in found:
+                proxy = cache.get((kind, row))
+                if proxy is None:
+                    missing.append(row)
+                found[row] = proxy
+        for start in range(0, len(missing), _MAX_PARAMETERS):
+            batch = missing[start:start + _MAX_PARAMETERS]
+            sql = (f"SELECT {_COLUMNS[kind]} FROM {_TABLES[kind]} "
+                   f"WHERE id IN ({', '.join('?' * len(batch))})")
+            for values in self.connection.execute(sql, batch):
+                found[values[0]] = self._proxy(kind, values)
+        return [found[row] for row in rows]
+
+    def _scan(self, kind: str) -> Iterator[Any]:
+        for values in self.connection.execute(f"SELECT {_COLUMNS[kind]} FROM {_TABLES[kind]} ORDER BY id"):
+            yield self.cache.get((kind, values[0])) or self._proxy(kind, values)
+
+    def _proxy(self, kind: str, values: tuple) -> Any:
+        proxy = _PROXIES[kind](self, values)
+        self.cache.put((kind, values[0]), proxy)
+        return proxy
+
+
+class _StoreWriter:
+    """Numbers the entities of the projects by table, from 1, and writes their rows."""
+
+    def __init__(self, connection: sqlite3.Connection) -> None:
+        self.connection = connection
+
+    def write(self, git_project: GitProject, jira_project: Optional[JiraProject],
+              github_project: Optional[GitHubProject]) -> None:
+        commits = list(git_project.git_commit_registry.all)
+        commit_rows = {commit.id: row for row, commit in enumerate(commits, 1)}
+        accounts, account_rows = self._numbered(git_project.account_registry.all)
+        files, file_rows = self._numbered(git_project.file_registry.all)
+        changes, change_rows = self._numbered(git_project.change_registry.all)
+
+        def commit_row(commit) -> Optional[int]:
+            return commit_rows[commit.id] if commit is not None else None
+
+        # Changes and files reachable only through other entities are numbered when first met.
+        commit_changes = [(commit_rows[commit.id], position, self._add(changes, change_rows, change))
+                          for commit in commits for position, change in enumerate(commit.changes)]
+        file_changes = [(file_row, position, self._add(changes, change_rows, change))
+                        for file_row, file in enumerate(files, 1) for position, change in enumerate(file.changes)]
+        change_values = []
+        position = 0
+        while position < len(changes):
+            change = changes[position]
+            position += 1
+            annotated_lines = array("q")
+            for commit, count in change.annotated_lines.runs():
+                annotated_lines.extend((commit_rows[commit.id], count))
+            change_values.append((
+                position, change.id, commit_row(change.commit), change.change_type.value, change.old_file_name,
+                change.new_file_name, self._add(files, file_rows, change.file), commit_row(change.parent_commit),
+                self._add(changes, change_rows, change.parent_change), int(bool(change.compute_annotated_lines)),
+                _pack_hunks(change.hunks), annotated_lines.tobytes(),
+            ))
+
+        commit_values = []
+        commit_parents = []
+        for row, commit in enumerate(commits, 1):
+            commit_values.append((
+                row, commit.id, commit.message, _iso(commit.author_date), _iso(commit.committer_date),
+                self._add(accounts, account_rows, commit.author), self._add(accounts, account_rows, commit.committer),
+                commit.branch_id, commit.repo_size,
+            ))
+            commit_parents.extend((row, position, commit_rows[parent.id])
+                                  for position, parent in enumerate(commit.parents))
+
+        execute = self.connection.executemany
+        execute("INSERT INTO meta VALUES (?, ?)", [("version", str(SCHEMA_VERSION)), ("name", git_project.name)])
+        execute("INSERT INTO accounts VALUES (?, ?, ?, ?, ?)",
+                [(row, account.id, account.git_id.email, account.git_id.name, account.name)
+                 for row, account in enumerate(accounts, 1)])
+        execute("INSERT INTO commits VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", commit_values)
+        execute("INSERT INTO commit_parents VALUES (?, ?, ?)", commit_parents)
+        execute("INSERT INTO files VALUES (?, ?, ?)",
+                [(row, file.id.bytes, int(bool(file.is_binary))) for row, file in enumerate(files, 1)])
+        execute("INSERT INTO changes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", change_values)
+        execute("INSERT INTO commit_changes VALUES (?, ?, ?)", commit_changes)
+        execute("INSERT INTO file_changes VALUES (?, ?, ?)", file_changes)
+
+        issue_rows: Dict[str, int] = {}
+        pull_request_rows: Dict[int, int] = {}
+        if jira_project is not None:
+            issues = list(jira_project.issue_registry.all)
+            issue_rows = {issue.key: row for row, issue in enumerate(issues, 1)}
+            execute("INSERT INTO issues VALUES (?, ?, ?, ?, ?, ?, ?)", [
+                (row, issue.key, issue.id, issue.summary, _iso(issue.createdAt), _iso(issue.updatedAt),
+                 issue_rows.get(issue.parent.key) if issue.parent is not None else None)
+                for row, issue in enumerate(issues, 1)
+            ])
+            execute("INSERT INTO issue_commits VALUES (?, ?, ?, ?)", self._links(
+                ((issue_rows[issue.key], [commit_rows.get(c.id) for c in issue.git_commits]) for issue in issues),
+                ((row, [issue_rows.get(i.key) for i in commit.issues]) for row, commit in enumerate(commits, 1)),
+            ))
+        if github_project is not None:
+            pull_requests = list(github_project.pull_request_registry.all)
+            pull_request_rows = {pr.number: row for row, pr in enumerate(pull_requests, 1)}
+            execute("INSERT INTO pull_requests VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", [
+                (row, pr.number, pr.title, pr.state, pr.body, pr.changedFiles, _iso(pr.createdAt),
+                 _iso(pr.mergedAt), _iso(pr.closedAt), _iso(pr.updatedAt))
+                for row, pr in enumerate(pull_requests, 1)
+            ])
+            execute("INSERT INTO pull_request_commits VALUES (?, ?, ?, ?)", self._links(
+                ((pull_request_rows[pr.number], [commit_rows.get(c.id) for c in pr.git_commits])
+                 for pr in pull_requests),
+                ((row, [pull_request_rows.get(pr.number) for pr in commit.pull_requests])
+                 for row, commit in enumerate(commits, 1)),
+            ))
+            if jira_project is not None:
+                execute("INSERT INTO issue_pull_requests VALUES (?, ?, ?, ?)", self._links(
+                    ((issue_rows[issue.key], [pull_request_rows.get(pr.number) for pr in issue.pull_requests])
+                     for issue in jira_project.issue_registry.all),
+                    ((pull_request_rows[pr.number], [issue_rows.get(i.key) for i in pr.issues])
+                     for pr in pull_requests),
+                ))
+
+    @staticmethod
+    def _numbered(entities: Iterable) -> Tuple[list, Dict[int, int]]:
+        entities = list(entities)
+        return entities, {id(entity): row for row, entity in enumerate(entities, 1)}
+
+    @staticmethod
+    def _add(entities: list, rows: Dict[int, int], entity) -> Optional[int]:
+        if entity is None:
+            return None
+        row = rows.get(id(entity))
+        if row is None:
+            entities.append(entity)
+            row = rows[id(entity)] = len(entities)
+        return row
+
+    @staticmethod
+    def _links(left: Iterable[Tuple[int, List[Optional[int]]]],
+               right: Iterable[Tuple[int, List[Optional[int]]]]) -> List[Tuple[int, int, Optional[int], Optional[int]]]:
+        """One row per link, with its position on each side; a side that does not list it gets NULL."""
+        positions: Dict[Tuple[int, int], List[Optional[int]]] = {}
+        for row, others in left:
+            for position, other in enumerate(others):
+                if other is not None:
+                    positions.setdefault((row, other), [None, None])[0] = position
+        for row, others in right:
+            for position, other in enumerate(others):
+                if other is not None:
+                    positions.setdefault((other, row), [None, None])[1] = position
+        return [(a, b, left_position, right_position)
+                for (a, b), (left_position, right_position) in positions.items()]
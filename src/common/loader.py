@@ -1,6 +1,156 @@
+import gc
 import json
+from contextlib import contextmanager
 from pathlib import Path
 from abc import ABC, abstractmethod
+from typing import Any, Collection, Dict, Generic, Iterator, TextIO, Type, TypeVar
+
+from pydantic import BaseModel
+
+M = TypeVar("M", bound=BaseModel)
+
+
+@contextmanager
+def paused_gc() -> Iterator[None]:
+    """
+    Pause the cyclic garbage collector while a large tree of objects is built: the tree
+    itself holds no garbage, but every allocation batch would make the collector rescan it.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+class StreamingJsonReader:
+    """
+    Reads a JSON document from a text file piece by piece with ``JSONDecoder.raw_decode``.
+
+    Only the value being decoded is held in memory: ``members`` walks the keys of an object
+    and ``array_items`` the elements of an array, leaving each value to the caller.
+    """
+
+    def __init__(self, file: TextIO, chunk_size: int = 1 << 16) -> None:
+        self._file = file
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._position = 0
+        self._eof = False
+
+    def members(self) -> Iterator[str]:
+        """The keys of the object at the current position; the caller consumes each value."""
+        self._expect("{")
+        if self._peek() == "}":
+            self._position += 1
+            return
+        while True:
+            key = self.decode()
+            if not isinstance(key, str):
+                raise json.JSONDecodeError("Expecting property name", self._buffer, self._position)
+            self._expect(":")
+            yield key
+            if self._separator("}"):
+                return
+
+    def array_items(self) -> Iterator[Any]:
+        """The elements of the array at the current position, decoded one at a time."""
+        self._expect("[")
+        if self._peek() == "]":
+            self._position += 1
+            return
+        while True:
+            yield self.decode()
+            if self._separator("]"):
+                return
+
+    def peek(self) -> str:
+        """The next character that is not whitespace, or "" at the end of the file."""
+        return self._peek()
+
+    def decode(self) -> Any:
+        """The value at the current position."""
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._position)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number or literal that ends with the buffer may continue in the next chunk.
+            if end == len(self._buffer) and self._fill():
+                continue
+            self._position = end
+            return value
+
+    def _fill(self) -> bool:
+        """Read more of the file, at least as much as is buffered, so retried decodes stay linear."""
+        if self._eof:
+            return False
+        chunk = self._file.read(max(self._chunk_size, len(self._buffer) - self._position))
+        if not chunk:
+            self._eof = True
+            return False
+        self._buffer = self._buffer[self._position:] + chunk
+        self._position = 0
+        return True
+
+    def _peek(self) -> str:
+        while True:
+            buffer = self._buffer
+            position = self._position
+            while position < len(buffer) and buffer[position] in " \t\n\r":
+                position += 1
+            self._position = position
+            if position < len(buffer):
+                return buffer[position]
+            if not self._fill():
+                return ""
+
+    def _expect(self, char: str) -> None:
+        if self._peek() != char:
+            raise json.JSONDecodeError(f"Expecting '{char}'", self._buffer, self._position)
+        self._position += 1
+
+    def _separator(self, closing: str) -> bool:
+        """Consume a "," or ``closing``; True when it was ``closing``."""
+        char = self._peek()
+        if char not in (",", closing):
+            raise json.JSONDecodeError(f"Expecting ',' or '{closing}'", self._buffer, self._position)
+        self._position += 1
+        return char == closing
+
+
+class JsonArrayStream(Generic[M]):
+    """
+    The elements of the top-level array ``key`` of a JSON file, validated as ``model`` one
+    at a time. Every iteration reads the file again, so it can be iterated more than once.
+    """
+
+    def __init__(self, file_path: Path, key: str, model: Type[M]) -> None:
+        self.file_path = file_path
+        self.key = key
+        self.model = model
+
+    def __iter__(self) -> Iterator[M]:
+        with self.file_path.open("r", encoding="utf-8") as f:
+            reader = StreamingJsonReader(f)
+            for key in reader.members():
+                if key != self.key:
+                    reader.decode()
+                    continue
+                if reader.peek() != "[":
+                    # null or another non-array value: nothing to stream.
+                    reader.decode()
+                    return
+                for item in reader.array_items():
+                    yield self.model.model_validate(item)
+                return
+
 
 # --- Base Class ---
 class BaseJsonLoader(ABC):
@@ -13,6 +163,43 @@ class BaseJsonLoader(ABC):
         with self.file_path.open("r", encoding="utf-8") as f:
             return json.load(f)
 
+    def _read_json_members(self, skipped: Collection[str]) -> Dict[str, Any]:
+        """The top-level members of the file except ``skipped``, whose arrays are read past one element at a time."""
+        if not self.file_path.exists():
+            raise FileNotFoundError(f"File not found: {self.file_path}")
+        members = {}
+        with self.file_path.open("r", encoding="utf-8") as f:
+            reader = StreamingJsonReader(f)
+            for key in reader.members():
+                if key not in skipped:
+                    members[key] = reader.decode()
+                elif reader.peek() == "[":
+                    for _ in reader.array_items():
+                        pass
+                else:
+                    reader.decode()
+        return members
+
+    def _load_json(self, model: Type[M]) -> M:
+        """
+        ``model`` validated by pydantic-core straight from the bytes of the file, without
+        building the intermediate tree of dicts and lists that ``json.load`` returns.
+        """
+        if not self.file_path.exists():
+            raise FileNotFoundError(f"File not found: {self.file_path}")
+        with paused_gc():
+            return model.model_validate_json(self.file_path.read_bytes())
+
+    def _stream_json(self, model: Type[M], streamed: Dict[str, Type[BaseModel]]) -> M:
+        """
+        ``model`` validated from the file, except that each field in ``streamed`` is a
+        JsonArrayStream of its elements, so memory is bounded by the largest single element.
+        """
+        data = model.model_validate({**self._read_json_members(streamed), **{key: [] for key in streamed}})
+        for key, item_model in streamed.items():
+            setattr(data, key, JsonArrayStream(self.file_path, key, item_model))
+        return data
+
     @abstractmethod
     def load(self):
-        pass
\ No newline at end of file
+        pass
@@ -0,0 +1,35 @@
+from dataclasses import dataclass
+from typing import Type
+
+from src.common import models, slotted_models
+
+
+@dataclass(frozen=True)
+class ModelBackend:
+    """The classes a GitProjectTransformer builds the commit graph from."""
+    git_account: Type
+    git_commit: Type
+    file: Type
+    change: Type
+    hunk: Type
+    line_change: Type
+
+
+PYDANTIC_BACKEND = ModelBackend(
+    git_account=models.GitAccount,
+    git_commit=models.GitCommit,
+    file=models.File,
+    change=models.Change,
+    hunk=models.Hunk,
+    line_change=models.LineChange,
+)
+
+# Plain classes with __slots__: no validation on construction and no per-instance __dict__.
+SLOTTED_BACKEND = ModelBackend(
+    git_account=slotted_models.GitAccount,
+    git_commit=slotted_models.GitCommit,
+    file=slotted_models.File,
+    change=slotted_models.Change,
+    hunk=slotted_models.Hunk,
+    line_change=slotted_models.LineChange,
+)
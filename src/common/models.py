@@ -4,18 +4,26 @@ import uuid
 from abc import ABC, abstractmethod
 from datetime import datetime, timedelta
 from enum import Enum
-from typing import Optional, Type, TypeVar, List, Collection
-from pydantic import BaseModel, Field, model_validator
+from typing import Callable, Optional, Type, TypeVar, List, Collection, Dict, ClassVar, Iterable, Iterator, NamedTuple, Tuple
+from pydantic import BaseModel, Field, PrivateAttr, model_validator, field_validator
 
 from src.inspector_git.linker.registry import AccountRegistry, CommitRegistry, FileRegistry, ChangeRegistry
+from src.inspector_git.linker.indexes import LastChangeIndex
+from src.inspector_git.linker.metrics import CommitMetrics
+from src.inspector_git.linker.timeline import FileTimeline
 from src.github_miner.linker.registries import GitHubUserRegistry, PullRequestRegistry, GitHubCommitRegistry
 from src.jira_miner.linker.registries import IssueStatusCategoryRegistry, IssueStatusRegistry, IssueTypeRegistry, IssueRegistry, JiraUserRegistry
+from src.jira_miner.linker.issue_keys import IssueKeyExtractor
 
+from src.common.ordered_set import OrderedSet
+from src.common.rope import Rope
 from src.inspector_git.utils.constants import DEV_NULL
 
 from src.logger import get_logger
+from src.profiler import get_profiler
 
 LOG = get_logger(__name__)
+PROFILER = get_profiler()
 
 class Project(BaseModel, ABC):
     linked_projects: List[Project] = Field(default_factory=list)
@@ -70,6 +78,27 @@ Account.model_rebuild()
 
 
 
+class CachedViewsMixin:
+    """
+    Derived views computed on first access and kept until ``invalidate_views``.
+
+    The transformers invalidate an entity's views when they mutate the relationships the
+    views are derived from; code that mutates them directly has to do the same. The cached
+    lists are shared, so callers must not modify them.
+    """
+    __slots__ = ()
+
+    def _view(self, name: str, compute: Callable[[], List]) -> List:
+        views = self._views
+        value = views.get(name)
+        if value is None:
+            value = views[name] = compute()
+        return value
+
+    def invalidate_views(self) -> None:
+        self._views.clear()
+
+
 class GitAccountId(BaseModel):
     email: str
     name: str
@@ -77,30 +106,9 @@ class GitAccountId(BaseModel):
     def __str__(self) -> str:
         return f"{self.name} <{self.email}>"
 
-class GitAccount(Account):
-    git_id: GitAccountId
-    commits: List[GitCommit] = Field(default_factory=list)
-
-    @model_validator(mode="before")
-    @classmethod
-    def set_account_fields(cls, data: dict):
-        """
-        Ensure that 'name' and 'project' are properly set
-        based on git_id and git_project.
-        """
-        if isinstance(data, dict):
-            git_id = data.get("git_id")
-            git_project = data.get("project") or data.get("git_project")
-
-            if git_id is not None:
-                # set the inherited 'name' from git_id
-                if "name" not in data:
-                    data["name"] = git_id.name
-            if git_project is not None:
-                # normalize: accept 'git_project' as 'project'
-                data["project"] = git_project
-
-        return data
+class GitAccountMixin(CachedViewsMixin):
+    """Behaviour shared by the pydantic and the slotted GitAccount."""
+    __slots__ = ()
 
     @property
     def id(self) -> str:
@@ -108,11 +116,19 @@ class GitAccount(Account):
 
     @property
     def changes(self) -> List[Change]:
-        return [change for commit in self.commits for change in commit.changes]
+        return self._view("changes", lambda: [change for commit in self.commits for change in commit.changes])
 
     @property
     def files(self) -> List[File]:
-        return list({change.file for change in self.changes})
+        return self._view("files", lambda: list(dict.fromkeys(change.file for change in self.changes)))
+
+    @property
+    def change_count(self) -> int:
+        return sum(len(commit.changes) for commit in self.commits)
+
+    @property
+    def file_count(self) -> int:
+        return len(self.files)
 
     def __reduce__(self):
         state = (self.git_id, [c.id for c in self.commits])
@@ -127,7 +143,7 @@ class GitAccount(Account):
     def __eq__(self, other: object) -> bool:
         if self is other:
             return True
-        if not isinstance(other, GitAccount):
+        if not isinstance(other, GitAccountMixin):
             return False
         return self.id == other.id
 
@@ -137,12 +153,41 @@ class GitAccount(Account):
     def __str__(self) -> str:
         return str(self.git_id)
 
+class GitAccount(GitAccountMixin, Account):
+    git_id: GitAccountId
+    commits: List[GitCommit] = Field(default_factory=list)
+
+    _views: Dict[str, List] = PrivateAttr(default_factory=dict)
+
+    @model_validator(mode="before")
+    @classmethod
+    def set_account_fields(cls, data: dict):
+        """
+        Ensure that 'name' and 'project' are properly set
+        based on git_id and git_project.
+        """
+        if isinstance(data, dict):
+            git_id = data.get("git_id")
+            git_project = data.get("project") or data.get("git_project")
+
+            if git_id is not None:
+                # set the inherited 'name' from git_id
+                if "name" not in data:
+                    data["name"] = git_id.name
+            if git_project is not None:
+                # normalize: accept 'git_project' as 'project'
+                data["project"] = git_project
+
+        return data
+
 class GitProject(Project):
     name: str
     account_registry: AccountRegistry = Field(default_factory=AccountRegistry)
     git_commit_registry: CommitRegistry = Field(default_factory=CommitRegistry)
     file_registry: FileRegistry = Field(default_factory=FileRegistry)
     change_registry: ChangeRegistry = Field(default_factory=ChangeRegistry)
+    last_change_index: LastChangeIndex = Field(default_factory=LastChangeIndex)
+    commit_metrics: CommitMetrics = Field(default_factory=CommitMetrics)
 
     class Config:
         arbitrary_types_allowed = True
@@ -166,6 +211,15 @@ class GitProject(Project):
                 and self.change_registry._map == other.change_registry._map
         )
 
+    def snapshot(self, commit: GitCommit) -> Dict[str, File]:
+        """The files alive at ``commit``, by their path at that commit."""
+        files = {}
+        for file in self.file_registry.all:
+            last = file.get_last_change(commit)
+            if last is not None and last.change_type is not ChangeType.DELETE:
+                files[last.new_file_name] = file
+        return files
+
     def _relink_objects(self):
         for account in self.account_registry.all:
             for c in account._commits:
@@ -187,17 +241,18 @@ class GitProject(Project):
                 LOG.warning(f"Could not find committer {commit._committer} in account registry")
             commit.committer = committer
 
+            parents = []
             for p in commit._parents:
                 parent = self.git_commit_registry.get_by_id(p)
                 if parent is None:
                     LOG.warning(f"Could not find parent {p} in commit registry")
-                commit.parents.append(parent)
+                parents.append(parent)
+            commit.parents = parents
 
             for c in commit._children:
                 child = self.git_commit_registry.get_by_id(c)
                 if child is None:
                     LOG.warning(f"Could not find child {c} in commit registry")
-                commit.children.append(child)
 
             for c in commit._changes:
                 change = self.change_registry.get_by_id(c)
@@ -242,11 +297,13 @@ class GitProject(Project):
                     LOG.warning(f"Could not find parent commit {change._parent_commit} in commit registry")
                 change.parent_commit = parent_commit
 
+            annotated_lines = []
             for c in change._annotated_lines:
                 commit = self.git_commit_registry.get_by_id(c)
                 if commit is None:
                     LOG.warning(f"Could not find commit {c} in commit registry")
-                change.annotated_lines.append(commit)
+                annotated_lines.append(commit)
+            change.annotated_lines = Rope(annotated_lines)
 
             if change._parent_change is not None:
                 parent_change = self.change_registry.get_by_id(change._parent_change)
@@ -260,6 +317,9 @@ class GitProject(Project):
             del change._annotated_lines
             del change._parent_change
 
+        self.git_commit_registry.rebuild_graph()
+        self.change_registry.reindex_files()
+
     def __reduce__(self):
         state = (
             self.name,
@@ -267,6 +327,7 @@ class GitProject(Project):
             list(self.git_commit_registry.all),
             list(self.file_registry.all),
             list(self.change_registry.all),
+            self.commit_metrics,
         )
         return self._rebuild, state
 
@@ -278,6 +339,7 @@ class GitProject(Project):
         commits: Collection[GitCommit],
         files: Collection[File],
         changes: Collection[Change],
+        commit_metrics: Optional[CommitMetrics] = None,
     ):
         # Create empty registries
         obj = cls(
@@ -296,6 +358,12 @@ class GitProject(Project):
 
         obj._relink_objects()
 
+        # Merge changes sharing an id are saved once, so recomputing would lose their lines.
+        if commit_metrics is not None and commit_metrics.attach(obj.git_commit_registry.graph):
+            obj.commit_metrics = commit_metrics
+        else:
+            obj.commit_metrics.compute(obj)
+
         return obj
 
 class LineOperation(Enum):
@@ -308,13 +376,12 @@ class ChangeType(Enum):
     RENAME = "RENAME"
     MODIFY = "MODIFY"
 
-class LineChange(BaseModel):
-    operation: LineOperation
-    line_number: int
-    commit: GitCommit
+class LineChangeMixin:
+    """Behaviour shared by the pydantic and the slotted LineChange."""
+    __slots__ = ()
 
     def __eq__(self, other):
-        if not isinstance(other, LineChange):
+        if not isinstance(other, LineChangeMixin):
             return False
         return (
                 self.operation == other.operation and
@@ -325,42 +392,65 @@ class LineChange(BaseModel):
         # Only use immutable fields
         return hash((self.operation, self.line_number))
 
-class Hunk(BaseModel):
-    line_changes: List[LineChange]
-    deleted_lines: List[LineChange] = []
-    added_lines: List[LineChange] = []
+class LineChange(LineChangeMixin, BaseModel):
+    operation: LineOperation
+    line_number: int
+    commit: GitCommit
+
+class LineRun(NamedTuple):
+    """``count`` consecutive lines changed the same way, from line ``start`` on."""
+    operation: LineOperation
+    start: int
+    count: int
+
+class HunkMixin:
+    """
+    Behaviour shared by the pydantic and the slotted Hunk.
+
+    A hunk stores its line changes as runs; the commit is the one of its change, so
+    LineChange objects are only created when iterated.
+    """
+    __slots__ = ()
+
+    @property
+    def line_change_count(self) -> int:
+        return sum(run.count for run in self.runs)
+
+    @property
+    def deleted_line_count(self) -> int:
+        return sum(run.count for run in self.runs if run.operation is LineOperation.DELETE)
+
+    @property
+    def added_line_count(self) -> int:
+        return sum(run.count for run in self.runs if run.operation is LineOperation.ADD)
+
+    def line_numbers(self, operation: LineOperation) -> Iterator[int]:
+        for run in self.runs:
+            if run.operation is operation:
+                yield from range(run.start, run.start + run.count)
+
+    def iter_line_changes(self, commit: "GitCommit", operation: Optional[LineOperation] = None) -> Iterator[LineChange]:
+        for run in self.runs:
+            if operation is None or run.operation is operation:
+                for line_number in range(run.start, run.start + run.count):
+                    yield self.line_change_class(operation=run.operation, line_number=line_number, commit=commit)
 
-    @model_validator(mode="after")
-    @classmethod
-    def derive_added_deleted(cls, values):
-        line_changes = values.line_changes
-        values.deleted_lines = [lc for lc in line_changes if lc.operation == LineOperation.DELETE]
-        values.added_lines = [lc for lc in line_changes if lc.operation == LineOperation.ADD]
-        return values
     def __hash__(self):
-        return hash((
-            tuple(self.line_changes),
-            tuple(self.deleted_lines),
-            tuple(self.added_lines),
-        ))
+        return hash(tuple(self.runs))
 
     def __eq__(self, other):
-        if not isinstance(other, Hunk):
+        if not isinstance(other, HunkMixin):
             return False
-        return (
-                self.line_changes == other.line_changes and
-                self.deleted_lines == other.deleted_lines and
-                self.added_lines == other.added_lines
-        )
+        return list(self.runs) == list(other.runs)
 
-class File(BaseModel):
-    is_binary: bool
-    project: Optional[GitProject] = None
-    changes: List[Change] = Field(default_factory=list)
-    id: uuid.UUID = Field(default_factory=uuid.uuid4)
+class Hunk(HunkMixin, BaseModel):
+    runs: List[LineRun]
 
-    class Config:
-        arbitrary_types_allowed = True
+    line_change_class: ClassVar[type] = LineChange
+
+class FileMixin:
+    """Behaviour shared by the pydantic and the slotted File."""
+    __slots__ = ()
 
     def __reduce__(self):
         # Instead of storing Student objects, store only IDs
@@ -389,9 +479,9 @@ class File(BaseModel):
         typ = last.change_type if last is not None else None
         return typ is not None and typ is not ChangeType.DELETE
 
-    def annotated_lines(self, commit: Optional[GitCommit] = None) -> List[GitCommit]:
+    def annotated_lines(self, commit: Optional[GitCommit] = None) -> Rope[GitCommit]:
         last = self.get_last_change(commit)
-        return last.annotated_lines if (last is not None and getattr(last, "annotated_lines", None) is not None) else []
+        return last.annotated_lines if (last is not None and getattr(last, "annotated_lines", None) is not None) else Rope()
 
     def full_path(self, commit: Optional[GitCommit] = None) -> Optional[str]:
         last = self.get_last_change(commit)
@@ -429,55 +519,59 @@ class File(BaseModel):
             return None
         if commit is None:
             return self.changes[-1]
-        return self._get_last_change_recursively(commit)
-
-    def _get_last_change_recursively(self, commit: GitCommit) -> Optional[Change]:
-        found = next((c for c in self.changes if getattr(c, "commit", None) == commit), None)
-        if found is not None:
-            return found
-        parents = getattr(commit, "parents", None)
-        if not parents:
-            return None
-        parent = parents[0] if len(parents) > 0 else None
-        if parent is None:
-            return None
-        return self._get_last_change_recursively(parent)
+        registry = self.project.git_commit_registry if self.project is not None else None
+        ordinal = registry.graph.ordinal(commit.id) if registry is not None else None
+        if ordinal is not None:
+            return self.timeline().change_at(ordinal)
+        return self._get_last_change_on_first_parents(commit)
+
+    def timeline(self) -> FileTimeline:
+        """Index of this file's changes over the project's commit graph, rebuilt when either changed."""
+        reachability = self.project.git_commit_registry.reachability
+        if self._timeline is None or not self._timeline.is_current(self.changes, reachability):
+            self._timeline = FileTimeline(self.changes, reachability)
+        return self._timeline
+
+    def _get_last_change_on_first_parents(self, commit: GitCommit) -> Optional[Change]:
+        changes_by_commit = {}
+        for change in self.changes:
+            changes_by_commit.setdefault(getattr(change, "commit", None), change)
+        while commit is not None:
+            found = changes_by_commit.get(commit)
+            if found is not None:
+                return found
+            parents = getattr(commit, "parents", None)
+            commit = parents[0] if parents else None
+        return None
 
     def __eq__(self, other: object) -> bool:
         if self is other:
             return True
-        if not isinstance(other, File):
+        if not isinstance(other, FileMixin):
             return False
-        return self.is_binary == other.is_binary and self.id == other.id
+        return self.id == other.id
 
     def __hash__(self) -> int:
-        result = hash(self.is_binary)
-        result = 31 * result + hash(self.id)
-        return result
+        return hash(self.id)
 
     def __str__(self) -> str:
         return str(self.changes[-1].new_file_name if self.changes else "nu stiu")
 
-class GitCommit(BaseModel):
+class File(FileMixin, BaseModel):
+    is_binary: bool
     project: Optional[GitProject] = None
-    id: str
-    message: str
-    author_date: datetime
-    committer_date: datetime
-    author: Optional[GitAccount] = None # this is optional to not cause problems in the loading process after serialization
-    committer: Optional[GitAccount] = None # same as above
-    parents: List[GitCommit] = Field(default_factory=list)
-    children: List[GitCommit] = Field(default_factory=list)
     changes: List[Change] = Field(default_factory=list)
-    branch_id: int = 0
-    repo_size: int = 0
+    id: uuid.UUID = Field(default_factory=uuid.uuid4)
 
-    issues: List[Issue] = Field(default_factory=list)
-    pull_requests: List[PullRequest] = Field(default_factory=list)
+    _timeline: Optional[FileTimeline] = PrivateAttr(default=None)
 
     class Config:
         arbitrary_types_allowed = True
 
+class GitCommitMixin:
+    """Behaviour shared by the pydantic and the slotted GitCommit."""
+    __slots__ = ()
+
     def older_than(self, age: timedelta, other: GitCommit) -> bool:
         try:
             threshold = other.committer_date - age
@@ -489,25 +583,12 @@ class GitCommit(BaseModel):
     def __eq__(self, other: object) -> bool:
         if self is other:
             return True
-        if not isinstance(other, GitCommit):
+        if not isinstance(other, GitCommitMixin):
             return False
-        return (
-            self.id == other.id
-            and self.message == other.message
-            and self.author_date == other.author_date
-            and self.committer_date == other.committer_date
-            and self.author == other.author
-            and self.committer == other.committer
-        )
+        return self.id == other.id
 
     def __hash__(self) -> int:
-        result = hash(self.id)
-        result = 31 * result + hash(self.message)
-        result = 31 * result + hash(self.author_date)
-        result = 31 * result + hash(self.committer_date)
-        result = 31 * result + hash(self.author)
-        result = 31 * result + hash(self.committer)
-        return result
+        return hash(self.id)
 
     @property
     def is_merge_commit(self) -> bool:
@@ -569,61 +650,85 @@ class GitCommit(BaseModel):
         return obj
 
     def add_child(self, commit: GitCommit) -> None:
-        self.children = [*self.children, commit]
+        # The children of a registered commit are derived from its children's parents.
+        if isinstance(self.children, list):
+            self.children.append(commit)
 
     def is_after_in_tree(self, other: GitCommit) -> bool:
-        if other in self.parents:
-            return True
-        return any(parent.is_after_in_tree(other) for parent in self.parents)
+        registry = self.project.git_commit_registry if self.project is not None else None
+        if registry is not None and registry.graph.ordinal(self.id) is not None \
+                and registry.graph.ordinal(other.id) is not None:
+            return registry.reachability.is_ancestor(other, self)
+
+        # Commits outside a project: walk the ancestors once each, without recursing. They are
+        # marked by sha, as proxies of the same commit may be different objects.
+        seen = set()
+        stack = list(self.parents)
+        while stack:
+            commit = stack.pop()
+            if commit == other:
+                return True
+            if commit.id not in seen:
+                seen.add(commit.id)
+                stack.extend(commit.parents)
+        return False
 
     def __str__(self) -> str:
         return self.id
 
-class Change(BaseModel):
+class GitCommit(GitCommitMixin, BaseModel):
+    project: Optional[GitProject] = None
     id: str
-    commit: Optional[GitCommit] = None # to not cause errors during loading after serialization
-    change_type: ChangeType
-    old_file_name: str
-    new_file_name: str
-    file: Optional[File] = None
-    parent_commit: Optional[GitCommit] = None
-    hunks: List[Hunk] = Field(default_factory=list)
-    annotated_lines: List[GitCommit] = Field(default_factory=list)
-    parent_change: Optional[Change] = None
-    compute_annotated_lines: bool = False
+    message: str
+    author_date: datetime
+    committer_date: datetime
+    author: Optional[GitAccount] = None # this is optional to not cause problems in the loading process after serialization
+    committer: Optional[GitAccount] = None # same as above
+    parents: List[GitCommit] = Field(default_factory=list)
+    children: List[GitCommit] = Field(default_factory=list)
+    changes: List[Change] = Field(default_factory=list)
+    branch_id: int = 0
+    repo_size: int = 0
+
+    issues: OrderedSet[Issue] = Field(default_factory=OrderedSet)
+    pull_requests: OrderedSet[PullRequest] = Field(default_factory=OrderedSet)
 
     class Config:
         arbitrary_types_allowed = True
 
-    @model_validator(mode="before")
-    @classmethod
-    def set_id(cls, values):
-        if values.get("id") is None:
-            commit = values.get("commit")
-            old_name = values.get("old_file_name")
-            new_name = values.get("new_file_name")
-            if commit and old_name and new_name:
-                values["id"] = f"{commit.id}-{old_name}->{new_name}"
-        return values
+class ChangeMixin(CachedViewsMixin):
+    """Behaviour shared by the pydantic and the slotted Change."""
+    __slots__ = ()
 
     @property
     def line_changes(self) -> List[LineChange]:
-        return [lc for hunk in self.hunks for lc in hunk.line_changes]
+        return self._view("line_changes",
+                          lambda: [lc for hunk in self.hunks for lc in hunk.iter_line_changes(self.commit)])
 
     @property
     def deleted_lines(self) -> List[LineChange]:
-        return [lc for hunk in self.hunks for lc in hunk.deleted_lines]
+        return self._view("deleted_lines",
+                          lambda: [lc for lc in self.line_changes if lc.operation is LineOperation.DELETE])
 
     @property
     def added_lines(self) -> List[LineChange]:
-        return [lc for hunk in self.hunks for lc in hunk.added_lines]
+        return self._view("added_lines",
+                          lambda: [lc for lc in self.line_changes if lc.operation is LineOperation.ADD])
 
-    @model_validator(mode="after")
-    @classmethod
-    def apply_line_changes(cls, model: "Change") -> "Change":
-        if model.compute_annotated_lines and not model.file.is_binary:
-            model._apply_line_changes(model.parent_change)
-        return model
+    @property
+    def line_change_count(self) -> int:
+        return sum(hunk.line_change_count for hunk in self.hunks)
+
+    @property
+    def deleted_line_count(self) -> int:
+        return sum(hunk.deleted_line_count for hunk in self.hunks)
+
+    @property
+    def added_line_count(self) -> int:
+        return sum(hunk.added_line_count for hunk in self.hunks)
+
+    def line_numbers(self, operation: LineOperation) -> List[int]:
+        return [n for hunk in self.hunks for n in hunk.line_numbers(operation)]
 
     def __reduce__(self):
         state = (self.id,
@@ -665,8 +770,9 @@ class Change(BaseModel):
             hunks=hunks,
             annotated_lines=[],
             parent_change=None,
-            compute_annotated_lines=compute_annotated_lines,
+            compute_annotated_lines=False,  # there is no file to check yet
         )
+        obj.compute_annotated_lines = compute_annotated_lines
         # Store IDs for later linking
         obj._commit = commit_id
         obj._file = file_id
@@ -677,76 +783,129 @@ class Change(BaseModel):
         return obj
 
     def _apply_line_changes(self, parent_change: Optional["Change"]) -> None:
-        try:
-            new_annotated_lines = list(parent_change.annotated_lines) if parent_change else []
-            deletes = self.deleted_lines
-            adds = self.added_lines
-            for d in sorted(deletes, key=lambda x: x.line_number, reverse=True):
-                new_annotated_lines.pop(d.line_number - 1)
-            for a in adds:
-                new_annotated_lines.insert(a.line_number - 1, a.commit)
-            self.annotated_lines = new_annotated_lines
-        except IndexError:
-            self.file.is_binary = True
+        # The parent's rope is shared, not copied, and every line run is applied at once, so
+        # a hunk costs O(log n) instead of O(file size). Deletions go from the bottom up.
+        with PROFILER.span("annotated_lines"):
+            try:
+                new_annotated_lines = parent_change.annotated_lines if parent_change else Rope()
+                runs = [run for hunk in self.hunks for run in hunk.runs]
+                deletes = sorted((run for run in runs if run.operation is LineOperation.DELETE),
+                                 key=lambda run: run.start, reverse=True)
+                for run in deletes:
+                    new_annotated_lines = new_annotated_lines.delete(run.start - 1, run.count)
+                for run in runs:
+                    if run.operation is LineOperation.ADD:
+                        new_annotated_lines = new_annotated_lines.insert(run.start - 1, self.commit, run.count)
+                self.annotated_lines = new_annotated_lines
+            except IndexError:
+                self.file.is_binary = True
 
 
     def __eq__(self, other: object) -> bool:
         if self is other:
             return True
-        if not isinstance(other, Change):
+        if not isinstance(other, ChangeMixin):
             return False
-        return (
-                self.change_type == other.change_type
-                and self.file == other.file
-                and self.line_changes == other.line_changes
-                and self.annotated_lines == other.annotated_lines
-        )
+        # The changes of a merge commit against each of its parents share the same id.
+        return self.id == other.id and self.parent_commit == other.parent_commit
 
     def __hash__(self) -> int:
-        result = hash(self.change_type)
-        result = 31 * result + hash(self.commit)
-        result = 31 * result + hash(self.old_file_name)
-        result = 31 * result + hash(self.new_file_name)
-        result = 31 * result + hash(tuple(self.hunks))
-        result = 31 * result + hash(tuple(self.annotated_lines))
-        return result
+        return hash(self.id)
 
     def __str__(self) -> str:
         return (f"In {self.commit.id} : {self.commit.message}\n"
                 f"{self.change_type} {self.old_file_name}->{self.new_file_name}")
 
+class Change(ChangeMixin, BaseModel):
+    id: str
+    commit: Optional[GitCommit] = None # to not cause errors during loading after serialization
+    change_type: ChangeType
+    old_file_name: str
+    new_file_name: str
+    file: Optional[File] = None
+    parent_commit: Optional[GitCommit] = None
+    hunks: List[Hunk] = Field(default_factory=list)
+    annotated_lines: Rope[GitCommit] = Field(default_factory=Rope)
+    parent_change: Optional[Change] = None
+    compute_annotated_lines: bool = False
 
+    _views: Dict[str, List] = PrivateAttr(default_factory=dict)
 
+    class Config:
+        arbitrary_types_allowed = True
+
+    @model_validator(mode="before")
+    @classmethod
+    def set_id(cls, values):
+        if values.get("id") is None:
+            commit = values.get("commit")
+            old_name = values.get("old_file_name")
+            new_name = values.get("new_file_name")
+            if commit and old_name and new_name:
+                values["id"] = f"{commit.id}-{old_name}->{new_name}"
+        return values
+
+    @field_validator("annotated_lines", mode="before")
+    @classmethod
+    def to_rope(cls, value):
+        return value if isinstance(value, Rope) else Rope(value)
+
+    @model_validator(mode="after")
+    @classmethod
+    def apply_line_changes(cls, model: "Change") -> "Change":
+        if model.compute_annotated_lines and not model.file.is_binary:
+            model._apply_line_changes(model.parent_change)
+        return model
+
+
+
+
+
+def to_line_runs(line_changes: Iterable[Tuple[LineOperation, int]]) -> List[LineRun]:
+    """Group ``(operation, line_number)`` pairs, in order, into runs of consecutive line numbers.
+
+    Only positive line numbers are grouped; anything else is kept as a run of its own so that
+    it keeps the index semantics of a single list operation.
+    """
+    runs: List[LineRun] = []
+    for operation, line_number in line_changes:
+        if runs:
+            last = runs[-1]
+            if last.operation is operation and last.start > 0 and last.start + last.count == line_number:
+                runs[-1] = LineRun(operation, last.start, last.count + 1)
+                continue
+        runs.append(LineRun(operation, line_number, 1))
+    return runs
 
 
 class IssueStatusCategory(BaseModel):
     key: str
     name: str
 
-    issue_statuses: List["IssueStatus"] = Field(default_factory=list)
+    issue_statuses: OrderedSet["IssueStatus"] = Field(default_factory=OrderedSet)
 
     def __eq__(self, other):
         if not isinstance(other, IssueStatusCategory):
             return False
-        return (self.key, self.name) == (other.key, other.name)
+        return self.key == other.key
 
     def __hash__(self):
-        return hash((self.key, self.name))
+        return hash(self.key)
 
 class IssueStatus(BaseModel):
     id: str
     name: str
 
     issue_status_categories: "IssueStatusCategory" = Field(default_factory=IssueStatusCategory)
-    issues: List["Issue"] = Field(default_factory=list)
+    issues: OrderedSet["Issue"] = Field(default_factory=OrderedSet)
 
     def __eq__(self, other):
         if not isinstance(other, IssueStatus):
             return False
-        return (self.id, self.name) == (other.id, other.name)
+        return self.id == other.id
 
     def __hash__(self):
-        return hash((self.id, self.name))
+        return hash(self.id)
 
 class IssueType(BaseModel):
     id: str
@@ -754,20 +913,15 @@ class IssueType(BaseModel):
     description: str
     isSubTask: bool
 
-    issues: List["Issue"] = Field(default_factory=list)
+    issues: OrderedSet["Issue"] = Field(default_factory=OrderedSet)
 
     def __eq__(self, other):
         if not isinstance(other, IssueType):
             return False
-        return (self.id, self.name, self.description, self.isSubTask) == (
-            other.id,
-            other.name,
-            other.description,
-            other.isSubTask,
-        )
+        return self.name == other.name
 
     def __hash__(self):
-        return hash((self.id, self.name, self.description, self.isSubTask))
+        return hash(self.name)
 
 class Issue(BaseModel):
     id: int
@@ -776,54 +930,42 @@ class Issue(BaseModel):
     createdAt: datetime
     updatedAt: datetime
 
-    issue_statuses: List["IssueStatus"] = Field(default_factory=list)
-    issue_types: List["IssueType"] = Field(default_factory=list)
+    issue_statuses: OrderedSet["IssueStatus"] = Field(default_factory=OrderedSet)
+    issue_types: OrderedSet["IssueType"] = Field(default_factory=OrderedSet)
     creator: Optional["JiraUser"] = None
-    jira_users_as_assignee: List["JiraUser"] = Field(default_factory=list)
+    jira_users_as_assignee: OrderedSet["JiraUser"] = Field(default_factory=OrderedSet)
     reporter: Optional["JiraUser"] = None
     parent: Optional["Issue"] = None
-    children: List["Issue"] = Field(default_factory=list)
+    children: OrderedSet["Issue"] = Field(default_factory=OrderedSet)
 
-    git_commits: List[GitCommit] = Field(default_factory=list)
-    pull_requests: List[PullRequest] = Field(default_factory=list)
+    git_commits: OrderedSet[GitCommit] = Field(default_factory=OrderedSet)
+    pull_requests: OrderedSet[PullRequest] = Field(default_factory=OrderedSet)
 
 
     def __eq__(self, other):
         if not isinstance(other, Issue):
             return False
-        return (
-            self.id,
-            self.key,
-            self.summary,
-            self.createdAt,
-            self.updatedAt,
-        ) == (
-            other.id,
-            other.key,
-            other.summary,
-            other.createdAt,
-            other.updatedAt,
-        )
+        return self.key == other.key
 
     def __hash__(self):
-        return hash((self.id, self.key, self.summary, self.createdAt, self.updatedAt))
+        return hash(self.key)
 
 class JiraUser(BaseModel):
     key: str
     name: str
     link: str
 
-    issues_as_reporter: List["Issue"] = Field(default_factory=list)
-    issues_as_creator: List["Issue"] = Field(default_factory=list)
-    issues_as_assignee: List["Issue"] = Field(default_factory=list)
+    issues_as_reporter: OrderedSet["Issue"] = Field(default_factory=OrderedSet)
+    issues_as_creator: OrderedSet["Issue"] = Field(default_factory=OrderedSet)
+    issues_as_assignee: OrderedSet["Issue"] = Field(default_factory=OrderedSet)
 
     def __eq__(self, other):
         if not isinstance(other, JiraUser):
             return False
-        return (self.key, self.name, self.link) == (other.key, other.name, other.link)
+        return self.link == other.link
 
     def __hash__(self):
-        return hash((self.key, self.name, self.link))
+        return hash(self.link)
 
 class JiraProject(Project):
     name: str
@@ -833,6 +975,14 @@ class JiraProject(Project):
     issue_registry: IssueRegistry = Field(default_factory=IssueRegistry)
     jira_user_registry: JiraUserRegistry = Field(default_factory=JiraUserRegistry)
 
+    _issue_key_extractor: Optional[IssueKeyExtractor] = PrivateAttr(default=None)
+
+    def issue_key_extractor(self) -> IssueKeyExtractor:
+        """The extractor of this project's issue keys, built once and reused by every linking call."""
+        if self._issue_key_extractor is None:
+            self._issue_key_extractor = IssueKeyExtractor(self.issue_registry)
+        return self._issue_key_extractor
+
     def __str__(self):
         return (
             f"JiraProject(name={self.name},\n"
@@ -864,17 +1014,17 @@ class GitHubUser(BaseModel):
     login: Optional[str]
     name: Optional[str]
 
-    pull_requests_as_creator: List["PullRequest"] = Field(default_factory=list)
-    pull_requests_as_merged_by: List["PullRequest"] = Field(default_factory=list)
-    pull_requests_as_assignee: List["PullRequest"] = Field(default_factory=list)
+    pull_requests_as_creator: OrderedSet["PullRequest"] = Field(default_factory=OrderedSet)
+    pull_requests_as_merged_by: OrderedSet["PullRequest"] = Field(default_factory=OrderedSet)
+    pull_requests_as_assignee: OrderedSet["PullRequest"] = Field(default_factory=OrderedSet)
 
     def __eq__(self, other):
         if not isinstance(other, GitHubUser):
             return False
-        return (self.url, self.login, self.name) == (other.url, other.login, other.name)
+        return self.url == other.url
 
     def __hash__(self):
-        return hash((self.url, self.login, self.name))
+        return hash(self.url)
 
 class PullRequest(BaseModel):
     number: int
@@ -888,51 +1038,21 @@ class PullRequest(BaseModel):
     updatedAt: Optional[datetime]
 
     createdBy: Optional[GitHubUser] = None
-    assignees: List[GitHubUser] = Field(default_factory=list)
+    assignees: OrderedSet[GitHubUser] = Field(default_factory=OrderedSet)
     mergedBy: Optional[GitHubUser] = None
-    git_hub_commits: List[GitHubCommit] = Field(default_factory=list)
+    git_hub_commits: OrderedSet[GitHubCommit] = Field(default_factory=OrderedSet)
 
-    issues: List[Issue] = Field(default_factory=list)
-    git_commits: List[GitCommit] = Field(default_factory=list)
+    issues: OrderedSet[Issue] = Field(default_factory=OrderedSet)
+    git_commits: OrderedSet[GitCommit] = Field(default_factory=OrderedSet)
 
 
     def __eq__(self, other):
         if not isinstance(other, PullRequest):
             return False
-        return (
-            self.number,
-            self.title,
-            self.state,
-            self.changedFiles,
-            self.body,
-            self.createdAt,
-            self.mergedAt,
-            self.closedAt,
-            self.updatedAt,
-        ) == (
-            other.number,
-            other.title,
-            other.state,
-            other.changedFiles,
-            other.body,
-            other.createdAt,
-            other.mergedAt,
-            other.closedAt,
-            other.updatedAt,
-        )
+        return self.number == other.number
 
     def __hash__(self):
-        return hash((
-            self.number,
-            self.title,
-            self.state,
-            self.changedFiles,
-            self.body,
-            self.createdAt,
-            self.mergedAt,
-            self.closedAt,
-            self.updatedAt,
-        ))
+        return hash(self.number)
 
 class GitHubCommit(BaseModel):
     id: str
@@ -940,20 +1060,15 @@ class GitHubCommit(BaseModel):
     message: str
     changedFiles: int
 
-    pull_requests: List[PullRequest] = Field(default_factory=list)
+    pull_requests: OrderedSet[PullRequest] = Field(default_factory=OrderedSet)
 
     def __eq__(self, other):
         if not isinstance(other, GitHubCommit):
             return False
-        return (self.id, self.date, self.message, self.changedFiles) == (
-            other.id,
-            other.date,
-            other.message,
-            other.changedFiles,
-        )
+        return self.id == other.id
 
     def __hash__(self):
-        return hash((self.id, self.date, self.message, self.changedFiles))
+        return hash(self.id)
 
 class GitHubProject(Project):
     name: str
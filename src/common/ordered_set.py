@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from reprlib import recursive_repr
+from typing import Any, Dict, Iterable, Iterator, List, MutableSet, Optional, TypeVar, Union, overload
+
+from pydantic_core import core_schema
+
+T = TypeVar("T")
+
+
+class OrderedSet(MutableSet[T]):
+    """
+    A set that remembers insertion order, used for the relationships between entities.
+
+    Membership, ``add`` and ``discard`` are O(1). ``append`` and ``extend`` are kept so that
+    list-style code keeps working, and adding an element twice keeps its first position.
+    Indexing walks the elements and is O(n).
+    """
+    __slots__ = ("_items",)
+
+    def __init__(self, items: Optional[Iterable[T]] = None):
+        self._items: Dict[T, None] = dict.fromkeys(items) if items is not None else {}
+
+    def add(self, item: T) -> None:
+        self._items[item] = None
+
+    def discard(self, item: T) -> None:
+        self._items.pop(item, None)
+
+    def append(self, item: T) -> None:
+        self._items[item] = None
+
+    def extend(self, items: Iterable[T]) -> None:
+        for item in items:
+            self._items[item] = None
+
+    def __contains__(self, item: object) -> bool:
+        return item in self._items
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self._items)
+
+    def __reversed__(self) -> Iterator[T]:
+        return reversed(self._items)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @overload
+    def __getitem__(self, index: int) -> T: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[T]: ...
+
+    def __getitem__(self, index: Union[int, slice]):
+        return list(self._items)[index]
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, OrderedSet):
+            return list(self._items) == list(other._items)
+        if isinstance(other, list):
+            return list(self._items) == other
+        return super().__eq__(other)
+
+    __hash__ = None
+
+    def __getstate__(self):
+        return list(self._items)
+
+    def __setstate__(self, items: List[T]) -> None:
+        self._items = dict.fromkeys(items)
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source: Any, handler: Any) -> core_schema.CoreSchema:
+        # Model fields accept any iterable and keep its elements unvalidated, like arbitrary types.
+        return core_schema.no_info_plain_validator_function(
+            lambda value: value if isinstance(value, cls) else cls(value)
+        )
+
+    @recursive_repr()
+    def __repr__(self) -> str:
+        return f"OrderedSet({list(self._items)!r})"
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+from typing import Any, Generic, Iterator, Optional, Tuple, TypeVar
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+_BITS = 5
+_MASK = (1 << _BITS) - 1
+_HASH_BITS = 64
+_HASH_MASK = (1 << _HASH_BITS) - 1
+
+
+class _Node:
+    """Bitmap-compressed trie node. Each set bit owns one entry: a leaf tuple, a _Node or a _Collision."""
+    __slots__ = ("bitmap", "entries")
+
+    def __init__(self, bitmap: int, entries: Tuple[Any, ...]):
+        self.bitmap = bitmap
+        self.entries = entries
+
+
+class _Collision:
+    """Leaves whose full hashes are identical."""
+    __slots__ = ("hash", "leaves")
+
+    def __init__(self, hash_: int, leaves: Tuple[Tuple[int, Any, Any], ...]):
+        self.hash = hash_
+        self.leaves = leaves
+
+
+_EMPTY_NODE = _Node(0, ())
+
+
+def _hash(key: Any) -> int:
+    return hash(key) & _HASH_MASK
+
+
+def _leaves(entry) -> Iterator[Tuple[int, Any, Any]]:
+    if type(entry) is tuple:
+        yield entry
+    elif type(entry) is _Collision:
+        yield from entry.leaves
+    else:
+        for child in entry.entries:
+            yield from _leaves(child)
+
+
+def _find(entry, shift: int, h: int, key: Any) -> Optional[Tuple[int, Any, Any]]:
+    while True:
+        if type(entry) is tuple:
+            return entry if entry[0] == h and (entry[1] is key or entry[1] == key) else None
+        if type(entry) is _Collision:
+            if entry.hash != h:
+                return None
+            return next((leaf for leaf in entry.leaves if leaf[1] is key or leaf[1] == key), None)
+        bit = 1 << ((h >> shift) & _MASK)
+        if not entry.bitmap & bit:
+            return None
+        entry = entry.entries[(entry.bitmap & (bit - 1)).bit_count()]
+        shift += _BITS
+
+
+def _pair(shift: int, first: Tuple[int, Any, Any], second: Tuple[int, Any, Any]):
+    if shift >= _HASH_BITS or first[0] == second[0]:
+        return _Collision(first[0], (first, second))
+    first_frag = (first[0] >> shift) & _MASK
+    second_frag = (second[0] >> shift) & _MASK
+    if first_frag == second_frag:
+        return _Node(1 << first_frag, (_pair(shift + _BITS, first, second),))
+    if first_frag < second_frag:
+        return _Node((1 << first_frag) | (1 << second_frag), (first, second))
+    return _Node((1 << first_frag) | (1 << second_frag), (second, first))
+
+
+def _assoc(entry, shift: int, leaf: Tuple[int, Any, Any]) -> Tuple[Any, bool]:
+    """Return (new entry, added) where added is False when an existing key was replaced."""
+    h, key, value = leaf
+    if type(entry) is tuple:
+        if entry[0] == h and (entry[1] is key or entry[1] == key):
+            return (entry if entry[2] is value else leaf), False
+        return _pair(shift, entry, leaf), True
+    if type(entry) is _Collision:
+        if entry.hash != h:
+            return _assoc(_Node(1 << ((entry.hash >> shift) & _MASK), (entry,)), shift, leaf)
+        for i, existing in enumerate(entry.leaves):
+            if existing[1] is key or existing[1] == key:
+                return _Collision(h, entry.leaves[:i] + (leaf,) + entry.leaves[i + 1:]), False
+        return _Collision(h, entry.leaves + (leaf,)), True
+
+    bit = 1 << ((h >> shift) & _MASK)
+    idx = (entry.bitmap & (bit - 1)).bit_count()
+    if not entry.bitmap & bit:
+        return _Node(entry.bitmap | bit, entry.entries[:idx] + (leaf,) + entry.entries[idx:]), True
+    child, added = _assoc(entry.entries[idx], shift + _BITS, leaf)
+    if child is entry.entries[idx]:
+        return entry, added
+    return _Node(entry.bitmap, entry.entries[:idx] + (child,) + entry.entries[idx + 1:]), added
+
+
+def _merge(left, right, shift: int) -> Tuple[Any, int]:
+    """Union of two entries at the same trie position, keeping the left value on key clashes.
+
+    Returns (entry, number of keys taken from the right side). Shared sub-tries are skipped
+    without being visited, so merging two maps that diverged recently only touches the
+    nodes on the diverging paths.
+    """
+    if left is right:
+        return left, 0
+    if type(left) is _Node and type(right) is _Node:
+        bitmap = left.bitmap | right.bitmap
+        entries = []
+        added = 0
+        changed = bitmap != left.bitmap
+        remaining = bitmap
+        while remaining:
+            bit = remaining & -remaining
+            remaining ^= bit
+            in_left = left.bitmap & bit
+            in_right = right.bitmap & bit
+            if in_left and in_right:
+                left_child = left.entries[(left.bitmap & (bit - 1)).bit_count()]
+                right_child = right.entries[(right.bitmap & (bit - 1)).bit_count()]
+                child, child_added = _merge(left_child, right_child, shift + _BITS)
+                changed = changed or child is not left_child
+                added += child_added
+            elif in_left:
+                child = left.entries[(left.bitmap & (bit - 1)).bit_count()]
+            else:
+                child = right.entries[(right.bitmap & (bit - 1)).bit_count()]
+                added += sum(1 for _ in _leaves(child))
+            entries.append(child)
+        if not changed:
+            return left, 0
+        return _Node(bitmap, tuple(entries)), added
+
+    result = left
+    added = 0
+    for leaf in _leaves(right):
+        if _find(result, shift, leaf[0], leaf[1]) is None:
+            result, _ = _assoc(result, shift, leaf)
+            added += 1
+    return result, added
+
+
+class PersistentMap(Generic[K, V]):
+    """Immutable hash map with structural sharing (a hash array mapped trie).
+
+    ``set`` and ``merge`` return new maps and never modify the receiver, so one map can be
+    derived from another in O(log n) while both stay valid.
+    """
+    __slots__ = ("_root", "_size")
+
+    def __init__(self, _root: _Node = _EMPTY_NODE, _size: int = 0):
+        self._root = _root
+        self._size = _size
+
+    def get(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        leaf = _find(self._root, 0, _hash(key), key)
+        return default if leaf is None else leaf[2]
+
+    def set(self, key: K, value: V) -> PersistentMap[K, V]:
+        root, added = _assoc(self._root, 0, (_hash(key), key, value))
+        if root is self._root:
+            return self
+        return PersistentMap(root, self._size + added)
+
+    def merge(self, other: PersistentMap[K, V]) -> PersistentMap[K, V]:
+        """Return a map with every key of both maps, preferring the values of ``self``."""
+        if not other._size:
+            return self
+        if not self._size:
+            return other
+        root, added = _merge(self._root, other._root, 0)
+        if root is self._root:
+            return self
+        return PersistentMap(root, self._size + added)
+
+    def items(self) -> Iterator[Tuple[K, V]]:
+        return ((key, value) for _, key, value in _leaves(self._root))
+
+    def __contains__(self, key: object) -> bool:
+        return _find(self._root, 0, _hash(key), key) is not None
+
+    def __iter__(self) -> Iterator[K]:
+        return (key for _, key, _ in _leaves(self._root))
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __repr__(self) -> str:
+        return f"PersistentMap({dict(self.items())!r})"
+
+
+EMPTY_MAP: PersistentMap = PersistentMap()
@@ -1,9 +1,14 @@
 import re
-from src.common.models import Project, GitProject, JiraProject, GitHubProject
+from typing import Collection, Optional
+from src.common.models import Project, GitProject, JiraProject, GitHubProject, GitCommit
 from src.jira_miner.reader_dto.models import JsonFileFormatJira
 from src.logger import get_logger
+from src.profiler import get_profiler
 
 LOG = get_logger(__name__)
+PROFILER = get_profiler()
+
+PR_NUMBER_PATTERN = re.compile(r'#(\d+)')
 
 def get_or_add(container: list, element):
     if element not in container:
@@ -12,18 +17,24 @@ def get_or_add(container: list, element):
 
 class ProjectLinker:
     @classmethod
-    def link_projects(cls, p1: Project, p2: Project, additional_data:JsonFileFormatJira = None) -> None:
+    def link_projects(cls, p1: Project, p2: Project, additional_data:JsonFileFormatJira = None, workers: int = 1) -> None:
+        """With ``workers`` > 1, issue keys are searched for in commit and PR texts on a process pool."""
+        with PROFILER.span(f"link {type(p1).__name__}-{type(p2).__name__}"):
+            cls._link_projects(p1, p2, additional_data, workers)
+
+    @classmethod
+    def _link_projects(cls, p1: Project, p2: Project, additional_data: JsonFileFormatJira = None, workers: int = 1) -> None:
         if isinstance(p1, JiraProject) and isinstance(p2, GitProject):
-            cls.link_issues_with_git_commits(p1, p2)
+            cls.link_issues_with_git_commits(p1, p2, workers=workers)
             p1.link(p2)
         elif isinstance(p2, JiraProject) and isinstance(p1, GitProject):
-            cls.link_issues_with_git_commits(p2, p1)
+            cls.link_issues_with_git_commits(p2, p1, workers=workers)
             p2.link(p1)
         elif isinstance(p1, JiraProject) and isinstance(p2, GitHubProject):
-            cls.link_pull_requests_with_issues(p1, p2, additional_data)
+            cls.link_pull_requests_with_issues(p1, p2, additional_data, workers)
             p1.link(p2)
         elif isinstance(p2, JiraProject) and isinstance(p1, GitHubProject):
-            cls.link_pull_requests_with_issues(p2, p1, additional_data)
+            cls.link_pull_requests_with_issues(p2, p1, additional_data, workers)
             p2.link(p1)
         elif isinstance(p1, GitHubProject) and isinstance(p2, GitProject):
             cls.link_pull_requests_with_git_commits(p1, p2)
@@ -35,92 +46,112 @@ class ProjectLinker:
             print(f"[Linker] Unhandled linking case: {type(p1)} ↔ {type(p2)}")
 
     @classmethod
-    def link_issues_with_git_commits(cls, jira_project: JiraProject, git_project: GitProject) -> None:
-        """Link Jira issues to Git commits based on commit messages."""
-        issue_keys = [re.escape(issue.key) for issue in jira_project.issue_registry.all]
-        if not issue_keys:
+    def link_git_commits(
+        cls, project: Project, git_project: GitProject, commits: Collection[GitCommit], workers: int = 1
+    ) -> None:
+        """Link only ``commits``, e.g. the ones added by an update, to an already linked project."""
+        with PROFILER.span(f"link {type(project).__name__}-{type(git_project).__name__}"):
+            if isinstance(project, JiraProject):
+                cls.link_issues_with_git_commits(project, git_project, commits, workers)
+            elif isinstance(project, GitHubProject):
+                cls.link_pull_requests_with_git_commits(project, git_project, commits)
+            else:
+                print(f"[Linker] Unhandled linking case: {type(project)} ↔ {type(git_project)}")
+
+    @classmethod
+    def link_issues_with_git_commits(
+        cls,
+        jira_project: JiraProject,
+        git_project: GitProject,
+        commits: Optional[Collection[GitCommit]] = None,
+        workers: int = 1,
+    ) -> None:
+        """
+        Link Jira issues to Git commits based on commit messages; all commits unless ``commits`` is given.
+
+        The messages are scanned on ``workers`` processes, the links are made here in commit order.
+        """
+        if jira_project.issue_registry.is_empty():
             return
 
-        issue_pattern = re.compile(r'\b(' + '|'.join(issue_keys) + r')\b', re.IGNORECASE)
+        extractor = jira_project.issue_key_extractor()
 
         links = 0
         commits_linked_with_issues = 0
 
-        for commit in git_project.git_commit_registry.all:
-            if not commit.message:
-                continue
-
-            matches = issue_pattern.findall(commit.message)
-
-            if matches:
+        commits = [
+            commit for commit in (git_project.git_commit_registry.all if commits is None else commits) if commit.message
+        ]
+        for commit, issues in zip(commits, extractor.find_all([commit.message for commit in commits], workers)):
+            if issues:
                 commits_linked_with_issues += 1
 
-            for match in set(matches):
-                issue = jira_project.issue_registry.get_by_id(match.upper())
-                if not issue:
-                    continue
+            for issue in issues:
                 get_or_add(issue.git_commits, commit)
                 get_or_add(commit.issues, issue)
 
                 links += 1
 
+        PROFILER.count("issue_commit_links", links)
         LOG.debug(f"[Linker] Linked {links} Issue–Commit edges")
         LOG.debug(f"[Linker] {commits_linked_with_issues} commits associated with issues")
 
     @classmethod
-    def link_pull_requests_with_issues(cls, jira_project: JiraProject, gh_project: GitHubProject, jira_data: JsonFileFormatJira) -> None:
-        issue_keys = [re.escape(issue.key) for issue in jira_project.issue_registry.all]
-        if not issue_keys:
+    def link_pull_requests_with_issues(
+        cls, jira_project: JiraProject, gh_project: GitHubProject, jira_data: JsonFileFormatJira, workers: int = 1
+    ) -> None:
+        if jira_project.issue_registry.is_empty():
             return
 
-        issue_pattern = re.compile(r'\b(' + '|'.join(issue_keys) + r')\b', re.IGNORECASE)
+        extractor = jira_project.issue_key_extractor()
 
         prs_with_issues = 0
 
         # Pass 1: Link via PR title/body
-        for pr in gh_project.pull_request_registry.all:
-            text = (pr.title or "") + " " + (pr.body or "")
-            matches = issue_pattern.findall(text)
-
-            if matches:
+        prs = list(gh_project.pull_request_registry.all)
+        texts = [(pr.title or "") + " " + (pr.body or "") for pr in prs]
+        for pr, issues in zip(prs, extractor.find_all(texts, workers)):
+            if issues:
                 prs_with_issues += 1
 
-            for match in set(matches):
-                issue = jira_project.issue_registry.get_by_id(match.upper())
-                if not issue:
-                    continue
+            for issue in issues:
                 get_or_add(pr.issues, issue)
                 get_or_add(issue.pull_requests, pr)
 
-        def extract_pr_number(text: str) -> int | None:
-            match = re.search(r'#(\d+)', text)
-            if match:
-                return int(match.group(1))
-            return None
-
+        # Pass 2: Link via "Pull Request #<number>" changelog items, one sweep over the changelogs
+        pr_registry = gh_project.pull_request_registry
         for issue in jira_data.issues:
-            issues_pr_links = set()
+            pr_numbers = {}
             for change in issue.changes:
                 for item in change.items:
                     if item.toString and "Pull Request #" in item.toString:
-                        issues_pr_links.add(item.toString)
-            if len(issues_pr_links) > 0:
-                i = jira_project.issue_registry.get_by_id(issue.key)
-                for link in issues_pr_links:
-                    for pr in gh_project.pull_request_registry.all:
-                        if extract_pr_number(link) == pr.number:
-                            get_or_add(i.pull_requests, pr)
-                            get_or_add(pr.issues, i)
-                            break
+                        match = PR_NUMBER_PATTERN.search(item.toString)
+                        if match:
+                            pr_numbers[int(match.group(1))] = None
+            if not pr_numbers:
+                continue
+            i = jira_project.issue_registry.get_by_id(issue.key)
+            if not i:
+                continue
+            for number in pr_numbers:
+                pr = pr_registry.get_by_id(number)
+                if pr:
+                    get_or_add(i.pull_requests, pr)
+                    get_or_add(pr.issues, i)
 
         LOG.debug(f"[Linker] {prs_with_issues} PRs associated with issues")
 
     @classmethod
-    def link_pull_requests_with_git_commits(cls, gh_project: GitHubProject, git_project: GitProject) -> None:
+    def link_pull_requests_with_git_commits(
+        cls, gh_project: GitHubProject, git_project: GitProject, commits: Optional[Collection[GitCommit]] = None
+    ) -> None:
         direct_links = 0
+        commit_ids = None if commits is None else {commit.id for commit in commits}
 
         for pr in gh_project.pull_request_registry.all:
             for pr_commit in pr.git_hub_commits:
+                if commit_ids is not None and pr_commit.id not in commit_ids:
+                    continue
                 git_commit = git_project.git_commit_registry.get_by_id(pr_commit.id)
                 if not git_commit:
                     continue
@@ -130,4 +161,5 @@ class ProjectLinker:
 
                 direct_links += 1
 
+        PROFILER.count("pull_request_commit_links", direct_links)
         LOG.debug(f"[Linker] Direct PR–Commit links: {direct_links}")
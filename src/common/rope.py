@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+import random
+from typing import Any, Dict, Generic, Iterable, Iterator, List, Optional, Sequence, Tuple, TypeVar, overload
+
+T = TypeVar("T")
+
+_priorities = random.Random(0x5EED)
+
+
+class _Run:
+    """Treap node holding ``count`` consecutive copies of ``value``. Never mutated once built by ``_build``."""
+    __slots__ = ("value", "count", "left", "right", "priority", "size")
+
+    def __init__(self, value: Any, count: int, left: Optional[_Run], right: Optional[_Run], priority: float):
+        self.value = value
+        self.count = count
+        self.left = left
+        self.right = right
+        self.priority = priority
+        self.size = count + (left.size if left else 0) + (right.size if right else 0)
+
+
+def _split(node: Optional[_Run], index: int) -> Tuple[Optional[_Run], Optional[_Run]]:
+    """Split into the first ``index`` items and the rest, copying only the nodes on the split path."""
+    if node is None:
+        return None, None
+    left_size = node.left.size if node.left else 0
+    if index <= left_size:
+        first, rest = _split(node.left, index)
+        return first, _Run(node.value, node.count, rest, node.right, node.priority)
+    if index >= left_size + node.count:
+        first, rest = _split(node.right, index - left_size - node.count)
+        return _Run(node.value, node.count, node.left, first, node.priority), rest
+    offset = index - left_size
+    return (
+        _Run(node.value, offset, node.left, None, node.priority),
+        _Run(node.value, node.count - offset, None, node.right, node.priority),
+    )
+
+
+def _join(left: Optional[_Run], right: Optional[_Run]) -> Optional[_Run]:
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority >= right.priority:
+        return _Run(left.value, left.count, left.left, _join(left.right, right), left.priority)
+    return _Run(right.value, right.count, _join(left, right.left), right.right, right.priority)
+
+
+def _runs(node: Optional[_Run]) -> Iterator[Tuple[Any, int]]:
+    stack = []
+    while stack or node is not None:
+        while node is not None:
+            stack.append(node)
+            node = node.left
+        node = stack.pop()
+        yield node.value, node.count
+        node = node.right
+
+
+def _build(runs: Iterable[Tuple[Any, int]]) -> Optional[_Run]:
+    """Build a treap from runs in order in linear time (Cartesian tree construction)."""
+    spine = []  # right spine of the tree built so far; nodes are linked here, then sized once
+    for value, count in runs:
+        if count <= 0:
+            continue
+        node = _Run(value, count, None, None, _priorities.random())
+        last = None
+        while spine and spine[-1].priority < node.priority:
+            last = spine.pop()
+        node.left = last
+        if spine:
+            spine[-1].right = node
+        spine.append(node)
+    if not spine:
+        return None
+    _set_sizes(spine[0])
+    return spine[0]
+
+
+def _set_sizes(root: _Run) -> None:
+    """Size every node of a freshly linked tree, children before parents, without recursing."""
+    order = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        order.append(node)
+        if node.left is not None:
+            stack.append(node.left)
+        if node.right is not None:
+            stack.append(node.right)
+    for node in reversed(order):
+        node.size = node.count + (node.left.size if node.left else 0) + (node.right.size if node.right else 0)
+
+
+class Rope(Sequence[T], Generic[T]):
+    """
+    Immutable sequence stored as a treap of runs (value, count).
+
+    Inserting or deleting a run costs O(log n) and returns a new Rope that shares every
+    untouched node with the original, so successive versions of a sequence cost memory
+    proportional to their edits rather than to their length. Reads behave like a list.
+    """
+    __slots__ = ("_root",)
+
+    def __init__(self, items: Iterable[T] = (), _root: Optional[_Run] = None):
+        self._root = _root if _root is not None else _build(_coalesce(items))
+
+    @classmethod
+    def from_runs(cls, runs: Iterable[Tuple[T, int]]) -> Rope[T]:
+        return cls(_root=_build(runs))
+
+    def runs(self) -> Iterator[Tuple[T, int]]:
+        return _runs(self._root)
+
+    def insert(self, index: int, value: T, count: int = 1) -> Rope[T]:
+        """Insert ``count`` copies of ``value``; out of range indices are clamped like ``list.insert``."""
+        if count <= 0:
+            return self
+        size = len(self)
+        if index < 0:
+            index = max(0, index + size)
+        index = min(index, size)
+        left, right = _split(self._root, index)
+        run = _Run(value, count, None, None, _priorities.random())
+        return Rope(_root=_join(_join(left, run), right))
+
+    def delete(self, index: int, count: int = 1) -> Rope[T]:
+        """Remove ``count`` items starting at ``index``; negative indices count from the end."""
+        if count <= 0:
+            return self
+        size = len(self)
+        if index < 0:
+            index += size
+        if index < 0 or index + count > size:
+            raise IndexError("rope deletion out of range")
+        left, rest = _split(self._root, index)
+        _, right = _split(rest, count)
+        return Rope(_root=_join(left, right))
+
+    def splice(self, index: int, count: int, runs: Iterable[Tuple[T, int]] = ()) -> Rope[T]:
+        """Replace the ``count`` items at ``index`` by ``runs``, in O(log n + len(runs))."""
+        middle = _build(runs)
+        if count <= 0 and middle is None:
+            return self
+        if index < 0 or count < 0 or index + count > len(self):
+            raise IndexError("rope splice out of range")
+        left, rest = _split(self._root, index)
+        _, right = _split(rest, count)
+        return Rope(_root=_join(_join(left, middle), right))
+
+    def set(self, index: int, value: T) -> Rope[T]:
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("rope index out of range")
+        return self.delete(index).insert(index, value)
+
+    def __len__(self) -> int:
+        return self._root.size if self._root is not None else 0
+
+    @overload
+    def __getitem__(self, index: int) -> T: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> Rope[T]: ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return Rope(list(self)[index])
+            if stop <= start:
+                return Rope()
+            _, rest = _split(self._root, start)
+            middle, _ = _split(rest, stop - start)
+            return Rope(_root=middle)
+
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("rope index out of range")
+        node = self._root
+        while True:
+            left_size = node.left.size if node.left else 0
+            if index < left_size:
+                node = node.left
+            elif index < left_size + node.count:
+                return node.value
+            else:
+                index -= left_size + node.count
+                node = node.right
+
+    def __iter__(self) -> Iterator[T]:
+        for value, count in _runs(self._root):
+            for _ in range(count):
+                yield value
+
+    def __eq__(self, other: object) -> bool:
+        if self is other:
+            return True
+        if not isinstance(other, Sequence) or isinstance(other, (str, bytes)):
+            return NotImplemented
+        if len(self) != len(other):
+            return False
+        return all(a == b for a, b in zip(self, other))
+
+    def __hash__(self) -> int:
+        return hash(tuple(self))
+
+    def __bool__(self) -> bool:
+        return self._root is not None
+
+    def __reduce__(self):
+        return Rope.from_runs, (list(self.runs()),)
+
+    def __repr__(self) -> str:
+        return f"Rope({list(self)!r})"
+
+
+def export_nodes(ropes: Iterable[Rope[T]]) -> Tuple[List[Tuple[T, int, int, int, float]], List[int]]:
+    """
+    The distinct nodes of ``ropes`` as (value, count, left, right, priority), children before
+    parents and referenced by their index (-1 for none), and the index of each rope's root.
+    Nodes shared between ropes are listed once, so ``import_nodes`` restores the sharing.
+    """
+    index: Dict[int, int] = {}
+    nodes = []
+    roots = []
+    for rope in ropes:
+        root = rope._root
+        stack = [(root, False)] if root is not None else []
+        while stack:
+            node, children_done = stack.pop()
+            if id(node) in index:
+                continue
+            if children_done:
+                index[id(node)] = len(nodes)
+                nodes.append((node.value, node.count,
+                              index[id(node.left)] if node.left is not None else -1,
+                              index[id(node.right)] if node.right is not None else -1,
+                              node.priority))
+                continue
+            stack.append((node, True))
+            for child in (node.left, node.right):
+                if child is not None and id(child) not in index:
+                    stack.append((child, False))
+        roots.append(index[id(root)] if root is not None else -1)
+    return nodes, roots
+
+
+def import_nodes(nodes: Iterable[Tuple[T, int, int, int, float]], roots: Iterable[int],
+                 keep: Optional[Sequence[int]] = None) -> List[Rope[T]]:
+    """
+    The ropes exported by ``export_nodes``. With ``keep``, only the nodes whose flag is set
+    are built; every node reachable from a root must be kept.
+    """
+    built: List[Optional[_Run]] = []
+    for i, (value, count, left, right, priority) in enumerate(nodes):
+        if keep is not None and not keep[i]:
+            built.append(None)
+            continue
+        built.append(_Run(value, count, built[left] if left >= 0 else None, built[right] if right >= 0 else None,
+                          priority))
+    return [Rope(_root=built[root]) if root >= 0 else Rope() for root in roots]
+
+
+def _coalesce(items: Iterable[T]) -> Iterator[Tuple[T, int]]:
+    current, count = None, 0
+    for item in items:
+        if count and item is current:
+            count += 1
+            continue
+        if count:
+            yield current, count
+        current, count = item, 1
+    if count:
+        yield current, count
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+from typing import Optional, List, Iterable
+
+from src.common.models import (
+    GitAccountMixin, LineChangeMixin, HunkMixin, FileMixin, GitCommitMixin, ChangeMixin,
+    GitAccountId, GitProject, Developer, LineOperation, LineRun, ChangeType, Issue, PullRequest,
+)
+from src.common.ordered_set import OrderedSet
+from src.common.rope import Rope
+
+
+class GitAccount(GitAccountMixin):
+    """Slotted counterpart of models.GitAccount."""
+    __slots__ = ("git_id", "name", "project", "developer", "commits", "_commits", "_views")
+
+    def __init__(
+        self,
+        git_id: GitAccountId,
+        name: Optional[str] = None,
+        project: Optional[GitProject] = None,
+        developer: Optional[Developer] = None,
+        commits: Optional[List[GitCommit]] = None,
+    ):
+        self.git_id = git_id
+        self.name = name if name is not None else git_id.name
+        self.project = project
+        self.developer = developer
+        self.commits = commits if commits is not None else []
+        self._views = {}
+
+
+class LineChange(LineChangeMixin):
+    """Slotted counterpart of models.LineChange."""
+    __slots__ = ("operation", "line_number", "commit")
+
+    def __init__(self, operation: LineOperation, line_number: int, commit: GitCommit):
+        self.operation = operation
+        self.line_number = line_number
+        self.commit = commit
+
+
+class Hunk(HunkMixin):
+    """Slotted counterpart of models.Hunk."""
+    __slots__ = ("runs",)
+
+    line_change_class = LineChange
+
+    def __init__(self, runs: List[LineRun]):
+        self.runs = runs
+
+
+class File(FileMixin):
+    """Slotted counterpart of models.File."""
+    __slots__ = ("is_binary", "project", "changes", "id", "_changes", "_timeline")
+
+    def __init__(
+        self,
+        is_binary: bool,
+        project: Optional[GitProject] = None,
+        changes: Optional[List[Change]] = None,
+        id: Optional[uuid.UUID] = None,
+    ):
+        self.is_binary = is_binary
+        self.project = project
+        self.changes = changes if changes is not None else []
+        self.id = id if id is not None else uuid.uuid4()
+        self._timeline = None
+
+
+class GitCommit(GitCommitMixin):
+    """Slotted counterpart of models.GitCommit."""
+    __slots__ = (
+        "project", "id", "message", "author_date", "committer_date", "author", "committer",
+        "parents", "children", "changes", "branch_id", "repo_size", "issues", "pull_requests",
+        "_author", "_committer", "_parents", "_children", "_changes",
+    )
+
+    def __init__(
+        self,
+        id: str,
+        message: str,
+        author_date: datetime,
+        committer_date: datetime,
+        project: Optional[GitProject] = None,
+        author: Optional[GitAccount] = None,
+        committer: Optional[GitAccount] = None,
+        parents: Optional[List[GitCommit]] = None,
+        children: Optional[List[GitCommit]] = None,
+        changes: Optional[List[Change]] = None,
+        branch_id: int = 0,
+        repo_size: int = 0,
+        issues: Optional[List[Issue]] = None,
+        pull_requests: Optional[List[PullRequest]] = None,
+    ):
+        self.project = project
+        self.id = id
+        self.message = message
+        self.author_date = author_date
+        self.committer_date = committer_date
+        self.author = author
+        self.committer = committer
+        self.parents = list(parents) if parents is not None else []
+        self.children = list(children) if children is not None else []
+        self.changes = list(changes) if changes is not None else []
+        self.branch_id = branch_id
+        self.repo_size = repo_size
+        self.issues = OrderedSet(issues) if issues is not None else OrderedSet()
+        self.pull_requests = OrderedSet(pull_requests) if pull_requests is not None else OrderedSet()
+
+
+class Change(ChangeMixin):
+    """Slotted counterpart of models.Change."""
+    __slots__ = (
+        "id", "commit", "change_type", "old_file_name", "new_file_name", "file", "parent_commit",
+        "hunks", "annotated_lines", "parent_change", "compute_annotated_lines",
+        "_commit", "_file", "_parent_commit", "_annotated_lines", "_parent_change", "_views",
+    )
+
+    def __init__(
+        self,
+        change_type: ChangeType,
+        old_file_name: str,
+        new_file_name: str,
+        id: Optional[str] = None,
+        commit: Optional[GitCommit] = None,
+        file: Optional[File] = None,
+        parent_commit: Optional[GitCommit] = None,
+        hunks: Optional[List[Hunk]] = None,
+        annotated_lines: Iterable[GitCommit] = (),
+        parent_change: Optional[Change] = None,
+        compute_annotated_lines: bool = False,
+    ):
+        if id is None and commit and old_file_name and new_file_name:
+            id = f"{commit.id}-{old_file_name}->{new_file_name}"
+        self.id = id
+        self.commit = commit
+        self.change_type = change_type
+        self.old_file_name = old_file_name
+        self.new_file_name = new_file_name
+        self.file = file
+        self.parent_commit = parent_commit
+        self.hunks = list(hunks) if hunks is not None else []
+        self.annotated_lines = annotated_lines if isinstance(annotated_lines, Rope) else Rope(annotated_lines)
+        self.parent_change = parent_change
+        self.compute_annotated_lines = compute_annotated_lines
+        self._views = {}
+
+        # Mirror the pydantic model, whose validation re-runs the parent change's validator
+        # before its own, so both backends produce the same annotated lines.
+        if (parent_change is not None and parent_change.compute_annotated_lines
+                and parent_change.file is not None and not parent_change.file.is_binary):
+            parent_change._apply_line_changes(parent_change.parent_change)
+        if compute_annotated_lines and not file.is_binary:
+            self._apply_line_changes(parent_change)
@@ -32,10 +32,8 @@ class GitHubProjectTransformer:
                 )
                 assignee_user = project.git_hub_user_registry.add(assignee_user)
 
-                if assignee_user not in pull_request.assignees:
-                    pull_request.assignees.append(assignee_user)
-                if pull_request not in assignee_user.pull_requests_as_assignee:
-                    assignee_user.pull_requests_as_assignee.append(pull_request)
+                pull_request.assignees.add(assignee_user)
+                assignee_user.pull_requests_as_assignee.add(pull_request)
 
             if pr.createdBy:
                 creator_user = GitHubUser(
@@ -46,8 +44,7 @@ class GitHubProjectTransformer:
                 creator_user = project.git_hub_user_registry.add(creator_user)
 
                 pull_request.createdBy = creator_user
-                if pull_request not in creator_user.pull_requests_as_creator:
-                    creator_user.pull_requests_as_creator.append(pull_request)
+                creator_user.pull_requests_as_creator.add(pull_request)
 
             if pr.mergedBy:
                 merger_user = GitHubUser(
@@ -58,8 +55,7 @@ class GitHubProjectTransformer:
                 merger_user = project.git_hub_user_registry.add(merger_user)
 
                 pull_request.mergedBy = merger_user
-                if pull_request not in merger_user.pull_requests_as_merged_by:
-                    merger_user.pull_requests_as_merged_by.append(pull_request)
+                merger_user.pull_requests_as_merged_by.add(pull_request)
 
             for c in pr.commits:
                 commit = GitHubCommit(
@@ -70,9 +66,7 @@ class GitHubProjectTransformer:
                 )
                 commit = project.git_hub_commit_registry.add(commit)
 
-                if commit not in pull_request.git_hub_commits:
-                    pull_request.git_hub_commits.append(commit)
-                if pull_request not in commit.pull_requests:
-                    commit.pull_requests.append(pull_request)
+                pull_request.git_hub_commits.add(commit)
+                commit.pull_requests.add(pull_request)
 
         return project
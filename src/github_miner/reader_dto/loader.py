@@ -1,8 +1,12 @@
 from src.common.loader import BaseJsonLoader
 from src.github_miner import JsonFileFormatGithub
+from src.github_miner.reader_dto.models import PullRequest
 
 
 class GithubJsonLoader(BaseJsonLoader):
     def load(self) -> JsonFileFormatGithub:
-        data = self._read_json()
-        return JsonFileFormatGithub.model_validate(data)
+        return self._load_json(JsonFileFormatGithub)
+
+    def stream(self) -> JsonFileFormatGithub:
+        """Like ``load``, but ``pullRequests`` is read and validated one pull request at a time on each iteration."""
+        return self._stream_json(JsonFileFormatGithub, {"pullRequests": PullRequest})
\ No newline at end of file
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+from array import array
+from typing import Dict, Iterator, List, Optional, Sequence, TYPE_CHECKING, overload
+
+if TYPE_CHECKING:
+    from src.common.models import GitCommit
+
+
+class CommitGraph:
+    """
+    The commit DAG of a project as integer arrays.
+
+    Every commit gets an ordinal in registration order. Parent edges are stored in CSR
+    form: the parents of commit ``i`` are ``parent_indices[parent_offsets[i]:parent_offsets[i + 1]]``.
+    Since parents are registered before their children, this only ever grows at the end.
+    The child edges are the transposed CSR, built on first use. Children registered after
+    that are kept in a small overflow map until the next rebuild.
+
+    The arrays are ``array('q')`` and support the buffer protocol, so DAG-wide algorithms
+    can walk them directly or wrap them with ``numpy.frombuffer``.
+    """
+
+    def __init__(self) -> None:
+        self._commits: List["GitCommit"] = []
+        self._ordinals: Dict[str, int] = {}
+        self.parent_offsets = array("q", [0])
+        self.parent_indices = array("q")
+        self._child_offsets: Optional[array] = None
+        self._child_indices: Optional[array] = None
+        self._late_children: Dict[int, List[int]] = {}
+        self._late_count = 0
+
+    def add(self, commit: "GitCommit", parents: Sequence["GitCommit"]) -> int:
+        """Register ``commit`` with edges to its already registered ``parents``; returns its ordinal."""
+        ordinal = len(self._commits)
+        parent_ordinals = [self._ordinals[parent.id] for parent in parents]
+        self._commits.append(commit)
+        self._ordinals[commit.id] = ordinal
+        self.parent_indices.extend(parent_ordinals)
+        self.parent_offsets.append(len(self.parent_indices))
+
+        if self._child_offsets is not None:
+            for parent in parent_ordinals:
+                self._late_children.setdefault(parent, []).append(ordinal)
+            self._late_count += len(parent_ordinals)
+            if self._late_count > max(1024, len(self._child_indices) // 4):
+                self._child_offsets = self._child_indices = None
+        return ordinal
+
+    def ordinal(self, commit_id: str) -> Optional[int]:
+        return self._ordinals.get(commit_id)
+
+    def commit(self, ordinal: int) -> "GitCommit":
+        return self._commits[ordinal]
+
+    def parent_ordinals(self, ordinal: int) -> array:
+        return self.parent_indices[self.parent_offsets[ordinal]:self.parent_offsets[ordinal + 1]]
+
+    def child_ordinals(self, ordinal: int) -> array:
+        offsets, indices = self.child_offsets, self.child_indices
+        children = indices[offsets[ordinal]:offsets[ordinal + 1]] if ordinal + 1 < len(offsets) else array("q")
+        late = self._late_children.get(ordinal)
+        if late:
+            children.extend(late)
+        return children
+
+    @property
+    def child_offsets(self) -> array:
+        if self._child_offsets is None:
+            self._build_children()
+        return self._child_offsets
+
+    @property
+    def child_indices(self) -> array:
+        if self._child_indices is None:
+            self._build_children()
+        return self._child_indices
+
+    def parents_of(self, ordinal: int) -> CommitSequence:
+        return CommitSequence(self, ordinal, children=False)
+
+    def children_of(self, ordinal: int) -> CommitSequence:
+        return CommitSequence(self, ordinal, children=True)
+
+    def _build_children(self) -> None:
+        """Transpose the parent CSR with a counting sort, so children stay in ordinal order."""
+        count = len(self._commits)
+        offsets = array("q", bytes(8 * (count + 1)))
+        for parent in self.parent_indices:
+            offsets[parent + 1] += 1
+        for i in range(count):
+            offsets[i + 1] += offsets[i]
+        indices = array("q", bytes(8 * len(self.parent_indices)))
+        cursor = offsets[:-1]
+        for child in range(count):
+            for k in range(self.parent_offsets[child], self.parent_offsets[child + 1]):
+                parent = self.parent_indices[k]
+                indices[cursor[parent]] = child
+                cursor[parent] += 1
+        self._child_offsets, self._child_indices = offsets, indices
+        self._late_children = {}
+        self._late_count = 0
+
+    def __len__(self) -> int:
+        return len(self._commits)
+
+
+class CommitSequence(Sequence["GitCommit"]):
+    """Read-only list of the parents or children of one commit, resolved from a CommitGraph."""
+    __slots__ = ("_graph", "_ordinal", "_children")
+
+    def __init__(self, graph: CommitGraph, ordinal: int, children: bool):
+        self._graph = graph
+        self._ordinal = ordinal
+        self._children = children
+
+    @property
+    def ordinals(self) -> array:
+        if self._children:
+            return self._graph.child_ordinals(self._ordinal)
+        return self._graph.parent_ordinals(self._ordinal)
+
+    @overload
+    def __getitem__(self, index: int) -> "GitCommit": ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List["GitCommit"]: ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._graph.commit(o) for o in self.ordinals[index]]
+        return self._graph.commit(self.ordinals[index])
+
+    def __len__(self) -> int:
+        return len(self.ordinals)
+
+    def __iter__(self) -> Iterator["GitCommit"]:
+        return (self._graph.commit(o) for o in self.ordinals)
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Sequence) or isinstance(other, (str, bytes)):
+            return NotImplemented
+        return list(self) == list(other)
+
+    def __repr__(self) -> str:
+        return repr([commit.id for commit in self])
@@ -1,4 +1,21 @@
+from typing import List
+
+
 class NoChangeException(Exception):
     def __init__(self, file_name: str) -> None:
         self.file_name = file_name
         super().__init__(f"File {file_name} does not exist!")
+
+
+class AmbiguousCommitPrefixException(Exception):
+    def __init__(self, prefix: str, commit_ids: List[str]) -> None:
+        self.prefix = prefix
+        self.commit_ids = commit_ids
+        super().__init__(f"Commit prefix {prefix} is ambiguous: {', '.join(commit_ids)}")
+
+
+class SnapshotFormatException(Exception):
+    def __init__(self, path: str, reason: str) -> None:
+        self.path = path
+        self.reason = reason
+        super().__init__(f"{path} is not a readable graph snapshot: {reason}")
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from typing import Dict, Optional, TYPE_CHECKING
+
+from src.common.persistent_map import PersistentMap, EMPTY_MAP
+
+if TYPE_CHECKING:
+    from src.common.models import GitCommit, Change
+
+
+class LastChangeIndex:
+    """
+    For every commit, a persistent map from file path to the latest Change of that path
+    reachable from the commit. A commit's map is derived from its parents' maps, so the
+    maps of a whole history share almost all of their structure.
+
+    Lookups follow the same precedence as a depth-first walk over the ancestors: the
+    commit's own changes first, then everything reachable from the first parent, then the
+    second parent, and so on.
+    """
+
+    def __init__(self) -> None:
+        self._by_commit: Dict[str, PersistentMap[str, "Change"]] = {}
+
+    def record(self, commit: "GitCommit") -> PersistentMap[str, "Change"]:
+        index = EMPTY_MAP
+        for parent in commit.parents:
+            index = index.merge(self._get_or_build(parent))
+
+        own: Dict[str, "Change"] = {}
+        for change in commit.changes:
+            own.setdefault(change.new_file_name, change)
+        for file_name, change in own.items():
+            index = index.set(file_name, change)
+
+        self._by_commit[commit.id] = index
+        return index
+
+    def get(self, commit: "GitCommit", file_name: str) -> Optional["Change"]:
+        return self._get_or_build(commit).get(file_name)
+
+    def discard(self, commit: "GitCommit") -> None:
+        self._by_commit.pop(commit.id, None)
+
+    def _get_or_build(self, commit: "GitCommit") -> PersistentMap[str, "Change"]:
+        index = self._by_commit.get(commit.id)
+        if index is not None:
+            return index
+
+        # Index any ancestors that were never recorded (e.g. a project restored from a
+        # pickle), parents before children, without recursing over the history.
+        stack = [(commit, False)]
+        while stack:
+            current, parents_done = stack.pop()
+            if current.id in self._by_commit:
+                continue
+            if parents_done:
+                self.record(current)
+                continue
+            stack.append((current, True))
+            stack.extend((p, False) for p in current.parents if p.id not in self._by_commit)
+        return self._by_commit[commit.id]
+
+    def __len__(self) -> int:
+        return len(self._by_commit)
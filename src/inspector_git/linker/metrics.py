@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+from array import array
+from typing import Dict, List, Optional, TYPE_CHECKING
+
+from src.inspector_git.linker.commit_graph import CommitGraph
+
+if TYPE_CHECKING:
+    from src.common.models import GitProject, GitCommit
+
+
+class CommitMetrics:
+    """
+    Per-commit metrics of a project, as arrays indexed by commit graph ordinal.
+
+    All metrics are measured against the first parent, like ``git diff <first parent>``,
+    and filled in one sweep over the commits in topological order:
+
+    - ``loc``: lines in the repository (also stored as ``GitCommit.repo_size``)
+    - ``file_count``: files alive in the repository
+    - ``added_lines`` / ``deleted_lines``: lines added and deleted by the commit
+    - ``touched_files``: files the commit changed
+    - ``branch_ids``: a new id starts at every root and after every split commit, and a merge
+      stays on its first parent's branch (also stored as ``GitCommit.branch_id``)
+    """
+
+    COLUMNS = ("loc", "file_count", "added_lines", "deleted_lines", "touched_files", "branch_ids")
+
+    def __init__(self) -> None:
+        self.graph: Optional[CommitGraph] = None
+        self._commit_ids: Optional[List[str]] = None
+        self.loc = array("q")
+        self.file_count = array("q")
+        self.added_lines = array("q")
+        self.deleted_lines = array("q")
+        self.touched_files = array("q")
+        self.branch_ids = array("q")
+
+    def compute(self, project: "GitProject") -> None:
+        """Fill the metrics of every commit."""
+        self.graph = project.git_commit_registry.graph
+        for name in self.COLUMNS:
+            setattr(self, name, array("q"))
+        self._sweep(0)
+        self._label_branches()
+
+    def update(self, project: "GitProject") -> None:
+        """
+        Fill the metrics of the commits added since the last computation. Only branch ids
+        are relabelled for the whole graph, since a new commit can make its parent a split.
+        """
+        graph = project.git_commit_registry.graph
+        if graph is not self.graph or len(self.loc) > len(graph):
+            self.compute(project)
+            return
+        self._sweep(len(self.loc))
+        self._label_branches()
+
+    def _sweep(self, start: int) -> None:
+        from src.common.models import ChangeType
+
+        graph = self.graph
+        count = len(graph)
+        padding = array("q", bytes(8 * (count - start)))
+        for name in self.COLUMNS:
+            getattr(self, name).extend(padding)
+        loc, file_count = self.loc, self.file_count
+        added_lines, deleted_lines, touched_files = self.added_lines, self.deleted_lines, self.touched_files
+
+        for ordinal in range(start, count):
+            commit = graph.commit(ordinal)
+            parents = graph.parent_ordinals(ordinal)
+            first_parent = parents[0] if parents else -1
+            first_parent_commit = graph.commit(first_parent) if first_parent >= 0 else None
+
+            added = deleted = touched = file_delta = 0
+            for change in commit.changes:
+                if first_parent_commit is not None and change.parent_commit is not first_parent_commit:
+                    continue
+                added += change.added_line_count
+                deleted += change.deleted_line_count
+                touched += 1
+                if change.change_type is ChangeType.ADD:
+                    file_delta += 1
+                elif change.change_type is ChangeType.DELETE:
+                    file_delta -= 1
+
+            added_lines[ordinal], deleted_lines[ordinal], touched_files[ordinal] = added, deleted, touched
+            if first_parent >= 0:
+                loc[ordinal] = loc[first_parent] + added - deleted
+                file_count[ordinal] = file_count[first_parent] + file_delta
+            else:
+                loc[ordinal] = added - deleted
+                file_count[ordinal] = file_delta
+            commit.repo_size = loc[ordinal]
+
+    def _label_branches(self) -> None:
+        graph = self.graph
+        branch_ids = self.branch_ids
+        last_branch_id = 0
+        for ordinal in range(len(graph)):
+            parents = graph.parent_ordinals(ordinal)
+            if len(parents) > 1:
+                branch_id = branch_ids[parents[0]]
+            elif not parents or len(graph.child_ordinals(parents[0])) > 1:
+                last_branch_id += 1
+                branch_id = last_branch_id
+            else:
+                branch_id = branch_ids[parents[0]]
+            branch_ids[ordinal] = branch_id
+            commit = graph.commit(ordinal)
+            if commit.branch_id != branch_id:
+                commit.branch_id = branch_id
+
+    def attach(self, graph: CommitGraph) -> bool:
+        """Re-index unpickled metrics by the ordinals of ``graph``; False if it holds other commits."""
+        ids = self._commit_ids
+        if ids is None or len(ids) != len(graph):
+            return False
+        order = [graph.ordinal(commit_id) for commit_id in ids]
+        if None in order:
+            return False
+        if order != list(range(len(order))):
+            for name in self.COLUMNS:
+                values = getattr(self, name)
+                remapped = array("q", bytes(8 * len(values)))
+                for old, new in enumerate(order):
+                    remapped[new] = values[old]
+                setattr(self, name, remapped)
+        self.graph = graph
+        self._commit_ids = None
+        return True
+
+    def commit_ids(self) -> Optional[List[str]]:
+        """The ids of the commits in column order, to ``attach`` saved metrics to a rebuilt graph."""
+        if self.graph is None:
+            return self._commit_ids
+        return [self.graph.commit(o).id for o in range(len(self.loc))]
+
+    @classmethod
+    def from_columns(cls, commit_ids: List[str], columns: Dict[str, array]) -> "CommitMetrics":
+        """Saved metrics, to be re-indexed with ``attach``."""
+        metrics = cls()
+        metrics._commit_ids = commit_ids
+        for name, values in columns.items():
+            setattr(metrics, name, values)
+        return metrics
+
+    def __getstate__(self):
+        # The graph is rebuilt with the project, so only the commit order is kept.
+        return self.commit_ids(), {name: getattr(self, name) for name in self.COLUMNS}
+
+    def __setstate__(self, state) -> None:
+        ids, columns = state
+        self.__dict__.update(self.from_columns(ids, columns).__dict__)
+
+    def of(self, commit: "GitCommit") -> Dict[str, int]:
+        """All metrics of one commit."""
+        ordinal = self.graph.ordinal(commit.id) if self.graph is not None else None
+        if ordinal is None or ordinal >= len(self.loc):
+            raise KeyError(f"No metrics for commit {commit.id}")
+        return {
+            "loc": self.loc[ordinal],
+            "file_count": self.file_count[ordinal],
+            "added_lines": self.added_lines[ordinal],
+            "deleted_lines": self.deleted_lines[ordinal],
+            "touched_files": self.touched_files[ordinal],
+            "branch_id": self.branch_ids[ordinal],
+        }
@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src.common.models import GitProject, GitCommit, Change, ChangeType, File, LineOperation
+from src.common.rope import Rope, export_nodes, import_nodes
+from src.logger import get_logger
+
+LOG = get_logger(__name__)
+
+_CHANGE = 0
+_FIX = 1
+
+
+class AnnotatedLinesTransformer:
+    """
+    Second phase of a two-phase project build: computes annotated lines for a project whose
+    commits and change chains already exist.
+
+    Once every change is linked to its file and parent change, the histories of different
+    files are independent. Files are sharded across a process pool. Each worker replays its
+    files' histories on ropes of commit ordinals with the same run edits as a serial build,
+    including the lines merges re-attribute, so a version costs O(changed runs). It sends
+    back the final ropes as ``export_nodes`` flattens them, nodes shared between versions
+    once, and the parent rebuilds them over the commits, so the ropes share nodes as in a
+    serial build and the parent replays no hunks.
+    """
+
+    def __init__(self, workers: Optional[int] = None, shard_count: Optional[int] = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.shard_count = shard_count or self.workers * 4
+
+    def transform(self, project: GitProject) -> None:
+        commits = list(project.git_commit_registry.all)
+        ordinals = {commit.id: ordinal for ordinal, commit in enumerate(commits)}
+        # Changes of a merge commit against each parent share their id, so changes are keyed
+        # by creation order instead.
+        changes = [change for commit in commits for change in commit.changes]
+        keys = {id(change): key for key, change in enumerate(changes)}
+        merge_fixes = self._get_merge_fixes(project)
+
+        histories = [
+            (file, self._get_events(file, changes, keys, ordinals, merge_fixes))
+            for file in project.file_registry.all
+            if not file.is_binary and file.changes
+        ]
+        shards = self._shard([events for _, events in histories])
+
+        LOG.info("Annotating %s files in %s shards on %s workers", len(histories), len(shards), self.workers)
+        if self.workers > 1 and len(shards) > 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                shard_results = list(pool.map(annotate_histories, shards))
+        else:
+            shard_results = [annotate_histories(shard) for shard in shards]
+
+        for change in changes:
+            change.compute_annotated_lines = True
+        results = [result for shard_result in shard_results for result in shard_result]
+        order = [index for shard in self._shard_indexes(len(histories)) for index in shard]
+        for index, result in zip(order, results):
+            file, events = histories[index]
+            self._apply(file, events, result, changes, commits)
+
+    def _shard(self, histories: List[list]) -> List[List[list]]:
+        return [[histories[i] for i in shard] for shard in self._shard_indexes(len(histories))]
+
+    def _shard_indexes(self, count: int) -> List[List[int]]:
+        shard_count = max(1, min(self.shard_count, count))
+        return [list(range(i, count, shard_count)) for i in range(shard_count)] if count else []
+
+    @staticmethod
+    def _get_merge_fixes(project: GitProject) -> Dict[int, Tuple[List[Change], Optional[Change], GitCommit]]:
+        """Re-derive the change groups MergeChangesTransformer fixed, keyed by the group's last change."""
+        from src.inspector_git.linker.transformers import MergeChangesTransformer
+
+        fixes = {}
+        for commit in project.git_commit_registry.all:
+            if not commit.is_merge_commit or not commit.changes:
+                continue
+            groups: Dict[str, List[Change]] = {}
+            for change in commit.changes:
+                key = change.old_file_name if change.change_type == ChangeType.DELETE else change.new_file_name
+                groups.setdefault(key, []).append(change)
+            for group in groups.values():
+                missing_change = None
+                if len(group) < len(commit.parents) and not all(c.change_type == ChangeType.DELETE for c in group):
+                    missing_change = MergeChangesTransformer._get_missing_change(group, commit)
+                fixes[id(group[-1])] = (group, missing_change, commit)
+        return fixes
+
+    @staticmethod
+    def _get_events(file: File, changes: List[Change], keys: Dict[int, int], ordinals: Dict[str, int], merge_fixes) -> list:
+        events = []
+        for change in sorted(file.changes, key=lambda c: keys[id(c)]):
+            parent_key = keys[id(change.parent_change)] if change.parent_change is not None else -1
+            runs = [run for hunk in change.hunks for run in hunk.runs]
+            deletes = tuple((run.start, run.count) for run in sorted(
+                (run for run in runs if run.operation is LineOperation.DELETE), key=lambda run: run.start, reverse=True))
+            adds = tuple((run.start, run.count) for run in runs if run.operation is LineOperation.ADD)
+            events.append((_CHANGE, keys[id(change)], parent_key, ordinals[change.commit.id], deletes, adds))
+
+            fix = merge_fixes.get(id(change))
+            if fix is not None:
+                group, missing_change, commit = fix
+                missing_key = keys[id(missing_change)] if missing_change is not None else -1
+                events.append((_FIX, tuple(keys[id(c)] for c in group), missing_key, ordinals[commit.id]))
+        return events
+
+    @staticmethod
+    def _apply(file: File, events: list, result, changes: List[Change], commits: List[GitCommit]) -> None:
+        """Set the annotated lines a worker computed for a file's changes, as a serial build leaves them."""
+        binary_position, keys, nodes, roots = result
+        ropes = import_nodes(((commits[ordinal], *node) for ordinal, *node in nodes), roots)
+        for key, rope in zip(keys, ropes):
+            changes[key].annotated_lines = rope
+        if binary_position < 0:
+            return
+
+        file.is_binary = True
+        for event in events[binary_position + 1:]:
+            if event[0] == _CHANGE:
+                change = changes[event[1]]
+                if change.parent_change is not None:
+                    # A serial build stops reading hunks once the file turned binary.
+                    change.hunks = []
+                    change.invalidate_views()
+
+
+def annotate_histories(histories: Sequence[list]) -> List[Tuple[int, List[int], list, List[int]]]:
+    """
+    Worker entry point: replay file histories on ropes of commit ordinals. For each, returns the
+    position of the event that found the file binary (-1 if none), the change keys in order and
+    their final annotated lines as ``export_nodes`` gives them, so shared runs are sent once.
+    """
+    return [_annotate_history(events) for events in histories]
+
+
+def _edit(lines: Rope[int], ordinal: int, deletes: Tuple[Tuple[int, int], ...],
+          adds: Tuple[Tuple[int, int], ...]) -> Rope[int]:
+    """``ChangeMixin._apply_line_changes`` on (start, count) runs, deletes sorted from the bottom up."""
+    for start, line_count in deletes:
+        lines = lines.delete(start - 1, line_count)
+    for start, line_count in adds:
+        lines = lines.insert(start - 1, ordinal, line_count)
+    return lines
+
+
+def _fix(first_lines: Rope[int], others: List[Rope[int]], commit_ordinal: int) -> Rope[int]:
+    """Give the lines the merge commit owns in ``first_lines`` the first other owner found at that index."""
+    fixed = first_lines
+    offset = 0
+    for value, run_count in first_lines.runs():
+        if value == commit_ordinal:
+            replacements = [
+                next((af[i] for af in others if i < len(af) and af[i] != commit_ordinal), commit_ordinal)
+                for i in range(offset, offset + run_count)
+            ]
+            if any(replacement != commit_ordinal for replacement in replacements):
+                runs = ((replacement, len(list(group))) for replacement, group in groupby(replacements))
+                fixed = fixed.splice(offset, run_count, runs)
+        offset += run_count
+    return fixed
+
+
+def _annotate_history(events: list) -> Tuple[int, List[int], list, List[int]]:
+    lines: Dict[int, Rope[int]] = {}
+    edits: Dict[int, Tuple[int, Tuple[Tuple[int, int], ...], Tuple[Tuple[int, int], ...]]] = {}
+    parents: Dict[int, int] = {}
+    binary_position = -1
+
+    for position, event in enumerate(events):
+        if event[0] == _CHANGE:
+            _, key, parent_key, ordinal, deletes, adds = event
+            parents[key] = parent_key
+            current: Rope[int] = Rope()
+            # The parent is re-derived from the grandparent first, dropping any merge fix.
+            if binary_position < 0 and parent_key in edits:
+                try:
+                    lines[parent_key] = _edit(lines.get(parents[parent_key], Rope()), *edits[parent_key])
+                except IndexError:
+                    binary_position = position
+            if binary_position < 0:
+                try:
+                    current = _edit(lines.get(parent_key, Rope()), ordinal, deletes, adds)
+                except IndexError:
+                    binary_position = position
+            lines[key] = current
+            edits[key] = (ordinal, deletes, adds)
+            continue
+
+        _, group_keys, missing_key, commit_ordinal = event
+        if missing_key >= 0:
+            lines[group_keys[0]] = lines.get(missing_key, Rope())
+        first_lines = lines.get(group_keys[0], Rope())
+        if first_lines:
+            fixed = _fix(first_lines, [lines.get(key, Rope()) for key in group_keys[1:]], commit_ordinal)
+            for key in group_keys:
+                lines[key] = fixed
+
+    keys = sorted(lines)
+    nodes, roots = export_nodes(lines[key] for key in keys)
+    return binary_position, keys, nodes, roots
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+from array import array
+from typing import Callable, List, Optional, Set, TYPE_CHECKING
+
+from src.inspector_git.linker.commit_graph import CommitGraph
+
+if TYPE_CHECKING:
+    from src.common.models import GitCommit
+
+
+class ReachabilityIndex:
+    """
+    Answers "is A an ancestor of B" over a CommitGraph without walking every path.
+
+    Every commit gets a generation number (1 for roots, else 1 + the largest generation of
+    its parents) and a pre-order interval in the spanning forest formed by first-parent
+    edges. A commit whose generation is not lower than B's cannot be its ancestor. A commit
+    whose interval contains B's is its first-parent ancestor. Anything else falls back to
+    a search up B's parents that skips commits too old to lead to A and stops at the first
+    commit inside A's interval.
+
+    The labels are computed in O(commits + edges) without recursion, and recomputed on the
+    next query after the graph grows. ``pre``/``post`` are the interval bounds per ordinal,
+    for other queries over first-parent lineage.
+    """
+
+    def __init__(self, graph: CommitGraph):
+        self.graph = graph
+        self._size = -1
+        self.generations = array("q")
+        self.pre = array("q")
+        self.post = array("q")
+
+    def is_ancestor(self, ancestor: "GitCommit", descendant: "GitCommit") -> bool:
+        """True if ``ancestor`` is reachable from ``descendant`` through parent edges (and is not it)."""
+        return self.is_ancestor_ordinal(self._ordinal(ancestor), self._ordinal(descendant))
+
+    def commits_between(self, since: Optional["GitCommit"], until: "GitCommit") -> List["GitCommit"]:
+        """Commits reachable from ``until`` but not from ``since``, like ``git log since..until``, newest first."""
+        since_ordinal = self._ordinal(since) if since is not None else None
+        return [self.graph.commit(o) for o in self.commits_between_ordinals(since_ordinal, self._ordinal(until))]
+
+    def is_ancestor_ordinal(self, ancestor: int, descendant: int) -> bool:
+        self.refresh()
+        generations, pre, post = self.generations, self.pre, self.post
+        if ancestor == descendant or generations[ancestor] >= generations[descendant]:
+            return False
+        low, high = pre[ancestor], post[ancestor]
+        if low <= pre[descendant] <= high:
+            return True
+
+        floor = generations[ancestor]
+        seen = {descendant}
+        stack = [descendant]
+        while stack:
+            for parent in self.graph.parent_ordinals(stack.pop()):
+                if parent == ancestor or low <= pre[parent] <= high:
+                    return True
+                if parent not in seen and generations[parent] > floor:
+                    seen.add(parent)
+                    stack.append(parent)
+        return False
+
+    def commits_between_ordinals(self, since: Optional[int], until: int) -> List[int]:
+        self.refresh()
+        if since is None:
+            return sorted(self._ancestry(until, lambda commit: False), reverse=True)
+
+        # First-parent ancestors of ``since``, and everything behind them, are excluded by their
+        # interval alone. The candidates left can still hold ancestors of ``since`` reached through
+        # merges: those are found by one search up from ``since`` that goes no lower than the
+        # oldest candidate's generation.
+        generations, pre, post = self.generations, self.pre, self.post
+        since_pre = pre[since]
+        candidates = self._ancestry(until, lambda commit: pre[commit] <= since_pre <= post[commit])
+        if not candidates:
+            return []
+        floor = min(generations[commit] for commit in candidates)
+        ancestors = self._ancestry(since, lambda commit: generations[commit] < floor)
+        return sorted(candidates - ancestors, reverse=True)
+
+    def _ancestry(self, start: int, pruned: Callable[[int], bool]) -> Set[int]:
+        """``start`` and its ancestors, without entering the commits ``pruned`` is true for."""
+        if pruned(start):
+            return set()
+        found = {start}
+        stack = [start]
+        while stack:
+            for parent in self.graph.parent_ordinals(stack.pop()):
+                if parent not in found and not pruned(parent):
+                    found.add(parent)
+                    stack.append(parent)
+        return found
+
+    def _ordinal(self, commit: "GitCommit") -> int:
+        ordinal = self.graph.ordinal(commit.id)
+        if ordinal is None:
+            raise KeyError(f"Commit {commit.id} is not part of the commit graph")
+        return ordinal
+
+    def refresh(self) -> None:
+        """Relabel if commits were added since the last labelling."""
+        if self._size != len(self.graph):
+            self._build()
+
+    def _build(self) -> None:
+        graph = self.graph
+        count = len(graph)
+        offsets, indices = graph.parent_offsets, graph.parent_indices
+
+        # Ordinals are topological, so one forward pass settles every generation.
+        generations = array("q", bytes(8 * count))
+        for commit in range(count):
+            generation = 0
+            for k in range(offsets[commit], offsets[commit + 1]):
+                generation = max(generation, generations[indices[k]])
+            generations[commit] = generation + 1
+
+        first_parents = array("q", (indices[offsets[c]] if offsets[c] < offsets[c + 1] else -1 for c in range(count)))
+
+        # Subtree sizes of the first-parent forest, children before parents.
+        sizes = array("q", [1]) * count
+        for commit in range(count - 1, -1, -1):
+            if first_parents[commit] >= 0:
+                sizes[first_parents[commit]] += sizes[commit]
+
+        # Pre-order numbers, parents before children: each subtree gets a contiguous block.
+        pre = array("q", bytes(8 * count))
+        next_slot = array("q", bytes(8 * count))
+        next_root = 0
+        for commit in range(count):
+            parent = first_parents[commit]
+            if parent < 0:
+                pre[commit] = next_root
+                next_root += sizes[commit]
+            else:
+                pre[commit] = next_slot[parent]
+                next_slot[parent] += sizes[commit]
+            next_slot[commit] = pre[commit] + 1
+
+        self.generations = generations
+        self.pre = pre
+        self.post = array("q", (pre[c] + sizes[c] - 1 for c in range(count)))
+        self._size = count
@@ -1,9 +1,13 @@
 from __future__ import annotations
-from typing import Optional
+from bisect import bisect_left, insort
+from typing import Collection, Dict, List, Optional
 from uuid import UUID
 from typing import TYPE_CHECKING
 
 from src.common.registries import AbstractRegistry
+from src.inspector_git.linker.commit_graph import CommitGraph
+from src.inspector_git.linker.exceptions import AmbiguousCommitPrefixException
+from src.inspector_git.linker.reachability import ReachabilityIndex
 
 if TYPE_CHECKING:
     from src.common.models import Account, File, GitCommit, Change
@@ -14,18 +18,105 @@ class AccountRegistry(AbstractRegistry["Account", str]):
         return entity.id
 
 class CommitRegistry(AbstractRegistry["Commit", str]):
+    """
+    Also keeps the commit DAG as a CommitGraph. Once registered, a commit's ``parents`` and
+    ``children`` are views over the graph; parents must be registered before their children.
+
+    Abbreviated SHAs are resolved by bisecting a sorted list of the registered ids, built on
+    the first prefix lookup and kept sorted as commits are added.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.graph = CommitGraph()
+        self._reachability: Optional[ReachabilityIndex] = None
+        self._sorted_ids: Optional[List[str]] = None
+
+    @property
+    def reachability(self) -> ReachabilityIndex:
+        """Ancestor queries over the registered commits, labelled on first use."""
+        if self._reachability is None or self._reachability.graph is not self.graph:
+            self._reachability = ReachabilityIndex(self.graph)
+        return self._reachability
+
+    def add(self, entity: "GitCommit", id: Optional[str] = None) -> Optional["GitCommit"]:
+        stored = super().add(entity, id)
+        if stored is entity:
+            if self._sorted_ids is not None:
+                insort(self._sorted_ids, self.get_id(entity) if id is None else id)
+            self._link(entity, [parent for parent in entity.parents if self.graph.ordinal(parent.id) is not None])
+        return stored
+
+    def add_all(self, entities: Collection["GitCommit"]) -> None:
+        super().add_all(entities)
+        self._sorted_ids = None
+        self.rebuild_graph()
+
+    def remove(self, id: str) -> Optional["GitCommit"]:
+        entity = super().remove(id)
+        if entity is not None:
+            self._sorted_ids = None
+            self.rebuild_graph()
+        return entity
+
+    def delete(self, entity: "GitCommit") -> Optional["GitCommit"]:
+        return self.remove(self.get_id(entity))
+
+    def rebuild_graph(self) -> None:
+        """Rebuild the graph from the registered commits' current parents, e.g. after relinking them."""
+        parents = {commit.id: [p for p in commit.parents if p is not None and p.id in self._map] for commit in self.all}
+        self.graph = CommitGraph()
+        pending = list(self.all)
+        while pending:
+            # Registration order is kept wherever it is already topological.
+            deferred = []
+            for commit in pending:
+                if all(self.graph.ordinal(p.id) is not None for p in parents[commit.id]):
+                    self._link(commit, parents[commit.id])
+                else:
+                    deferred.append(commit)
+            if len(deferred) == len(pending):
+                raise ValueError("Commit parents form a cycle")
+            pending = deferred
+
+    def _link(self, commit: "GitCommit", parents: List["GitCommit"]) -> None:
+        ordinal = self.graph.add(commit, parents)
+        commit.parents = self.graph.parents_of(ordinal)
+        commit.children = self.graph.children_of(ordinal)
+
     def get_by_id(self, id: str) -> Optional["GitCommit"]:
         if id.startswith("^"):
-            return self._find_by_prefix(id.removeprefix("^"))
+            return self.get_by_prefix(id.removeprefix("^"))
         return super().get_by_id(id)
 
     def contains(self, id: str) -> bool:
         if id.startswith("^"):
-            return self._find_by_prefix(id.removeprefix("^")) is not None
+            return bool(self._ids_with_prefix(id.removeprefix("^"), limit=1))
         return super().contains(id)
 
-    def _find_by_prefix(self, prefix: str) -> Optional["GitCommit"]:
-        return next((commit for commit in self.all if commit.id.startswith(prefix)), None)
+    def get_by_prefix(self, prefix: str) -> Optional["GitCommit"]:
+        """
+        The commit whose id starts with ``prefix``, e.g. an abbreviated SHA.
+
+        Raises AmbiguousCommitPrefixException if more than one commit matches.
+        """
+        if prefix in self._map:
+            return self._map[prefix]
+        ids = self._ids_with_prefix(prefix, limit=2)
+        if len(ids) > 1:
+            raise AmbiguousCommitPrefixException(prefix, self._ids_with_prefix(prefix))
+        return self._map[ids[0]] if ids else None
+
+    def _ids_with_prefix(self, prefix: str, limit: Optional[int] = None) -> List[str]:
+        if self._sorted_ids is None:
+            self._sorted_ids = sorted(self._map)
+        ids = self._sorted_ids
+        found = []
+        index = bisect_left(ids, prefix)
+        while index < len(ids) and ids[index].startswith(prefix) and (limit is None or len(found) < limit):
+            found.append(ids[index])
+            index += 1
+        return found
 
     def get_id(self, entity: "GitCommit") -> str:
         return entity.id
@@ -35,13 +126,53 @@ class FileRegistry(AbstractRegistry["File", UUID]):
         return entity.id
 
 class ChangeRegistry(AbstractRegistry["Change", str]):
+    """Also indexes changes by their file, so the changes pointing at a file are found without a scan."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._by_file: Dict[UUID, Dict[str, "Change"]] = {}
+
+    def add(self, entity: "Change", id: Optional[str] = None) -> Optional["Change"]:
+        stored = super().add(entity, id)
+        if stored is entity:
+            self._index(entity)
+        return stored
+
+    def add_all(self, entities: Collection["Change"]) -> None:
+        super().add_all(entities)
+        for entity in entities:
+            self._index(entity)
+
+    def remove(self, id: str) -> Optional["Change"]:
+        entity = super().remove(id)
+        if entity is not None and entity.file is not None:
+            self._by_file.get(entity.file.id, {}).pop(id, None)
+        return entity
+
+    def delete(self, entity: "Change") -> Optional["Change"]:
+        return self.remove(self.get_id(entity))
+
+    def get_by_file(self, file: "File") -> List["Change"]:
+        return [change for change in self._by_file.get(file.id, {}).values() if change.file is file]
+
+    def relink_file(self, old_file: "File", new_file: "File") -> List["Change"]:
+        """Point every change of ``old_file`` at ``new_file``; returns the changes that still pointed at it."""
+        moved = self._by_file.pop(old_file.id, {})
+        relinked = [change for change in moved.values() if change.file is old_file]
+        for change in relinked:
+            change.file = new_file
+        self._by_file.setdefault(new_file.id, {}).update(moved)
+        return relinked
+
+    def reindex_files(self) -> None:
+        """Rebuild the file index, e.g. once changes were linked to their files after loading."""
+        self._by_file = {}
+        for change in self.all:
+            self._index(change)
+
+    def _index(self, change: "Change") -> None:
+        if change.file is not None:
+            self._by_file.setdefault(change.file.id, {})[self.get_id(change)] = change
+
     def get_id(self, entity: "Change") -> str:
         return entity.id
-
-
-
-
-
-
-
-
@@ -0,0 +1,626 @@
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+import sys
+import uuid
+from array import array
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from pydantic import BaseModel
+
+from src.common.model_backends import ModelBackend, PYDANTIC_BACKEND, SLOTTED_BACKEND
+from src.common.models import ChangeType, GitAccountId, GitProject, LineOperation, LineRun
+from src.common.ordered_set import OrderedSet
+from src.common.rope import Rope, export_nodes, import_nodes
+from src.inspector_git.linker.exceptions import SnapshotFormatException
+from src.inspector_git.linker.metrics import CommitMetrics
+from src.logger import get_logger
+from src.profiler import get_profiler
+
+LOG = get_logger(__name__)
+PROFILER = get_profiler()
+
+MAGIC = b"IGSNAP\x00\x01"
+VERSION = 1
+
+BACKENDS = {"pydantic": PYDANTIC_BACKEND, "slotted": SLOTTED_BACKEND}
+
+_CHANGE_TYPES = list(ChangeType)
+_LINE_OPERATIONS = list(LineOperation)
+_EPOCH = datetime(1970, 1, 1)
+_NAIVE = -(1 << 31)
+_HEADER = struct.Struct("<Q")
+
+
+def _pack_date(value: datetime) -> Tuple[int, int]:
+    """Wall-clock microseconds since the epoch and UTC offset in seconds, so the timezone round-trips."""
+    offset = value.utcoffset()
+    micros = (value.replace(tzinfo=None) - _EPOCH) // timedelta(microseconds=1)
+    return micros, _NAIVE if offset is None else int(offset.total_seconds())
+
+
+def _utc_micros(micros: int, offset: int) -> int:
+    return micros if offset == _NAIVE else micros - offset * 1_000_000
+
+
+def _construct(cls: type, **fields: Any):
+    # Snapshot contents were validated when they were built, so pydantic models skip validation.
+    # Fields with a default factory are always passed: pydantic inspects the factory on every use.
+    if issubclass(cls, BaseModel):
+        return cls.model_construct(**fields)
+    return cls(**fields)
+
+
+def _align(size: int) -> int:
+    return -size % 8
+
+
+class _StringHeap:
+    """Distinct strings, stored as one UTF-8 blob and their end offsets in code points."""
+
+    def __init__(self) -> None:
+        self._index: Dict[str, int] = {}
+        self._strings: List[str] = []
+
+    def add(self, value: Optional[str]) -> int:
+        if value is None:
+            return -1
+        index = self._index.get(value)
+        if index is None:
+            index = self._index[value] = len(self._strings)
+            self._strings.append(value)
+        return index
+
+    def sections(self) -> Dict[str, Union[array, bytes]]:
+        ends = array("q")
+        end = 0
+        for value in self._strings:
+            end += len(value)
+            ends.append(end)
+        return {"string_ends": ends, "strings": "".join(self._strings).encode("utf-8", "surrogatepass")}
+
+
+class _Reader:
+    """Typed views over the sections of a memory-mapped snapshot."""
+
+    def __init__(self, path: str, buffer: mmap.mmap) -> None:
+        self.path = path
+        self.buffer = buffer
+        if buffer[:len(MAGIC)] != MAGIC:
+            raise SnapshotFormatException(path, "bad magic number")
+        (header_size,) = _HEADER.unpack_from(buffer, len(MAGIC))
+        start = len(MAGIC) + _HEADER.size
+        self.header = json.loads(bytes(buffer[start:start + header_size]))
+        if self.header.get("version") != VERSION:
+            raise SnapshotFormatException(path, f"unsupported version {self.header.get('version')}")
+        if self.header.get("byteorder") != sys.byteorder:
+            raise SnapshotFormatException(path, f"written on a {self.header.get('byteorder')}-endian machine")
+        self.data = start + header_size + _align(start + header_size)
+
+    def _section(self, name: str) -> Tuple[int, int, str]:
+        try:
+            return self.header["sections"][name]
+        except KeyError:
+            raise SnapshotFormatException(self.path, f"missing section {name}") from None
+
+    def _view(self, name: str) -> memoryview:
+        offset, size, _ = self._section(name)
+        return memoryview(self.buffer)[self.data + offset:self.data + offset + size]
+
+    def ints(self, name: str) -> List[int]:
+        with self._view(name) as view, view.cast(self._section(name)[2]) as values:
+            return values.tolist()
+
+    def column(self, name: str) -> array:
+        values = array(self._section(name)[2])
+        with self._view(name) as view:
+            values.frombytes(view)
+        return values
+
+    def raw(self, name: str) -> bytes:
+        with self._view(name) as view:
+            return bytes(view)
+
+    def strings(self) -> _Strings:
+        with self._view("strings") as view:
+            text = str(view, "utf-8", "surrogatepass")
+        return _Strings(text, self.ints("string_ends"))
+
+
+class _Strings:
+    """The strings of the heap, each sliced out of the decoded text on first use."""
+
+    def __init__(self, text: str, ends: List[int]) -> None:
+        self.text = text
+        self.ends = ends
+        self.values: List[Optional[str]] = [None] * len(ends)
+
+    def __getitem__(self, index: int) -> str:
+        value = self.values[index]
+        if value is None:
+            value = self.values[index] = self.text[self.ends[index - 1] if index else 0:self.ends[index]]
+        return value
+
+
+@dataclass(frozen=True)
+class SnapshotProjection:
+    """
+    The part of a snapshot that ``GraphSnapshot.load`` builds.
+
+    Commits whose committer date falls in [``since``, ``until``) are loaded in full, with
+    their accounts and their changes to paths under one of ``path_prefixes`` (all paths if
+    there are none). A trailing ``**`` on a prefix is ignored. Every other commit is a stub
+    holding its id, dates and place in the graph, but no message, accounts or changes, so
+    ancestry stays navigable. Naive datetimes are taken as UTC. Files, hunks and annotated
+    lines are only built for the loaded changes, and not at all without ``hunks`` or
+    ``annotated_lines``.
+    """
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+    path_prefixes: Tuple[str, ...] = ()
+    hunks: bool = True
+    annotated_lines: bool = True
+
+    def includes_date(self, micros: int, offset: int) -> bool:
+        """Whether a date packed by ``_pack_date`` is in the window."""
+        utc = _utc_micros(micros, offset)
+        return ((self.since is None or utc >= _utc_micros(*_pack_date(self.since)))
+                and (self.until is None or utc < _utc_micros(*_pack_date(self.until))))
+
+    def includes_path(self, *names: Optional[str]) -> bool:
+        if not self.path_prefixes:
+            return True
+        prefixes = tuple(prefix.removesuffix("**") for prefix in self.path_prefixes)
+        return any(name is not None and name.startswith(prefixes) for name in names)
+
+
+class GraphSnapshot:
+    """
+    Binary snapshot of a GitProject, loaded back fully linked without pickle or ``_relink_objects``.
+
+    Entities are numbered by table: accounts, commits, files and changes are packed into
+    columns of fixed-size integers, and every reference is the index of a row. Strings are
+    deduplicated into one heap, hunks are stored as their line runs and annotated lines as
+    the nodes of their ropes, shared between changes as they are in memory. A load memory-maps the file, decodes the heap once, builds every
+    entity without validation and fills the registries in one pass each.
+
+    Changes are saved by identity, so the changes of a merge commit against each of its
+    parents, which share an id, stay distinct. Links to Jira and GitHub are not saved;
+    they are restored by linking the projects again.
+    """
+
+    @staticmethod
+    def save(project: GitProject, path: Union[str, Path]) -> None:
+        with PROFILER.span("save_snapshot"):
+            header, sections = _SnapshotWriter(project).write()
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                layout = {}
+                offset = 0
+                for name, values in sections.items():
+                    data = values if isinstance(values, bytes) else values.tobytes()
+                    layout[name] = (offset, len(data), values.typecode if isinstance(values, array) else "B")
+                    offset += len(data) + _align(len(data))
+                header["sections"] = layout
+                encoded = json.dumps(header).encode("utf-8")
+                f.write(MAGIC)
+                f.write(_HEADER.pack(len(encoded)))
+                f.write(encoded)
+                f.write(bytes(_align(len(MAGIC) + _HEADER.size + len(encoded))))
+                for values in sections.values():
+                    data = values if isinstance(values, bytes) else values.tobytes()
+                    f.write(data)
+                    f.write(bytes(_align(len(data))))
+            os.replace(tmp_path, path)
+
+    @staticmethod
+    def load(path: Union[str, Path], backend: Optional[ModelBackend] = None,
+             projection: Optional[SnapshotProjection] = None) -> GitProject:
+        """
+        The saved project, built with ``backend`` or else with the backend it was saved from.
+        With a ``projection``, only the entities it selects are built.
+        """
+        with PROFILER.span("load_snapshot"):
+            if os.path.getsize(path) < len(MAGIC) + _HEADER.size:
+                raise SnapshotFormatException(str(path), "file is too short")
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                reader = _Reader(str(path), buffer)
+                if backend is None:
+                    backend = BACKENDS[reader.header["backend"]]
+                return _SnapshotLoader(reader, backend, projection).load()
+
+
+class _SnapshotWriter:
+    def __init__(self, project: GitProject) -> None:
+        self.project = project
+        self.heap = _StringHeap()
+
+    def write(self) -> Tuple[Dict, Dict[str, Union[array, bytes]]]:
+        project = self.project
+        heap = self.heap
+
+        commits = list(project.git_commit_registry.all)
+        commit_index = {commit.id: i for i, commit in enumerate(commits)}
+
+        accounts, account_index = self._table(project.account_registry.all)
+        files, file_index = self._table(project.file_registry.all)
+        changes, change_index = self._table(project.change_registry.all)
+        registered = len(accounts), len(files), len(changes)
+
+        def commit_of(commit) -> int:
+            return commit_index[commit.id] if commit is not None else -1
+
+        def add(entities: list, index: Dict[int, int], entity) -> int:
+            if entity is None:
+                return -1
+            position = index.get(id(entity))
+            if position is None:
+                position = index[id(entity)] = len(entities)
+                entities.append(entity)
+            return position
+
+        sections: Dict[str, Union[array, bytes]] = {}
+
+        columns = self._columns(
+            ("id", "i"), ("message", "i"), ("author_date", "q"), ("author_offset", "i"),
+            ("committer_date", "q"), ("committer_offset", "i"), ("author", "i"), ("committer", "i"),
+            ("branch_id", "q"), ("repo_size", "q"), ("parent_ends", "q"), ("parents", "i"),
+            ("change_ends", "q"), ("changes", "i"),
+        )
+        for commit in commits:
+            columns["id"].append(heap.add(commit.id))
+            columns["message"].append(heap.add(commit.message))
+            for name in ("author", "committer"):
+                micros, offset = _pack_date(getattr(commit, f"{name}_date"))
+                columns[f"{name}_date"].append(micros)
+                columns[f"{name}_offset"].append(offset)
+                columns[name].append(add(accounts, account_index, getattr(commit, name)))
+            columns["branch_id"].append(commit.branch_id)
+            columns["repo_size"].append(commit.repo_size)
+            columns["parents"].extend(commit_of(parent) for parent in commit.parents)
+            columns["parent_ends"].append(len(columns["parents"]))
+            columns["changes"].extend(add(changes, change_index, change) for change in commit.changes)
+            columns["change_ends"].append(len(columns["changes"]))
+        sections.update(self._prefixed("commit", columns))
+
+        columns = self._columns(
+            ("email", "i"), ("git_name", "i"), ("name", "i"), ("commit_ends", "q"), ("commits", "i"),
+        )
+        for account in accounts:
+            columns["email"].append(heap.add(account.git_id.email))
+            columns["git_name"].append(heap.add(account.git_id.name))
+            columns["name"].append(heap.add(account.name))
+            columns["commits"].extend(commit_of(commit) for commit in account.commits)
+            columns["commit_ends"].append(len(columns["commits"]))
+        sections.update(self._prefixed("account", columns))
+
+        # Changes reachable only from files or parent changes are added while the table is read.
+        file_changes = array("i")
+        file_change_ends = array("q")
+        for file in files:
+            file_changes.extend(add(changes, change_index, change) for change in file.changes)
+            file_change_ends.append(len(file_changes))
+
+        columns = self._columns(
+            ("id", "i"), ("commit", "i"), ("change_type", "b"), ("old_file_name", "i"),
+            ("new_file_name", "i"), ("file", "i"), ("parent_commit", "i"), ("parent_change", "i"),
+            ("compute_annotated_lines", "b"), ("hunk_ends", "q"),
+        )
+        run_ends, run_operations, run_starts, run_counts = array("q"), array("b"), array("i"), array("i")
+        operation_index = {operation: i for i, operation in enumerate(_LINE_OPERATIONS)}
+        change_type_index = {change_type: i for i, change_type in enumerate(_CHANGE_TYPES)}
+        position = 0
+        while position < len(changes):
+            change = changes[position]
+            position += 1
+            columns["id"].append(heap.add(change.id))
+            columns["commit"].append(commit_of(change.commit))
+            columns["change_type"].append(change_type_index[change.change_type])
+            columns["old_file_name"].append(heap.add(change.old_file_name))
+            columns["new_file_name"].append(heap.add(change.new_file_name))
+            columns["file"].append(add(files, file_index, change.file))
+            columns["parent_commit"].append(commit_of(change.parent_commit))
+            columns["parent_change"].append(add(changes, change_index, change.parent_change))
+            columns["compute_annotated_lines"].append(bool(change.compute_annotated_lines))
+            for hunk in change.hunks:
+                for run in hunk.runs:
+                    run_operations.append(operation_index[run.operation])
+                    run_starts.append(run.start)
+                    run_counts.append(run.count)
+                run_ends.append(len(run_counts))
+            columns["hunk_ends"].append(len(run_ends))
+        sections.update(self._prefixed("change", columns))
+        sections.update(run_ends=run_ends, run_operations=run_operations, run_starts=run_starts,
+                        run_counts=run_counts)
+
+        # Annotated lines keep the nodes their ropes share, like in memory.
+        nodes, roots = export_nodes(change.annotated_lines for change in changes)
+        sections.update(
+            rope_values=array("i", (commit_of(value) for value, _, _, _, _ in nodes)),
+            rope_counts=array("q", (count for _, count, _, _, _ in nodes)),
+            rope_lefts=array("i", (left for _, _, left, _, _ in nodes)),
+            rope_rights=array("i", (right for _, _, _, right, _ in nodes)),
+            rope_priorities=array("d", (priority for _, _, _, _, priority in nodes)),
+            change_annotated_root=array("i", roots),
+        )
+
+        # Files first reached through a change have no changes of their own in the snapshot.
+        for file in files[len(file_change_ends):]:
+            file_change_ends.append(len(file_changes))
+        sections.update(
+            file_ids=b"".join(file.id.bytes for file in files),
+            file_is_binary=array("b", (bool(file.is_binary) for file in files)),
+            file_change_ends=file_change_ends,
+            file_changes=file_changes,
+        )
+
+        metrics = project.commit_metrics
+        metric_ids = metrics.commit_ids() or []
+        sections["metric_commits"] = array("i", (commit_index.get(commit_id, -1) for commit_id in metric_ids))
+        for name in CommitMetrics.COLUMNS:
+            sections[f"metric_{name}"] = getattr(metrics, name)
+
+        sections.update(heap.sections())
+        header = {
+            "version": VERSION,
+            "byteorder": sys.byteorder,
+            "name": project.name,
+            "backend": "slotted" if commits and not isinstance(commits[0], BaseModel) else "pydantic",
+            "counts": {
+                "accounts": len(accounts), "commits": len(commits), "files": len(files), "changes": len(changes),
+                "registered_accounts": registered[0], "registered_files": registered[1],
+                "registered_changes": registered[2],
+            },
+        }
+        return header, sections
+
+    @staticmethod
+    def _table(entities) -> Tuple[list, Dict[int, int]]:
+        entities = list(entities)
+        return entities, {id(entity): i for i, entity in enumerate(entities)}
+
+    @staticmethod
+    def _columns(*columns: Tuple[str, str]) -> Dict[str, array]:
+        return {name: array(typecode) for name, typecode in columns}
+
+    @staticmethod
+    def _prefixed(table: str, columns: Dict[str, array]) -> Dict[str, array]:
+        return {f"{table}_{name}": values for name, values in columns.items()}
+
+
+class _SnapshotLoader:
+    def __init__(self, reader: _Reader, backend: ModelBackend, projection: Optional[SnapshotProjection]) -> None:
+        self.reader = reader
+        self.backend = backend
+        self.projection = projection
+
+    def load(self) -> GitProject:
+        reader, backend, projection = self.reader, self.backend, self.projection
+        header = reader.header
+        counts = header["counts"]
+        strings = reader.strings()
+
+        def string(index: int) -> Optional[str]:
+            return strings[index] if index >= 0 else None
+
+        project = GitProject(name=header["name"])
+
+        # Every commit is built so that ancestry stays complete; those outside the window are stubs.
+        commit_authors = reader.ints("commit_author")
+        commit_committers = reader.ints("commit_committer")
+        if projection is None:
+            full_commits = [True] * counts["commits"]
+        else:
+            full_commits = [projection.includes_date(micros, offset) for micros, offset in zip(
+                reader.ints("commit_committer_date"), reader.ints("commit_committer_offset"))]
+
+        loaded_accounts = bytearray(counts["accounts"])
+        for author, committer, full in zip(commit_authors, commit_committers, full_commits):
+            if full:
+                for index in (author, committer):
+                    if index >= 0:
+                        loaded_accounts[index] = True
+        accounts: List[Any] = []
+        for i, (email, git_name, name) in enumerate(zip(
+                reader.ints("account_email"), reader.ints("account_git_name"), reader.ints("account_name"))):
+            if not loaded_accounts[i]:
+                accounts.append(None)
+                continue
+            git_id = GitAccountId.model_construct(email=strings[email], name=strings[git_name])
+            accounts.append(_construct(backend.git_account, git_id=git_id, name=strings[name], project=project,
+                                       commits=[]))
+
+        zones: Dict[int, Optional[timezone]] = {_NAIVE: None}
+
+        def date(micros: int, offset: int) -> datetime:
+            zone = zones.get(offset)
+            if zone is None and offset not in zones:
+                zone = zones[offset] = timezone(timedelta(seconds=offset))
+            return (_EPOCH + timedelta(microseconds=micros)).replace(tzinfo=zone)
+
+        def account(index: int):
+            return accounts[index] if index >= 0 else None
+
+        commits = []
+        parent_groups = self._groups("commit_parent_ends", "commit_parents")
+        for i, (commit_id, message, author_date, author_offset, committer_date, committer_offset,
+                author, committer, branch_id, repo_size) in enumerate(zip(
+                    reader.ints("commit_id"), reader.ints("commit_message"),
+                    reader.ints("commit_author_date"), reader.ints("commit_author_offset"),
+                    reader.ints("commit_committer_date"), reader.ints("commit_committer_offset"),
+                    commit_authors, commit_committers,
+                    reader.ints("commit_branch_id"), reader.ints("commit_repo_size"))):
+            full = full_commits[i]
+            commits.append(_construct(
+                backend.git_commit,
+                project=project,
+                id=strings[commit_id],
+                message=strings[message] if full else "",
+                author_date=date(author_date, author_offset),
+                committer_date=date(committer_date, committer_offset),
+                author=account(author) if full else None,
+                committer=account(committer) if full else None,
+                parents=[commits[p] for p in parent_groups[i]],
+                children=[],
+                changes=[],
+                branch_id=branch_id,
+                repo_size=repo_size,
+                issues=OrderedSet(),
+                pull_requests=OrderedSet(),
+            ))
+
+        def commit(index: int):
+            return commits[index] if index >= 0 else None
+
+        change_commits = reader.ints("change_commit")
+        change_files = reader.ints("change_file")
+        if projection is None:
+            loaded_changes = [True] * counts["changes"]
+        else:
+            loaded_changes = [
+                commit_index >= 0 and full_commits[commit_index]
+                and projection.includes_path(string(old_file_name), string(new_file_name))
+                for commit_index, old_file_name, new_file_name in zip(
+                    change_commits, reader.ints("change_old_file_name"), reader.ints("change_new_file_name"))
+            ]
+
+        loaded_files = bytearray(counts["files"])
+        for file, loaded in zip(change_files, loaded_changes):
+            if loaded and file >= 0:
+                loaded_files[file] = True
+        files: List[Any] = []
+        file_ids = reader.raw("file_ids")
+        for i, is_binary in enumerate(reader.ints("file_is_binary")):
+            if projection is not None and not loaded_files[i]:
+                files.append(None)
+                continue
+            files.append(_construct(backend.file, is_binary=bool(is_binary), project=project, changes=[],
+                                    id=uuid.UUID(bytes=file_ids[16 * i:16 * i + 16])))
+
+        changes = self._changes(string, commit, files, change_commits, change_files, loaded_changes)
+
+        def loaded(entities: list, group: List[int]) -> Iterator[Any]:
+            return (entity for entity in map(entities.__getitem__, group) if entity is not None)
+
+        for account_, group in zip(accounts, self._groups("account_commit_ends", "account_commits")):
+            if account_ is not None:
+                account_.commits.extend(commits[c] for c in group if full_commits[c])
+        for commit_, group in zip(commits, self._groups("commit_change_ends", "commit_changes")):
+            commit_.changes.extend(loaded(changes, group))
+        for file, group in zip(files, self._groups("file_change_ends", "file_changes")):
+            if file is not None:
+                file.changes.extend(loaded(changes, group))
+
+        project.account_registry.add_all([a for a in accounts[:counts["registered_accounts"]] if a is not None])
+        project.git_commit_registry.add_all(commits)
+        project.file_registry.add_all([f for f in files[:counts["registered_files"]] if f is not None])
+        project.change_registry.add_all([c for c in changes[:counts["registered_changes"]] if c is not None])
+
+        metrics = CommitMetrics.from_columns(
+            [commits[c].id for c in reader.ints("metric_commits")],
+            {name: reader.column(f"metric_{name}") for name in CommitMetrics.COLUMNS},
+        )
+        if metrics.attach(project.git_commit_registry.graph):
+            project.commit_metrics = metrics
+        else:
+            LOG.warning("Snapshot metrics do not match the commit graph, recomputing them")
+            project.commit_metrics.compute(project)
+        return project
+
+    def _changes(self, string: Callable[[int], Optional[str]], commit: Callable[[int], Any], files: list,
+                 change_commits: List[int], change_files: List[int], loaded_changes: List[bool]) -> list:
+        reader, backend, projection = self.reader, self.backend, self.projection
+        with_hunks = projection is None or projection.hunks
+        with_annotated_lines = projection is None or projection.annotated_lines
+        hunk_groups = self._ranges("change_hunk_ends")
+
+        hunks: Dict[int, Any] = {}
+        if with_hunks:
+            run_groups = self._ranges("run_ends")
+            run_operations = reader.ints("run_operations")
+            run_starts = reader.ints("run_starts")
+            run_counts = reader.ints("run_counts")
+            for (hunk_start, hunk_end), loaded in zip(hunk_groups, loaded_changes):
+                if not loaded:
+                    continue
+                for h in range(hunk_start, hunk_end):
+                    start, end = run_groups[h]
+                    hunks[h] = _construct(backend.hunk, runs=[
+                        LineRun(_LINE_OPERATIONS[run_operations[r]], run_starts[r], run_counts[r])
+                        for r in range(start, end)
+                    ])
+
+        roots = reader.ints("change_annotated_root")
+        if not with_annotated_lines:
+            annotated_lines = [Rope()] * len(roots)
+        else:
+            lefts, rights = reader.ints("rope_lefts"), reader.ints("rope_rights")
+            keep = None
+            if projection is not None:
+                # Only the nodes reachable from the loaded changes are built.
+                roots = [root if loaded else -1 for root, loaded in zip(roots, loaded_changes)]
+                keep = bytearray(len(lefts))
+                stack = [root for root in roots if root >= 0]
+                while stack:
+                    node = stack.pop()
+                    if not keep[node]:
+                        keep[node] = True
+                        stack.extend(child for child in (lefts[node], rights[node]) if child >= 0)
+            annotated_lines = import_nodes(
+                zip(map(commit, reader.ints("rope_values")), reader.ints("rope_counts"), lefts, rights,
+                    reader.ints("rope_priorities")),
+                roots, keep,
+            )
+
+        changes: List[Any] = []
+        for i, (change_id, commit_index, change_type, old_file_name, new_file_name, file,
+                parent_commit) in enumerate(zip(
+                    reader.ints("change_id"), change_commits, reader.ints("change_change_type"),
+                    reader.ints("change_old_file_name"), reader.ints("change_new_file_name"),
+                    change_files, reader.ints("change_parent_commit"))):
+            if not loaded_changes[i]:
+                changes.append(None)
+                continue
+            hunk_start, hunk_end = hunk_groups[i]
+            changes.append(_construct(
+                backend.change,
+                id=string(change_id),
+                commit=commit(commit_index),
+                change_type=_CHANGE_TYPES[change_type],
+                old_file_name=string(old_file_name),
+                new_file_name=string(new_file_name),
+                file=files[file] if file >= 0 else None,
+                parent_commit=commit(parent_commit),
+                hunks=[hunks[h] for h in range(hunk_start, hunk_end)] if with_hunks else [],
+                annotated_lines=annotated_lines[i],
+            ))
+
+        # Set after construction, so that no backend recomputes annotated lines from the parent change.
+        for change, parent_change, compute_annotated_lines in zip(
+                changes, reader.ints("change_parent_change"), reader.ints("change_compute_annotated_lines")):
+            if change is None:
+                continue
+            if parent_change >= 0:
+                change.parent_change = changes[parent_change]
+            change.compute_annotated_lines = bool(compute_annotated_lines)
+        return changes
+
+    def _ranges(self, ends: str) -> List[Tuple[int, int]]:
+        """The (start, end) of every row of a ragged column, from the row ends."""
+        ranges = []
+        start = 0
+        for end in self.reader.ints(ends):
+            ranges.append((start, end))
+            start = end
+        return ranges
+
+    def _groups(self, ends: str, items: str) -> List[List[int]]:
+        """The items of every row of a ragged column."""
+        values = self.reader.ints(items)
+        return [values[start:end] for start, end in self._ranges(ends)]
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from bisect import bisect_right
+from typing import Dict, List, Optional, Sequence, TYPE_CHECKING
+
+from src.inspector_git.linker.reachability import ReachabilityIndex
+
+if TYPE_CHECKING:
+    from src.common.models import Change
+
+
+class FileTimeline:
+    """
+    The changes of one file placed in the first-parent forest of the commit graph.
+
+    The state of the file at commit X is its change at the nearest first-parent ancestor of
+    X (X included) that touched it. The touched commits are sorted by their pre-order
+    number and linked to their nearest touched first-parent ancestor. A query bisects for
+    the last touched commit at or before X in pre-order, then climbs those links with
+    binary lifting until it reaches one whose interval contains X: O(log n) per query.
+    """
+
+    def __init__(self, changes: Sequence["Change"], reachability: ReachabilityIndex):
+        reachability.refresh()
+        graph = reachability.graph
+        self._stamp = self.stamp(changes, reachability)
+        self._reachability = reachability
+
+        by_ordinal: Dict[int, "Change"] = {}
+        for change in changes:
+            ordinal = graph.ordinal(change.commit.id) if change.commit is not None else None
+            if ordinal is not None:
+                by_ordinal.setdefault(ordinal, change)  # the first change of a commit wins
+        pre, post = reachability.pre, reachability.post
+        ordinals = sorted(by_ordinal, key=lambda o: pre[o])
+        self._pres = [pre[o] for o in ordinals]
+        self._posts = [post[o] for o in ordinals]
+        self._changes = [by_ordinal[o] for o in ordinals]
+
+        # Nearest touched ancestor of every touched commit: the intervals are laminar, so a
+        # stack of the open intervals in pre-order holds exactly the ancestors.
+        parents: List[int] = []
+        open_intervals: List[int] = []
+        for i, start in enumerate(self._pres):
+            while open_intervals and self._posts[open_intervals[-1]] < start:
+                open_intervals.pop()
+            parents.append(open_intervals[-1] if open_intervals else -1)
+            open_intervals.append(i)
+
+        self._jumps = [parents]
+        while any(j >= 0 for j in self._jumps[-1]):
+            previous = self._jumps[-1]
+            self._jumps.append([previous[j] if j >= 0 else -1 for j in previous])
+
+    @staticmethod
+    def stamp(changes: Sequence["Change"], reachability: ReachabilityIndex) -> tuple:
+        return id(changes), len(changes), id(reachability.graph), len(reachability.graph)
+
+    def is_current(self, changes: Sequence["Change"], reachability: ReachabilityIndex) -> bool:
+        return self._reachability is reachability and self._stamp == self.stamp(changes, reachability)
+
+    def change_at(self, ordinal: int) -> Optional["Change"]:
+        target = self._reachability.pre[ordinal]
+        i = bisect_right(self._pres, target) - 1
+        if i < 0:
+            return None
+        if self._posts[i] >= target:
+            return self._changes[i]
+        for jumps in reversed(self._jumps):
+            j = jumps[i]
+            if j >= 0 and self._posts[j] < target:
+                i = j
+        i = self._jumps[0][i]
+        return self._changes[i] if i >= 0 else None
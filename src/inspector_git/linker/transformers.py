@@ -1,9 +1,10 @@
 from abc import ABC, abstractmethod
 from collections import deque
-from typing import Optional, List
+from typing import Optional, List, Type
 from src.inspector_git.linker.exceptions import NoChangeException
-from src.common.models import GitAccountId, GitAccount, GitProject, LineOperation, ChangeType, LineChange, Hunk, File, \
-    GitCommit, Change
+from src.common.models import GitAccountId, GitAccount, GitProject, LineOperation, ChangeType, Hunk, File, \
+    GitCommit, Change, to_line_runs
+from src.common.model_backends import ModelBackend, PYDANTIC_BACKEND
 from src.inspector_git.reader.dto.gitlog.chnage_dto import ChangeDTO
 from src.inspector_git.reader.dto.gitlog.commit_dto import CommitDTO
 from src.inspector_git.reader.dto.gitlog.git_log_dto import GitLogDTO
@@ -11,8 +12,12 @@ from src.inspector_git.reader.enums.chnage_type import ChangeType as ChangeTypeD
 from datetime import datetime
 from src.inspector_git.utils.constants import parse_commit_date
 from src.logger import get_logger
+from src.profiler import get_profiler
 
 LOG = get_logger(__name__)
+PROFILER = get_profiler()
+
+_EXHAUSTED = object()
 
 class ChangeFactory(ABC):
     @abstractmethod
@@ -31,6 +36,9 @@ class ChangeFactory(ABC):
         pass
 
 class SimpleChangeFactory(ChangeFactory):
+    def __init__(self, change_class: Type[Change] = Change):
+        self.change_class = change_class
+
     def create(
         self,
         commit: GitCommit,
@@ -43,7 +51,7 @@ class SimpleChangeFactory(ChangeFactory):
         parent_change: Optional[Change],
         compute_annotated_lines: bool
     ) -> Change:
-        return Change(
+        return self.change_class(
             commit=commit,
             change_type=change_type,
             old_file_name=old_file_name,
@@ -58,6 +66,16 @@ class SimpleChangeFactory(ChangeFactory):
 class ChangeTransformer:
     @staticmethod
     def get_last_change(parent_commit: GitCommit, file_name: str) -> Change:
+        project = parent_commit.project
+        if project is None:
+            return ChangeTransformer._find_last_change(parent_commit, file_name)
+        last_change = project.last_change_index.get(parent_commit, file_name)
+        if last_change is None:
+            raise NoChangeException(file_name)
+        return last_change
+
+    @staticmethod
+    def _find_last_change(parent_commit: GitCommit, file_name: str) -> Change:
         stack = [parent_commit]
 
         while stack:
@@ -79,6 +97,7 @@ class ChangeTransformer:
         project: GitProject,
         compute_annotated_lines: bool,
         change_factory: ChangeFactory,
+        backend: ModelBackend = PYDANTIC_BACKEND,
     ) -> Optional[Change]:
         """
         Transform a ChangeDTO into a domain Change using provided change_factory.
@@ -98,7 +117,8 @@ class ChangeTransformer:
             else:
                 if parent_commit is None:
                     raise NoChangeException(change_dto.old_file_name)
-                last_change = ChangeTransformer.get_last_change(parent_commit, change_dto.old_file_name)
+                with PROFILER.span("get_last_change"):
+                    last_change = ChangeTransformer.get_last_change(parent_commit, change_dto.old_file_name)
         except NoChangeException as e:
             LOG.error("Change not found for file!", exc_info=e)
             return None
@@ -110,8 +130,9 @@ class ChangeTransformer:
             getattr(change_dto, "new_file_name"),
         )
 
-        file_for_change = ChangeTransformer._get_file_for_change(change_dto, last_change, project)
-        hunks = ChangeTransformer._get_hunks(last_change, change_dto, commit)
+        file_for_change = ChangeTransformer._get_file_for_change(change_dto, last_change, project, backend)
+        with PROFILER.span("hunks"):
+            hunks = ChangeTransformer._get_hunks(last_change, change_dto, commit, backend)
 
         if project.file_registry.get_by_id(file_for_change.id) is None:
             LOG.warning(
@@ -126,45 +147,44 @@ class ChangeTransformer:
 
 
 
-        change =  change_factory.create(
-            commit=commit,
-            change_type=ChangeType[getattr(change_dto, "type").name],
-            old_file_name=getattr(change_dto, "old_file_name"),
-            new_file_name=getattr(change_dto, "new_file_name"),
-            file=file_for_change,
-            parent_commit=parent_commit,
-            hunks=hunks,
-            parent_change=last_change,
-            compute_annotated_lines=compute_annotated_lines,
-        )
+        with PROFILER.span("create_change"):
+            change =  change_factory.create(
+                commit=commit,
+                change_type=ChangeType[getattr(change_dto, "type").name],
+                old_file_name=getattr(change_dto, "old_file_name"),
+                new_file_name=getattr(change_dto, "new_file_name"),
+                file=file_for_change,
+                parent_commit=parent_commit,
+                hunks=hunks,
+                parent_change=last_change,
+                compute_annotated_lines=compute_annotated_lines,
+            )
         project.change_registry.add(change)
+        PROFILER.count("changes")
+        PROFILER.count("hunks", len(hunks))
         return change
 
     @staticmethod
-    def _get_hunks(last_change: Optional[Change], change_dto: ChangeDTO, commit: GitCommit) -> List[Hunk]:
+    def _get_hunks(
+        last_change: Optional[Change], change_dto: ChangeDTO, commit: GitCommit, backend: ModelBackend = PYDANTIC_BACKEND
+    ) -> List[Hunk]:
         LOG.debug("Calculating line changes")
         if last_change is not None and last_change.file.is_binary:
             return []
         dto_hunks = change_dto.hunks
         result_hunks: List[Hunk] = []
         for dto_hunk in dto_hunks:
-            dto_line_changes = dto_hunk.line_changes
-            line_changes = [
-                LineChange(
-                    operation=LineOperation[lc.operation.name],
-                    line_number=lc.number,
-                    commit=commit,
-                )
-                for lc in dto_line_changes
-            ]
-            result_hunks.append(Hunk(line_changes=line_changes))
+            runs = to_line_runs((LineOperation[lc.operation.name], lc.number) for lc in dto_hunk.line_changes)
+            result_hunks.append(backend.hunk(runs=runs))
         return result_hunks
 
     @staticmethod
-    def _get_file_for_change(change_dto: ChangeDTO, last_change: Optional[Change], project: GitProject) -> File:
+    def _get_file_for_change(
+        change_dto: ChangeDTO, last_change: Optional[Change], project: GitProject, backend: ModelBackend = PYDANTIC_BACKEND
+    ) -> File:
         LOG.debug("Getting file")
         if change_dto.type == ChangeTypeDTO.ADD:
-            new_file = File(is_binary=change_dto.is_binary, project=project)
+            new_file = backend.file(is_binary=change_dto.is_binary, project=project)
             project.file_registry.add(new_file)
             return new_file
         else:
@@ -180,16 +200,18 @@ class MergeChangesTransformer:
         project: GitProject,
         compute_annotated_lines: bool,
         change_factory: ChangeFactory,
+        backend: ModelBackend = PYDANTIC_BACKEND,
     ) -> List[Change]:
         changes = [
             c
             for dto in change_dtos
-            if (c := ChangeTransformer.transform(dto, commit, project, compute_annotated_lines, change_factory))
+            if (c := ChangeTransformer.transform(dto, commit, project, compute_annotated_lines, change_factory, backend))
             is not None
         ]
         if not changes:
             return []
-        return MergeChangesTransformer._fix_changes(changes, commit, project)
+        with PROFILER.span("merge_fix"):
+            return MergeChangesTransformer._fix_changes(changes, commit, project)
 
     @staticmethod
     def _fix_changes(changes: List[Change], commit: GitCommit, project: GitProject) -> List[Change]:
@@ -215,50 +237,49 @@ class MergeChangesTransformer:
 
     @staticmethod
     def _merge_files(changes: List[Change], missing_change: Optional[Change], project: GitProject) -> None:
-        files = list({c.file for c in changes} | ({missing_change.file} if missing_change else set()))
+        files = list(dict.fromkeys([c.file for c in changes] + ([missing_change.file] if missing_change else [])))
         if len(files) > 1:
-            all_file_changes = list({ch for f in files for ch in f.changes})
+            all_file_changes = {id(ch): ch for f in files for ch in f.changes}
             file = files[0]
-            file.changes = sorted(all_file_changes, key=lambda c: c.commit.committer_date)
+            file.changes = sorted(all_file_changes.values(), key=lambda c: c.commit.committer_date)
             for c in changes:
                 c.file = file
             for f in files[1:]:
-                # print(f"before deleting a file print:{f.id}")
                 for ch in f.changes:
                     ch.file = file
-                    if ch not in file.changes:
-                        file.changes.append(ch)
+                    CommitTransformer.invalidate_account_views(ch.commit)
 
-                #DEBUG
-                for ch in project.change_registry.all:
-                    if ch.file == f:
-                        ch.file = file
-                        LOG.debug("Found change link to file for deletion outside the file changes list: %s", ch.id)
+                for ch in project.change_registry.relink_file(f, file):
+                    LOG.debug("Found change link to file for deletion outside the file changes list: %s", ch.id)
 
                 project.file_registry.delete(f)
+                PROFILER.count("merged_files")
 
     @staticmethod
     def _fix_annotated_lines_commits(changes: List[Change], missing_change: Optional[Change], commit: GitCommit) -> None:
         if missing_change is not None:
-            changes[0].annotated_lines = list(missing_change.annotated_lines)
+            changes[0].annotated_lines = missing_change.annotated_lines
 
         annotated_files = [c.annotated_lines for c in changes]
         if not annotated_files or not annotated_files[0]:
             return
 
-        for i in range(len(annotated_files[0])):
-            current_annotated_lines = [af[i] for af in annotated_files if i < len(af)]
-            if not current_annotated_lines:
-                continue
-            first_line = current_annotated_lines[0]
-            rest_lines = current_annotated_lines[1:]
+        # Walk all versions side by side once; annotated lines are immutable ropes, so the
+        # replacements are collected and applied afterwards.
+        other_lines = [iter(af) for af in annotated_files[1:]]
+        replacements = []
+        for i, first_line in enumerate(annotated_files[0]):
+            rest_lines = [line for line in (next(it, _EXHAUSTED) for it in other_lines) if line is not _EXHAUSTED]
             if first_line == commit:
                 replacement = next((line for line in rest_lines if line != commit), None)
                 if replacement:
-                    annotated_files[0][i] = replacement
+                    replacements.append((i, replacement))
 
-        for c in changes[1:]:
-            c.annotated_lines = list(changes[0].annotated_lines)
+        fixed_lines = annotated_files[0]
+        for i, replacement in replacements:
+            fixed_lines = fixed_lines.set(i, replacement)
+        for c in changes:
+            c.annotated_lines = fixed_lines
 
 class CommitTransformer:
     @staticmethod
@@ -266,20 +287,33 @@ class CommitTransformer:
         commit_dto: CommitDTO,
         project: GitProject,
         compute_annotated_lines: bool,
-        change_factory: ChangeFactory = SimpleChangeFactory(),
-    ) -> None:
+        change_factory: Optional[ChangeFactory] = None,
+        backend: ModelBackend = PYDANTIC_BACKEND,
+    ) -> GitCommit:
+        commit = CommitTransformer.create_commit(commit_dto, project, backend)
+        CommitTransformer.add_changes(commit_dto, commit, project, compute_annotated_lines, change_factory, backend)
+        return commit
+
+    @staticmethod
+    def create_commit(commit_dto: CommitDTO, project: GitProject, backend: ModelBackend = PYDANTIC_BACKEND) -> GitCommit:
+        """Create the commit with its parents and accounts, without any changes."""
+        with PROFILER.span("create_commit"):
+            return CommitTransformer._create_commit(commit_dto, project, backend)
+
+    @staticmethod
+    def _create_commit(commit_dto: CommitDTO, project: GitProject, backend: ModelBackend) -> GitCommit:
         LOG.debug("Creating commit with id: %s", commit_dto.id)
         parents = CommitTransformer._get_parents_from_ids(commit_dto.parent_ids, project)
         if len(parents) > 1:
             LOG.debug("Is merge commit")
 
-        author = CommitTransformer._get_author(commit_dto, project)
+        author = CommitTransformer._get_author(commit_dto, project, backend)
         LOG.debug("Parsed author %s", author.id)
 
         committer = (
             author
             if not commit_dto.committer_name
-            else CommitTransformer._get_committer(commit_dto, project)
+            else CommitTransformer._get_committer(commit_dto, project, backend)
         )
         LOG.debug("Parsed committer %s", committer.id)
 
@@ -290,7 +324,7 @@ class CommitTransformer:
             else CommitTransformer._parse_date(commit_dto.committer_date)
         )
 
-        commit = GitCommit(
+        commit = backend.git_commit(
             project=project,
             id=commit_dto.id,
             message=commit_dto.message,
@@ -311,28 +345,34 @@ class CommitTransformer:
         author.commits.append(commit)
         if committer != author:
             committer.commits.append(commit)
-
-        CommitTransformer._add_changes_to_commit(
-            commit_dto.changes, commit, project, compute_annotated_lines, change_factory
-        )
-
-        commit.repo_size = CommitTransformer._get_parent_commit_size(commit) + CommitTransformer._compute_commit_growth(
-            commit
-        )
-
-        LOG.debug("Done creating commit with id: %s", commit_dto.id)
+        CommitTransformer.invalidate_account_views(commit)
+        PROFILER.count("commits")
+        return commit
 
     @staticmethod
-    def _compute_commit_growth(commit: GitCommit) -> int:
-        return sum(
-            len(ch.added_lines) - len(ch.deleted_lines)
-            for ch in commit.changes
-            if not commit.parents or ch.parent_commit == commit.parents[0]
-        )
+    def invalidate_account_views(commit: GitCommit) -> None:
+        """Drop the cached changes and files of the commit's author and committer."""
+        for account in (commit.author, commit.committer):
+            if account is not None:
+                account.invalidate_views()
 
     @staticmethod
-    def _get_parent_commit_size(commit: GitCommit) -> int:
-        return commit.parents[0].repo_size if commit.parents else 0
+    def add_changes(
+        commit_dto: CommitDTO,
+        commit: GitCommit,
+        project: GitProject,
+        compute_annotated_lines: bool,
+        change_factory: Optional[ChangeFactory] = None,
+        backend: ModelBackend = PYDANTIC_BACKEND,
+    ) -> None:
+        change_factory = change_factory or SimpleChangeFactory(backend.change)
+        with PROFILER.span("add_changes"):
+            CommitTransformer._add_changes_to_commit(
+                commit_dto.changes, commit, project, compute_annotated_lines, change_factory, backend
+            )
+            project.last_change_index.record(commit)
+
+        LOG.debug("Done creating commit with id: %s", commit_dto.id)
 
     @staticmethod
     def _parse_date(timestamp: str) -> datetime:
@@ -346,9 +386,11 @@ class CommitTransformer:
         project: GitProject,
         compute_annotated_lines: bool,
         change_factory: ChangeFactory,
+        backend: ModelBackend = PYDANTIC_BACKEND,
     ) -> None:
         LOG.debug("Filtering changes")
         if commit.is_merge_commit:
+            PROFILER.count("merge_commits")
             changes_by_file = {}
             for ch in changes:
                 key = ch.old_file_name if ch.type == ChangeTypeDTO.DELETE else ch.new_file_name
@@ -356,32 +398,35 @@ class CommitTransformer:
             commit.changes = [
                 c
                 for group in changes_by_file.values()
-                for c in MergeChangesTransformer.transform(group, commit, project, compute_annotated_lines, change_factory)
+                for c in MergeChangesTransformer.transform(
+                    group, commit, project, compute_annotated_lines, change_factory, backend
+                )
             ]
         else:
             commit.changes = [
                 c
                 for ch in changes
-                if (c := ChangeTransformer.transform(ch, commit, project, compute_annotated_lines, change_factory))
+                if (c := ChangeTransformer.transform(ch, commit, project, compute_annotated_lines, change_factory, backend))
                 is not None
             ]
         for c in commit.changes:
             c.file.changes.append(c)
+        CommitTransformer.invalidate_account_views(commit)
         LOG.debug("Transforming changes")
 
     @staticmethod
-    def _get_author(commit_dto: CommitDTO, project: GitProject) -> GitAccount:
-        return CommitTransformer._get_account(GitAccountId(email = commit_dto.author_email, name = commit_dto.author_name), project)
+    def _get_author(commit_dto: CommitDTO, project: GitProject, backend: ModelBackend = PYDANTIC_BACKEND) -> GitAccount:
+        return CommitTransformer._get_account(GitAccountId(email = commit_dto.author_email, name = commit_dto.author_name), project, backend)
 
     @staticmethod
-    def _get_committer(commit_dto: CommitDTO, project: GitProject) -> GitAccount:
-        return CommitTransformer._get_account(GitAccountId(email = commit_dto.committer_email, name = commit_dto.committer_name), project)
+    def _get_committer(commit_dto: CommitDTO, project: GitProject, backend: ModelBackend = PYDANTIC_BACKEND) -> GitAccount:
+        return CommitTransformer._get_account(GitAccountId(email = commit_dto.committer_email, name = commit_dto.committer_name), project, backend)
 
     @staticmethod
-    def _get_account(git_account_id: GitAccountId, project: GitProject) -> GitAccount:
+    def _get_account(git_account_id: GitAccountId, project: GitProject, backend: ModelBackend = PYDANTIC_BACKEND) -> GitAccount:
         account = project.account_registry.get_by_id(str(git_account_id))
         if account is None:
-            account = GitAccount(git_id = git_account_id, project = project, name= git_account_id.name)
+            account = backend.git_account(git_id = git_account_id, project = project, name= git_account_id.name)
             project.account_registry.add(account)
         return account
 
@@ -390,51 +435,101 @@ class CommitTransformer:
         return [p for pid in parent_ids if (p := project.git_commit_registry.get_by_id(pid)) is not None]
 
 class GitProjectTransformer:
-    _branch_id: int = 0
-
     def __init__(
         self,
         git_log_dto: GitLogDTO,
         name: str = "Project",
         compute_annotated_lines: bool = False,
         change_factory: Optional[ChangeFactory] = None,
+        workers: int = 1,
+        backend: ModelBackend = PYDANTIC_BACKEND,
+        project: Optional[GitProject] = None,
     ):
+        """
+        With ``workers`` > 1 the project is built in two phases: the commit DAG and accounts
+        first, then the change chains, with annotated lines computed per file on a process
+        pool (see AnnotatedLinesTransformer). This is opt-in and the default stays serial until
+        src/benchmarks/transform_speedup.py shows a speedup on a multi-core machine.
+
+        ``backend`` selects the classes of the commit graph; SLOTTED_BACKEND trades pydantic
+        validation for less memory and a faster build.
+
+        With an existing ``project``, transform appends the commits of ``git_log_dto`` it does
+        not have yet instead of building a new one. It must have been built with the same
+        backend. The commits created by the last transform are kept in ``new_commits``.
+        """
         self.git_log_dto = git_log_dto
         self.name = name
         self.compute_annotated_lines = compute_annotated_lines
-        self.change_factory = change_factory or SimpleChangeFactory()
+        self.change_factory = change_factory or SimpleChangeFactory(backend.change)
+        self.workers = workers
+        self.backend = backend
+        self.project = project
+        self.new_commits: List[GitCommit] = []
 
     def transform(self) -> GitProject:
+        if self.project is not None:
+            with PROFILER.span("update"):
+                return self._update(self.project)
+        with PROFILER.span("transform"):
+            return self._create()
+
+    def _create(self) -> GitProject:
         project = GitProject(name = self.name)
         LOG.info("Creating GIT project %s", self.name)
-        commit_no = len(self.git_log_dto.commits)
-        for index, commit_dto in enumerate(self.git_log_dto.commits):
-            LOG.info(
-                "Creating commit %s / %s (%s%%)\r",
-                index + 1,
-                commit_no,
-                (index + 1) * 100 // commit_no,
-            )
-            CommitTransformer.add_to_project(
-                commit_dto, project, self.compute_annotated_lines, self.change_factory
-            )
+        if self.workers > 1:
+            self._transform_in_phases(project)
+        else:
+            commit_no = len(self.git_log_dto.commits)
+            for index, commit_dto in enumerate(self.git_log_dto.commits):
+                LOG.info(
+                    "Creating commit %s / %s (%s%%)\r",
+                    index + 1,
+                    commit_no,
+                    (index + 1) * 100 // commit_no,
+                )
+                self.new_commits.append(CommitTransformer.add_to_project(
+                    commit_dto, project, self.compute_annotated_lines, self.change_factory, self.backend
+                ))
 
-        first_commit = next(iter(project.git_commit_registry.all), None)
-        if first_commit:
-            self._compute_branch_ids(first_commit)
+        LOG.info("Computing commit metrics")
+        with PROFILER.span("metrics"):
+            project.commit_metrics.compute(project)
 
         LOG.info("Done creating GIT project %s", self.name)
         return project
 
-    def _compute_branch_ids(self, commit: GitCommit) -> None:
-        parents = commit.parents
-        if commit.is_merge_commit:
-            commit.branch_id = parents[0].branch_id if parents else 0
-        elif not parents or parents[0].is_split_commit:
-            GitProjectTransformer._branch_id += 1
-            commit.branch_id = GitProjectTransformer._branch_id
-        else:
-            commit.branch_id = parents[0].branch_id
+    def _update(self, project: GitProject) -> GitProject:
+        """Add only the new commits, their changes and annotated lines, then extend the metrics."""
+        registry = project.git_commit_registry
+        commit_dtos = [commit_dto for commit_dto in self.git_log_dto.commits if not registry.contains(commit_dto.id)]
+        LOG.info("Updating GIT project %s with %s new commits", project.name, len(commit_dtos))
+        # Serial on purpose: the annotated lines of the new changes only read their parent changes.
+        self.new_commits = [
+            CommitTransformer.add_to_project(
+                commit_dto, project, self.compute_annotated_lines, self.change_factory, self.backend
+            )
+            for commit_dto in commit_dtos
+        ]
+        with PROFILER.span("metrics"):
+            project.commit_metrics.update(project)
+        LOG.info("Done updating GIT project %s", project.name)
+        return project
+
+    def _transform_in_phases(self, project: GitProject) -> None:
+        from src.inspector_git.linker.parallel import AnnotatedLinesTransformer
 
+        LOG.info("Phase 1: creating %s commits", len(self.git_log_dto.commits))
+        commits = [
+            CommitTransformer.create_commit(commit_dto, project, self.backend) for commit_dto in self.git_log_dto.commits
+        ]
+        self.new_commits = commits
 
+        LOG.info("Phase 2: creating changes")
+        for commit_dto, commit in zip(self.git_log_dto.commits, commits):
+            CommitTransformer.add_changes(commit_dto, commit, project, False, self.change_factory, self.backend)
 
+        if self.compute_annotated_lines:
+            LOG.info("Phase 2: computing annotated lines")
+            with PROFILER.span("annotated_lines_parallel"):
+                AnnotatedLinesTransformer(self.workers).transform(project)
@@ -1,10 +1,15 @@
+import io
+from typing import BinaryIO, Tuple
+
 from src.inspector_git.reader.dto.gitlog.commit_dto import CommitDTO
 from src.inspector_git.reader.dto.gitlog.git_log_dto import GitLogDTO
 from src.inspector_git.reader.iglog.iglog_constants import IGLogConstants
 from src.inspector_git.reader.iglog.readers.ig_commit_reader import IGCommitReader
 from src.logger import get_logger
+from src.profiler import get_profiler
 
 LOG = get_logger("IgLogReader")
+PROFILER = get_profiler()
 
 class IGLogReader:
     def __init__(self, commit_reader: IGCommitReader | None = None):
@@ -16,20 +21,42 @@ class IGLogReader:
         """
         reader = stream if hasattr(stream, "readline") else open(stream, "r", encoding="utf-8")
         iglog_version = reader.readline().strip()
+        return self.read_commits(reader)
+
+    def read_commits(self, reader) -> GitLogDTO:
+        """
+        Reads the commits of an IGLog without its version line, e.g. the tail appended after a previous read.
+        """
+        with PROFILER.span("read_iglog"):
+            current_commit_lines: list[str] = []
+            commits: list[CommitDTO] = []
 
-        current_commit_lines: list[str] = []
-        commits: list[CommitDTO] = []
+            for line in reader:
+                line = line.rstrip("\n")
+                if line.startswith(IGLogConstants.commit_id_prefix):
+                    LOG.debug(f"Extracting commit short sha: {line[len(IGLogConstants.commit_id_prefix) :len(IGLogConstants.commit_id_prefix)+7]}")
+                    if current_commit_lines:
+                        commits.append(self.commit_reader.read(current_commit_lines))
+                    current_commit_lines = []
+                current_commit_lines.append(line)
 
-        for line in reader:
-            line = line.rstrip("\n")
-            if line.startswith(IGLogConstants.commit_id_prefix):
-                LOG.debug(f"Extracting commit short sha: {line[len(IGLogConstants.commit_id_prefix) :len(IGLogConstants.commit_id_prefix)+7]}")
-                if current_commit_lines:
-                    commits.append(self.commit_reader.read(current_commit_lines))
-                current_commit_lines = []
-            current_commit_lines.append(line)
+            if current_commit_lines:
+                commits.append(self.commit_reader.read(current_commit_lines))
 
-        if current_commit_lines:
-            commits.append(self.commit_reader.read(current_commit_lines))
+            PROFILER.count("iglog_commits", len(commits))
+            return GitLogDTO(commits)
 
-        return GitLogDTO(commits)
+    def read_appended(self, stream: BinaryIO, complete: bool = False) -> Tuple[GitLogDTO, int]:
+        """
+        Reads the commits of a binary stream positioned at a commit header, while a writer may still be
+        appending to it. Only the commits followed by another commit header are read, and the last one
+        too when ``complete`` says the log is fully written. Returns them with the number of bytes they
+        span, i.e. the offset from the start position of the first commit not read.
+        """
+        data = stream.read()
+        if complete and data.endswith(b"\n"):
+            end = len(data)
+        else:
+            # The start of the last commit header; 0 when there is at most one commit.
+            end = data.rfind(b"\n" + IGLogConstants.commit_id_prefix.encode("utf-8")) + 1
+        return self.read_commits(io.StringIO(data[:end].decode("utf-8"))), end
@@ -5,6 +5,9 @@ from src.inspector_git.reader.dto.gitlog.git_log_dto import GitLogDTO
 from src.inspector_git.reader.git_client import GitClient
 from src.inspector_git.reader.iglog.iglog_constants import IGLogConstants
 from src.inspector_git.reader.parsers.commit_parser_factory import CommitParserFactory
+from src.profiler import get_profiler
+
+PROFILER = get_profiler()
 
 class LogParser:
     """
@@ -37,19 +40,21 @@ class LogParser:
         """
         Parses a list of git log lines into a GitLogDTO.
         """
-        commits = self.extract_commits(lines)
-        self.LOG.debug(f"Found {len(commits)} commits")
-        # Group by commit id
-        id_to_commit_map: Dict[str, List[List[str]]] = {}
-        for commit_lines in commits:
-            commit_id = self.get_commit_id(commit_lines)
-            id_to_commit_map.setdefault(commit_id, []).append(commit_lines)
-        # Convert grouped commits into CommitDTO objects
-        commit_dtos = [
-            CommitParserFactory.create_and_parse(commit_group, self.git_client)
-            for commit_group in id_to_commit_map.values()
-        ]
-        return GitLogDTO(commits=commit_dtos)
+        with PROFILER.span("parse_git_log"):
+            commits = self.extract_commits(lines)
+            self.LOG.debug(f"Found {len(commits)} commits")
+            # Group by commit id
+            id_to_commit_map: Dict[str, List[List[str]]] = {}
+            for commit_lines in commits:
+                commit_id = self.get_commit_id(commit_lines)
+                id_to_commit_map.setdefault(commit_id, []).append(commit_lines)
+            # Convert grouped commits into CommitDTO objects
+            commit_dtos = [
+                CommitParserFactory.create_and_parse(commit_group, self.git_client)
+                for commit_group in id_to_commit_map.values()
+            ]
+            PROFILER.count("parsed_commits", len(commit_dtos))
+            return GitLogDTO(commits=commit_dtos)
 
     @staticmethod
     def get_commit_id(commit_lines: List[str]) -> str:
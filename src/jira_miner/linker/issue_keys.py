@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import re
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from src.common.models import Issue
+    from src.jira_miner.linker.registries import IssueRegistry
+
+# Anything shaped like a Jira key, PROJECT-123, as a whole word.
+ISSUE_KEY_PATTERN = re.compile(r"\b[A-Za-z][A-Za-z0-9_]*-\d+\b")
+
+
+class IssueKeyExtractor:
+    """
+    Finds the issues of a registry mentioned in free text.
+
+    Candidates are found with the generic ISSUE_KEY_PATTERN and confirmed by a hash lookup
+    of their upper-cased form in the registry, so the cost does not grow with the number
+    of issues. Keys that do not have the generic shape are matched, case-insensitively,
+    by an alternation of just those keys, rebuilt when the registry changes size.
+
+    ``find_all`` can scan many texts on a process pool: workers only see ``(index, text)``
+    pairs and send back ``(index, candidate key)`` edges, which are confirmed and resolved
+    to issues in the parent, so the result is the same as scanning serially.
+    """
+
+    def __init__(self, registry: IssueRegistry) -> None:
+        self.registry = registry
+        self._size = -1
+        self._irregular: Optional[re.Pattern] = None
+
+    def find_issues(self, text: str) -> List[Issue]:
+        """The distinct issues mentioned in ``text``, in order of first mention."""
+        found = {}
+        get_by_id = self.registry.get_by_id
+        for token in self._tokens(text):
+            issue = get_by_id(token.upper())
+            if issue is not None:
+                found[issue.key] = issue
+        return list(found.values())
+
+    def find_all(self, texts: Sequence[str], workers: int = 1) -> List[List[Issue]]:
+        """``find_issues`` of every text, scanned on ``workers`` processes when more than one."""
+        if workers <= 1 or len(texts) < 2:
+            return [self.find_issues(text) for text in texts]
+
+        pairs = list(enumerate(texts))
+        shard_count = min(workers * 4, len(pairs))
+        shard_size = -(-len(pairs) // shard_count)
+        shards = [pairs[start:start + shard_size] for start in range(0, len(pairs), shard_size)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            shard_edges = list(pool.map(find_issue_keys, shards, repeat(self._irregular_pattern())))
+
+        found: List[Dict[str, Issue]] = [{} for _ in texts]
+        get_by_id = self.registry.get_by_id
+        for edges in shard_edges:
+            for index, key in edges:
+                issue = get_by_id(key)
+                if issue is not None:
+                    found[index][issue.key] = issue
+        return [list(issues.values()) for issues in found]
+
+    def _tokens(self, text: str) -> Iterator[str]:
+        return _key_tokens(text, self._irregular_pattern())
+
+    def _irregular_pattern(self) -> Optional[re.Pattern]:
+        registry = self.registry
+        if self._size != len(registry.all):
+            keys = [re.escape(key) for key in registry.all_ids if not ISSUE_KEY_PATTERN.fullmatch(key)]
+            self._irregular = re.compile(r"\b(" + "|".join(keys) + r")\b", re.IGNORECASE) if keys else None
+            self._size = len(registry.all)
+        return self._irregular
+
+
+def find_issue_keys(texts: Sequence[Tuple[int, str]], irregular: Optional[re.Pattern]) -> List[Tuple[int, str]]:
+    """Worker entry point: the distinct upper-cased candidate keys of each text, in order of first mention."""
+    return [(index, key) for index, text in texts for key in dict.fromkeys(token.upper() for token in _key_tokens(text, irregular))]
+
+
+def _key_tokens(text: str, irregular: Optional[re.Pattern]) -> Iterator[str]:
+    yield from ISSUE_KEY_PATTERN.findall(text)
+    if irregular is not None:
+        yield from irregular.findall(text)
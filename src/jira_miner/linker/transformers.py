@@ -25,8 +25,7 @@ class JiraProjectTransformer:
             issue_status = project.issue_status_registry.add(issue_status)
 
             # link status <-> category
-            if issue_status not in category.issue_statuses:
-                category.issue_statuses.append(issue_status)
+            category.issue_statuses.add(issue_status)
 
         for issue_type in self.jira_data.issueTypes:
             it = IssueType(
@@ -57,38 +56,30 @@ class JiraProjectTransformer:
 
             issue_status = project.issue_status_registry.get_by_id(issue.status.id)
             if issue_status:
-                if i not in issue_status.issues:
-                    issue_status.issues.append(i)
-                if issue_status not in i.issue_statuses:
-                    i.issue_statuses.append(issue_status)
+                issue_status.issues.add(i)
+                i.issue_statuses.add(issue_status)
 
             issue_type = project.issue_type_registry.get_by_id(issue.issueType)
             if issue_type:
-                if i not in issue_type.issues:
-                    issue_type.issues.append(i)
-                if issue_type not in i.issue_types:
-                    i.issue_types.append(issue_type)
+                issue_type.issues.add(i)
+                i.issue_types.add(issue_type)
 
             reporter = project.jira_user_registry.get_by_id(issue.reporterId)
             if reporter:
-                if i not in reporter.issues_as_reporter:
-                    reporter.issues_as_reporter.append(i)
+                reporter.issues_as_reporter.add(i)
                 i.reporter = reporter
 
             if issue.creatorId is not None:
                 creator = project.jira_user_registry.get_by_id(issue.creatorId)
                 if creator:
-                    if i not in creator.issues_as_creator:
-                        creator.issues_as_creator.append(i)
+                    creator.issues_as_creator.add(i)
                     i.creator = creator
 
             if issue.assigneeId is not None:
                 assignee = project.jira_user_registry.get_by_id(issue.assigneeId)
                 if assignee:
-                    if i not in assignee.issues_as_assignee:
-                        assignee.issues_as_assignee.append(i)
-                    if assignee not in i.jira_users_as_assignee:
-                        i.jira_users_as_assignee.append(assignee)
+                    assignee.issues_as_assignee.add(i)
+                    i.jira_users_as_assignee.add(assignee)
 
         for jira_issue in self.jira_data.issues:
             current_issue = project.issue_registry.get_by_id(jira_issue.key)
@@ -100,7 +91,6 @@ class JiraProjectTransformer:
                 parent_issue = project.issue_registry.get_by_id(jira_issue.parent)
                 if parent_issue:
                     current_issue.parent = parent_issue
-                    if current_issue not in parent_issue.children:
-                        parent_issue.children.append(current_issue)
+                    parent_issue.children.add(current_issue)
 
         return project
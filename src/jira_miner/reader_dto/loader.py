@@ -1,8 +1,11 @@
 from src.common.loader import BaseJsonLoader
-from src.jira_miner.reader_dto.models import JsonFileFormatJira
+from src.jira_miner.reader_dto.models import Issue, JsonFileFormatJira
 
 
 class JiraJsonLoader(BaseJsonLoader):
     def load(self) -> JsonFileFormatJira:
-        data = self._read_json()
-        return JsonFileFormatJira.model_validate(data)
\ No newline at end of file
+        return self._load_json(JsonFileFormatJira)
+
+    def stream(self) -> JsonFileFormatJira:
+        """Like ``load``, but ``issues`` is read and validated one issue at a time on each iteration."""
+        return self._stream_json(JsonFileFormatJira, {"issues": Issue})
\ No newline at end of file
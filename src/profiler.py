@@ -0,0 +1,113 @@
+import json
+from time import perf_counter
+from typing import Dict, List, Tuple
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("_profiler", "_name", "_start")
+
+    def __init__(self, profiler: "Profiler", name: str):
+        self._profiler = profiler
+        self._name = name
+
+    def __enter__(self):
+        self._profiler._stack.append(self._name)
+        self._start = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        elapsed = perf_counter() - self._start
+        stack = self._profiler._stack
+        path = tuple(stack)
+        stack.pop()
+        stats = self._profiler._spans.get(path)
+        if stats is None:
+            stats = self._profiler._spans[path] = [0, 0.0, 0.0]
+        stats[0] += 1
+        stats[1] += elapsed
+        if len(path) > 1:
+            parent = self._profiler._spans.get(path[:-1])
+            if parent is None:
+                parent = self._profiler._spans[path[:-1]] = [0, 0.0, 0.0]
+            parent[2] += elapsed
+
+
+class Profiler:
+    """
+    Timed spans and counters for the build pipeline.
+
+    Spans nest, and are reported per call path with their number of calls, total time and
+    self time (total minus nested spans). While disabled, ``span`` returns a shared no-op
+    context manager and ``count`` returns immediately. Only the current process is measured,
+    so work done on a process pool shows up as the span around it.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self._stack: List[str] = []
+        self._spans: Dict[Tuple[str, ...], List] = {}
+        self.counters: Dict[str, int] = {}
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def reset(self) -> None:
+        self._stack = []
+        self._spans = {}
+        self.counters = {}
+
+    def span(self, name: str):
+        """Context manager timing the enclosed block as ``name``, nested in the enclosing spans."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def count(self, name: str, amount: int = 1) -> None:
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def report(self) -> Dict:
+        """Spans by ``;``-joined call path, and counters."""
+        return {
+            "spans": {
+                ";".join(path): {"calls": calls, "seconds": total, "self_seconds": total - nested}
+                for path, (calls, total, nested) in sorted(self._spans.items())
+            },
+            "counters": dict(sorted(self.counters.items())),
+        }
+
+    def dump_json(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+
+    def dump_collapsed(self, path: str) -> None:
+        """Write self times in microseconds as collapsed stacks, the input of flamegraph.pl and speedscope."""
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, (_, total, nested) in sorted(self._spans.items()):
+                micros = round((total - nested) * 1e6)
+                if micros > 0:
+                    f.write(f"{';'.join(stack)} {micros}\n")
+
+
+PROFILER = Profiler()
+
+
+def get_profiler() -> Profiler:
+    """Return the profiler shared by the build pipeline."""
+    return PROFILER
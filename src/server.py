@@ -2,6 +2,7 @@ import io
 import sys
 import traceback
 from pathlib import Path
+from typing import Optional
 from fastapi import FastAPI
 from pydantic import BaseModel
 from fastapi.responses import JSONResponse
@@ -14,23 +15,64 @@ from src.jira_miner.linker.transformers import JiraProjectTransformer
 from src.github_miner.reader_dto.loader import GithubJsonLoader
 from src.github_miner.linker.transformers import GitHubProjectTransformer
 from src.common.project_linkers import ProjectLinker
+from src.common.build_cache import BuildCache
+from src.inspector_git.utils.constants import APP_FOLDER_PATH
+from src.logger import get_logger
+
+LOG = get_logger(__name__)
 
 
 class CodeRequest(BaseModel):
     code: str
 
 
+class UpdateRequest(BaseModel):
+    # The iglog is fully written, so its last commit can be read too.
+    complete: bool = False
+
+
 graph_data = {}
+# Linked projects by the content of their inputs, so a restart with unchanged inputs skips the build.
+BUILD_CACHE_PATH = APP_FOLDER_PATH / "build-cache"
+# The byte offset of the first iglog commit not read yet, so updates only parse what was appended since.
+iglog_position = {}
 
 
 def build_projects():
-    """Builds the projects once and links them together."""
+    """Builds the projects once and links them together, or loads them from the build cache."""
     base_path = Path(__file__).parent.parent / "test-input"
+    iglog_file = base_path / "inspector-git" / "zeppelin.iglog"
+    jira_file = base_path / "jira-miner" / "ZEPPELIN-detailed-issues.json"
+    github_file = base_path / "github-miner" / "githubProject.json"
+
+    cache = BuildCache(BUILD_CACHE_PATH, [iglog_file, jira_file, github_file], compute_annotated_lines=False)
+    projects = cache.load()
+    if projects is None:
+        projects = link_projects(iglog_file, jira_file, github_file)
+        try:
+            cache.store(projects)
+        except Exception as e:
+            # The build succeeded; the next start just builds again.
+            LOG.warning(f"Could not store the build cache {cache.path}: {e}")
+    else:
+        iglog_position.update(path=iglog_file, offset=iglog_file.stat().st_size)
+        print("✅ Graph loaded from the build cache.")
+
+    return {
+        "git": projects["git"],
+        # Per-commit LOC, file count, churn and branch id, by commit graph ordinal.
+        "git_metrics": projects["git"].commit_metrics,
+        "jira": projects["jira"],
+        "github": projects["github"],
+    }
+
 
+def link_projects(iglog_file: Path, jira_file: Path, github_file: Path):
+    """Reads the inputs, transforms them into projects and links the projects together."""
     # InspectorGit
-    iglog_file = base_path / "inspector-git" / "zeppelin.iglog"
-    with open(iglog_file, "r", encoding="utf-8") as f:
+    with open(iglog_file, "rb") as raw, io.TextIOWrapper(raw, encoding="utf-8") as f:
         git_log_dto = IGLogReader().read(f)
+        iglog_position.update(path=iglog_file, offset=raw.tell())
 
     git_project = GitProjectTransformer(
         git_log_dto,
@@ -39,12 +81,12 @@ def build_projects():
     ).transform()
 
     # Jira
-    jira_loader = JiraJsonLoader(str(base_path / "jira-miner" / "ZEPPELIN-detailed-issues.json"))
+    jira_loader = JiraJsonLoader(str(jira_file))
     jira_data = jira_loader.load()
     jira_project = JiraProjectTransformer(jira_data, name="Jira Project").transform()
 
     # GitHub
-    github_loader = GithubJsonLoader(str(base_path / "github-miner" / "githubProject.json"))
+    github_loader = GithubJsonLoader(str(github_file))
     github_data = github_loader.load()
     github_project = GitHubProjectTransformer(github_data, name="GitHub Project").transform()
 
@@ -53,11 +95,25 @@ def build_projects():
     ProjectLinker.link_projects(jira_project, git_project)
     ProjectLinker.link_projects(github_project, git_project)
 
-    return {
-        "git": git_project,
-        "jira": jira_project,
-        "github": github_project,
-    }
+    return {"git": git_project, "jira": jira_project, "github": github_project}
+
+
+def update_git_project(complete: bool = False) -> int:
+    """
+    Adds the commits appended to the iglog since it was last read and links them; returns their number.
+    The last commit may still be being written, so it waits for the next update unless ``complete``.
+    """
+    iglog_file = iglog_position["path"]
+    with open(iglog_file, "rb") as f:
+        f.seek(iglog_position["offset"])
+        git_log_dto, read = IGLogReader().read_appended(f, complete)
+    iglog_position["offset"] += read
+
+    transformer = GitProjectTransformer(git_log_dto, compute_annotated_lines=False, project=graph_data["git"])
+    transformer.transform()
+    ProjectLinker.link_git_commits(graph_data["jira"], graph_data["git"], transformer.new_commits)
+    ProjectLinker.link_git_commits(graph_data["github"], graph_data["git"], transformer.new_commits)
+    return len(transformer.new_commits)
 
 
 @asynccontextmanager
@@ -94,3 +150,12 @@ async def execute_code(request: CodeRequest):
         return JSONResponse({"error": tb}, status_code=400)
     finally:
         sys.stdout = sys_stdout
+
+
+@app.post("/update")
+async def update_projects(request: Optional[UpdateRequest] = None):
+    try:
+        return JSONResponse({"new_commits": update_git_project(request is not None and request.complete)})
+    except Exception:
+        tb = traceback.format_exc()
+        return JSONResponse({"error": tb}, status_code=400)